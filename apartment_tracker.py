@@ -2,24 +2,68 @@
 """NYC Apartment Tracker - Scrapes StreetEasy and sends Discord notifications."""
 
 import argparse
+import atexit
+import copy
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import logging
 import math
 import os
+import random
 import re
+import statistics
 import sys
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from urllib.parse import quote
 
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
+from curl_cffi import CurlHttpVersion
 from curl_cffi import requests as cffi_requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON for seen_listings.json
+    orjson = None
 
 # curl_cffi session reused across requests (Chrome TLS fingerprint)
 _cffi_session: cffi_requests.Session | None = None
 
+
+def _make_http_session() -> requests.Session:
+    """Build the pooled session used for Geoclient and Discord API calls.
+
+    Keep-alive connections are reused across calls instead of paying a TCP+TLS
+    handshake per listing. Connection errors and 5xx on idempotent requests are
+    retried with backoff; 429s are left to the callers, which honor retry_after.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[500, 502, 503, 504],
+                          raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Plain HTTP session for Geoclient and Discord (no impersonation needed)
+_http = _make_http_session()
+atexit.register(_http.close)
+
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
@@ -46,32 +90,190 @@ def load_config() -> dict:
         return json.load(f)
 
 
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _json_dumps_pretty(obj) -> bytes:
+    """Serialize to 2-space-indented UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# The backend is fixed for the life of the process, so resolve it (and the
+# db module import) once instead of on every load/save.
+try:
+    import db as db_module
+except ImportError:
+    if os.environ.get("MONGODB_URI"):
+        # Falling back to the JSON file here would scrape against an empty seen
+        # set, treat it as a first run, and write state to the wrong store
+        raise
+    db_module = None  # pymongo not installed — JSON-file backend only
+
+_USE_MONGODB = bool(os.environ.get("MONGODB_URI")) and db_module is not None
+
+
 def _use_mongodb() -> bool:
     """Check if MongoDB backend is configured."""
-    return bool(os.environ.get("MONGODB_URI"))
+    return _USE_MONGODB
+
+
+# Changes since the last full write of SEEN_PATH are appended to a JSON-lines
+# log beside it; load_seen replays the log and save_seen folds it back into
+# SEEN_PATH once it holds this many records. The log's first line names the
+# digest of the SEEN_PATH it applies to, so a log left behind by a crash
+# between rewriting SEEN_PATH and clearing the log is never replayed.
+SEEN_WAL_COMPACT_RECORDS = 500
+
+# (path, entries, log record count, SEEN_PATH digest) of the JSON store as last
+# read or written, so save_seen can append only what changed during the run.
+_seen_file_snapshot: tuple[Path, dict[str, dict], int, str] | None = None
+# Seen entries as last loaded from or saved to MongoDB, so save_seen only
+# writes listings that were added or changed during the run.
+_seen_mongo_snapshot: dict[str, dict] | None = None
+
+
+def _intern_neighborhoods(seen: dict) -> dict:
+    """Intern neighborhood names so the thousands of entries share a few dozen strings.
+
+    Keeps the loaded dict small and lets the per-neighborhood dicts in the
+    analytics match keys by identity.
+    """
+    for entry in seen.values():
+        hood = entry.get("neighborhood")
+        if hood:
+            entry["neighborhood"] = sys.intern(hood)
+    return seen
 
 
 def load_seen() -> dict:
+    global _seen_file_snapshot, _seen_mongo_snapshot
     if _use_mongodb():
-        import db as db_module
-        return db_module.load_seen_from_mongo()
+        seen = _intern_neighborhoods(db_module.load_seen_from_mongo())
+        _seen_mongo_snapshot = copy.deepcopy(seen)
+        return seen
     if SEEN_PATH.exists():
-        with open(SEEN_PATH) as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                # Migrate from old list format to dict format
-                return {url: {"first_seen": datetime.now(timezone.utc).isoformat()} for url in data}
-            return data
+        with open(SEEN_PATH, "rb") as f:
+            raw = f.read()
+        data = _json_loads(raw)
+        if isinstance(data, list):
+            # Migrate from old list format to dict format
+            _seen_file_snapshot = None
+            return {url: {"first_seen": datetime.now(timezone.utc).isoformat()} for url in data}
+        digest = _seen_digest(raw)
+        wal_records = _replay_seen_wal(data, digest)
+        _seen_file_snapshot = (SEEN_PATH, copy.deepcopy(data), wal_records, digest)
+        return _intern_neighborhoods(data)
     return {}
 
 
+def _seen_wal_path() -> Path:
+    return SEEN_PATH.with_suffix(".wal.jsonl")
+
+
+def _seen_digest(raw: bytes) -> str:
+    """Identify one version of SEEN_PATH's contents."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _replay_seen_wal(seen: dict, digest: str) -> int:
+    """Apply the change log beside SEEN_PATH to `seen`. Returns the number of records.
+
+    A log whose header names a different SEEN_PATH digest predates the current
+    file and is skipped.
+    """
+    wal_path = _seen_wal_path()
+    if not wal_path.exists():
+        return 0
+    count = 0
+    with open(wal_path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = _json_loads(line)
+            except ValueError:
+                # A crash mid-append leaves a partial last line; report the log
+                # as full so the next save_seen rewrites SEEN_PATH and clears it
+                log.warning("Ignoring truncated record in %s", wal_path.name)
+                return SEEN_WAL_COMPACT_RECORDS
+            if "base" in record:
+                if record["base"] != digest:
+                    # Left over from a crash after SEEN_PATH was rewritten;
+                    # report it as full so the next save_seen clears it
+                    log.warning("Ignoring stale %s", wal_path.name)
+                    return SEEN_WAL_COMPACT_RECORDS
+                continue
+            if record.get("deleted"):
+                seen.pop(record["url"], None)
+            else:
+                seen[record["url"]] = record["entry"]
+            count += 1
+    return count
+
+
+def _write_seen_file(seen: dict) -> None:
+    """Rewrite SEEN_PATH with every entry and empty the change log."""
+    global _seen_file_snapshot
+    # Write to a sibling temp file and rename over the original, so a crash
+    # mid-write can't leave a truncated seen_listings.json behind
+    tmp_path = SEEN_PATH.with_suffix(SEEN_PATH.suffix + ".tmp")
+    raw = _json_dumps_pretty(seen)
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, SEEN_PATH)
+    # A crash before this leaves a log whose header names the old file's
+    # digest, which load_seen skips
+    _clear_seen_wal()
+    _seen_file_snapshot = (SEEN_PATH, copy.deepcopy(seen), 0, _seen_digest(raw))
+
+
+def _clear_seen_wal() -> None:
+    with open(_seen_wal_path(), "wb"):
+        pass
+
+
 def save_seen(seen: dict) -> None:
+    global _seen_file_snapshot, _seen_mongo_snapshot
     if _use_mongodb():
-        import db as db_module
-        db_module.save_seen_to_mongo(seen)
+        written = db_module.save_seen_to_mongo(seen, previous=_seen_mongo_snapshot)
+        log.debug("seen listings: wrote %d of %d to MongoDB", written, len(seen))
+        _seen_mongo_snapshot = copy.deepcopy(seen)
         return
-    with open(SEEN_PATH, "w") as f:
-        json.dump(seen, f, indent=2)
+    if _seen_file_snapshot is None or _seen_file_snapshot[0] != SEEN_PATH or not SEEN_PATH.exists():
+        _write_seen_file(seen)
+        return
+
+    _, previous, wal_records, digest = _seen_file_snapshot
+    records = [{"url": url, "entry": entry} for url, entry in seen.items()
+               if previous.get(url) != entry]
+    records.extend({"url": url, "deleted": True} for url in previous if url not in seen)
+    if not records:
+        log.debug("seen listings unchanged, skipping write")
+        return
+    if wal_records + len(records) >= SEEN_WAL_COMPACT_RECORDS:
+        _write_seen_file(seen)
+        return
+    # Append only this run's changes instead of rewriting every entry
+    lines = [_json_dumps(record) + b"\n" for record in records]
+    if not wal_records:
+        lines.insert(0, _json_dumps({"base": digest}) + b"\n")
+    with open(_seen_wal_path(), "ab") as f:
+        f.write(b"".join(lines))
+    _seen_file_snapshot = (SEEN_PATH, copy.deepcopy(seen), wal_records + len(records), digest)
+    log.debug("seen listings: appended %d change(s) to %s", len(records), _seen_wal_path().name)
 
 # ---------------------------------------------------------------------------
 # StreetEasy scraping
@@ -82,29 +284,29 @@ STREETEASY_BASE = "https://streeteasy.com"
 # Maps search slugs to valid neighborhood names that StreetEasy returns.
 # Sub-neighborhoods (e.g. Manhattan Valley for UWS) are included.
 # Sponsored listings from unrelated areas (e.g. Greenpoint) get filtered out.
-NEIGHBORHOOD_ALIASES: dict[str, set[str]] = {
-    "east-village": {"East Village"},
-    "west-village": {"West Village"},
-    "upper-west-side": {"Upper West Side", "Manhattan Valley", "Lincoln Square"},
-    "chelsea": {"Chelsea", "West Chelsea"},
-    "les": {"Lower East Side", "Two Bridges", "Chinatown"},
-    "upper-east-side": {"Upper East Side", "Yorkville", "Carnegie Hill", "Lenox Hill"},
-    "hells-kitchen": {"Hell's Kitchen", "Midtown West"},
-    "murray-hill": {"Murray Hill", "Kips Bay"},
-    "gramercy-park": {"Gramercy Park", "Gramercy", "Kips Bay"},
-    "flatiron": {"Flatiron", "NoMad"},
-    "kips-bay": {"Kips Bay"},
-    "greenwich-village": {"Greenwich Village"},
-    "soho": {"SoHo"},
-    "tribeca": {"Tribeca"},
-    "financial-district": {"Financial District", "FiDi"},
-    "williamsburg": {"Williamsburg", "East Williamsburg"},
-    "greenpoint": {"Greenpoint"},
-    "park-slope": {"Park Slope"},
-    "bushwick": {"Bushwick"},
-    "bed-stuy": {"Bedford-Stuyvesant", "Bed-Stuy"},
-    "astoria": {"Astoria"},
-    "long-island-city": {"Long Island City"},
+NEIGHBORHOOD_ALIASES: dict[str, frozenset[str]] = {
+    "east-village": frozenset({"East Village"}),
+    "west-village": frozenset({"West Village"}),
+    "upper-west-side": frozenset({"Upper West Side", "Manhattan Valley", "Lincoln Square"}),
+    "chelsea": frozenset({"Chelsea", "West Chelsea"}),
+    "les": frozenset({"Lower East Side", "Two Bridges", "Chinatown"}),
+    "upper-east-side": frozenset({"Upper East Side", "Yorkville", "Carnegie Hill", "Lenox Hill"}),
+    "hells-kitchen": frozenset({"Hell's Kitchen", "Midtown West"}),
+    "murray-hill": frozenset({"Murray Hill", "Kips Bay"}),
+    "gramercy-park": frozenset({"Gramercy Park", "Gramercy", "Kips Bay"}),
+    "flatiron": frozenset({"Flatiron", "NoMad"}),
+    "kips-bay": frozenset({"Kips Bay"}),
+    "greenwich-village": frozenset({"Greenwich Village"}),
+    "soho": frozenset({"SoHo"}),
+    "tribeca": frozenset({"Tribeca"}),
+    "financial-district": frozenset({"Financial District", "FiDi"}),
+    "williamsburg": frozenset({"Williamsburg", "East Williamsburg"}),
+    "greenpoint": frozenset({"Greenpoint"}),
+    "park-slope": frozenset({"Park Slope"}),
+    "bushwick": frozenset({"Bushwick"}),
+    "bed-stuy": frozenset({"Bedford-Stuyvesant", "Bed-Stuy"}),
+    "astoria": frozenset({"Astoria"}),
+    "long-island-city": frozenset({"Long Island City"}),
 }
 
 # Borough lookup for Geoclient API — must send the correct borough for non-Manhattan areas
@@ -220,24 +422,44 @@ NEIGHBORHOOD_CENTERS: dict[str, tuple[float, float]] = {
 }
 
 
+# Precompiled patterns for card/page parsing (these run once per card or listing)
+_QUERY_STRING_RE = re.compile(r"\?.*$")
+_TITLE_NEIGHBORHOOD_RE = re.compile(r"in\s+(.+?)(?:\s+at|$)")
+_DIGIT_RE = re.compile(r"\d")
+_PAGE_LINK_RE = re.compile(r"page=\d+")
+_PAGE_NUM_RE = re.compile(r"page=(\d+)")
+_SQFT_RE = re.compile(r"([\d,]+)")
+
+# CSS selectors for search result pages, compiled once instead of on every .select() call
+_CARD_FALLBACK_SEL = soupsieve.compile('div[class*="ListingCard-module__cardContainer"]')
+_ADDRESS_LINK_SEL = soupsieve.compile('a[class*="addressTextAction"]')
+_BUILDING_LINK_SEL = soupsieve.compile('a[href*="/building/"]')
+_PRICE_SEL = soupsieve.compile('span[class*="price" i][class*="PriceInfo"]')
+_PRICE_FALLBACK_SEL = soupsieve.compile('span[class*="price" i]')
+_TITLE_SEL = soupsieve.compile('p[class*="title" i][class*="ListingDescription"]')
+_TITLE_FALLBACK_SEL = soupsieve.compile('p[class*="title" i]')
+_DETAIL_SPANS_SEL = soupsieve.compile('span[class*="BedsBathsSqft"]')
+_PAGINATION_SEL = soupsieve.compile('div[class*="paginationContainer"]')
+
+
 def parse_price(price_str: str) -> int | None:
     """Extract integer price from a string like '$3,200'. Returns None if unparseable."""
-    match = re.search(r"[\d,]+", price_str.replace(",", ""))
-    if match:
-        try:
-            return int(match.group(0))
-        except ValueError:
-            return None
-    return None
-
+    # Single scan over the first run of digits (commas inside it are skipped);
+    # cheaper than a regex search for these short strings.
+    value = 0
+    seen_digit = False
+    for ch in price_str:
+        if "0" <= ch <= "9":
+            value = value * 10 + (ord(ch) - 48)
+            seen_digit = True
+        elif seen_digit and ch != ",":
+            break
+    return value if seen_digit else None
 
-def build_search_url(neighborhood: str, config: dict) -> str:
-    """Build a StreetEasy rental search URL from config."""
-    search = config["search"]
-    max_price = search["max_price"]
-    min_price = search.get("min_price", 0)
 
-    beds = search["bed_rooms"]
+@functools.lru_cache(maxsize=32)
+def _search_filter_path(max_price: int, min_price: int, beds: tuple, no_fee: bool) -> str:
+    """Build the quoted StreetEasy filter path segment (constant for a given search config)."""
     if len(beds) == 1:
         beds_param = beds[0]
     else:
@@ -247,10 +469,20 @@ def build_search_url(neighborhood: str, config: dict) -> str:
     beds_filter = f"beds:{beds_param}"
     filters = f"{price_filter}|{beds_filter}"
 
-    if search.get("no_fee"):
+    if no_fee:
         filters += "|no_fee:1"
 
-    return f"{STREETEASY_BASE}/for-rent/{neighborhood}/{quote(filters, safe=':|-')}"
+    return quote(filters, safe=':|-')
+
+
+def build_search_url(neighborhood: str, config: dict) -> str:
+    """Build a StreetEasy rental search URL from config."""
+    search = config["search"]
+    filter_path = _search_filter_path(
+        search["max_price"], search.get("min_price", 0),
+        tuple(search["bed_rooms"]), bool(search.get("no_fee")),
+    )
+    return f"{STREETEASY_BASE}/for-rent/{neighborhood}/{filter_path}"
 
 
 class ScraperSession:
@@ -258,8 +490,13 @@ class ScraperSession:
 
     def __init__(self):
         global _cffi_session
-        _cffi_session = cffi_requests.Session(impersonate="chrome")
+        # HTTP/2 over TLS (falling back to 1.1) like Chrome, so page requests to
+        # the same host multiplex over one keep-alive connection
+        _cffi_session = cffi_requests.Session(impersonate="chrome",
+                                              http_version=CurlHttpVersion.V2TLS)
+        _cffi_session.headers.update(self._HEADERS)
         self._session = _cffi_session
+        self._logged_http_version = False
 
     def close(self):
         self._session.close()
@@ -279,30 +516,50 @@ class ScraperSession:
         "Upgrade-Insecure-Requests": "1",
     }
 
+    def _log_http_version(self, resp) -> None:
+        """Log the negotiated HTTP version once per session (curl constant: 3 = HTTP/2)."""
+        if not self._logged_http_version:
+            self._logged_http_version = True
+            log.debug("Scraper session negotiated HTTP version %s", getattr(resp, "http_version", "?"))
+
     def fetch(self, url: str) -> BeautifulSoup | None:
         """Fetch URL with Chrome TLS fingerprint and return parsed soup."""
         try:
-            resp = self._session.get(url, headers=self._HEADERS, timeout=30)
+            resp = self._session.get(url, timeout=30)
+            self._log_http_version(resp)
             if resp.status_code == 403:
                 log.warning("Got 403 for %s — may be rate-limited or blocked", url)
                 return None
             if resp.status_code >= 400:
                 log.error("HTTP %d for %s", resp.status_code, url)
                 return None
-            return BeautifulSoup(resp.text, "lxml")
+            return BeautifulSoup(resp.content, "lxml")
         except Exception as e:
             log.error("Failed to fetch %s: %s", url, e)
             return None
 
-    def fetch_with_status(self, url: str) -> tuple[BeautifulSoup | None, int | None]:
+    def fetch_with_status(self, url: str, head_first: bool = False) -> tuple[BeautifulSoup | None, int | None]:
         """Fetch URL and return (parsed_soup, http_status_code).
         Returns (None, None) on network/connection errors.
+
+        With head_first, a HEAD request is sent first and a 404/410 is
+        returned without downloading or parsing the page body. Any other HEAD
+        status (including a 403 from bot protection that blocks HEAD but not
+        the impersonated GET) falls through to the GET.
         """
+        if head_first:
+            try:
+                head = self._session.head(url, timeout=30, allow_redirects=True)
+                if head.status_code in (404, 410):
+                    return None, head.status_code
+            except Exception as e:
+                log.debug("HEAD failed for %s, falling back to GET: %s", url, e)
         try:
-            resp = self._session.get(url, headers=self._HEADERS, timeout=30)
+            resp = self._session.get(url, timeout=30)
+            self._log_http_version(resp)
             if resp.status_code >= 400:
                 return None, resp.status_code
-            return BeautifulSoup(resp.text, "lxml"), resp.status_code
+            return BeautifulSoup(resp.content, "lxml"), resp.status_code
         except Exception as e:
             log.error("Failed to fetch %s: %s", url, e)
             return None, None
@@ -325,7 +582,7 @@ def parse_listings(soup: BeautifulSoup) -> list[dict]:
     cards = soup.find_all("div", attrs={"data-testid": "listing-card"})
     if not cards:
         # Fallback: try class-based selector
-        cards = soup.find_all("div", class_=lambda c: c and "ListingCard-module__cardContainer" in c)
+        cards = _CARD_FALLBACK_SEL.select(soup)
 
     for card in cards:
         try:
@@ -342,9 +599,9 @@ def parse_listings(soup: BeautifulSoup) -> list[dict]:
 def parse_single_card(card) -> dict | None:
     """Parse a single listing card element."""
     # Address and URL
-    addr_link = card.find("a", class_=lambda c: c and "addressTextAction" in c)
+    addr_link = _ADDRESS_LINK_SEL.select_one(card)
     if not addr_link:
-        addr_link = card.find("a", href=lambda h: h and "/building/" in h)
+        addr_link = _BUILDING_LINK_SEL.select_one(card)
     if not addr_link:
         return None
 
@@ -354,39 +611,39 @@ def parse_single_card(card) -> dict | None:
     address = addr_link.get_text(strip=True)
 
     # Remove tracking params like ?featured=1
-    clean_url = re.sub(r'\?.*$', '', url)
+    clean_url = _QUERY_STRING_RE.sub("", url)
 
     # Price
-    price_el = card.find("span", class_=lambda c: c and "price" in c.lower() and "PriceInfo" in c)
+    price_el = _PRICE_SEL.select_one(card)
     if not price_el:
-        price_el = card.find("span", class_=lambda c: c and "price" in c.lower())
+        price_el = _PRICE_FALLBACK_SEL.select_one(card)
     price = price_el.get_text(strip=True) if price_el else "N/A"
 
     # Type and neighborhood from title
-    title_el = card.find("p", class_=lambda c: c and "title" in c.lower() and "ListingDescription" in c)
+    title_el = _TITLE_SEL.select_one(card)
     if not title_el:
-        title_el = card.find("p", class_=lambda c: c and "title" in c.lower())
+        title_el = _TITLE_FALLBACK_SEL.select_one(card)
     title_text = title_el.get_text(strip=True) if title_el else ""
     neighborhood = ""
-    match = re.search(r"in\s+(.+?)(?:\s+at|$)", title_text)
+    match = _TITLE_NEIGHBORHOOD_RE.search(title_text)
     if match:
-        neighborhood = match.group(1).strip()
+        neighborhood = sys.intern(match.group(1).strip())
 
     # Beds, baths, sqft
-    detail_spans = card.find_all("span", class_=lambda c: c and "BedsBathsSqft" in c)
+    detail_spans = _DETAIL_SPANS_SEL.select(card)
     beds = "N/A"
     baths = "N/A"
     sqft = "N/A"
     for span in detail_spans:
-        text = span.get_text(strip=True).lower()
+        raw = span.get_text(strip=True)
+        text = raw.lower()
         if "bed" in text or "studio" in text:
-            beds = span.get_text(strip=True)
+            beds = raw
         elif "bath" in text:
-            baths = span.get_text(strip=True)
+            baths = raw
         elif "ft" in text:
-            raw = span.get_text(strip=True)
             # Filter out empty sqft like "-ft²" or "- ft²"
-            if re.search(r"\d", raw):
+            if _DIGIT_RE.search(raw):
                 sqft = raw
 
     # Image
@@ -407,13 +664,13 @@ def parse_single_card(card) -> dict | None:
 
 def get_max_page(soup: BeautifulSoup) -> int:
     """Get the max page number from pagination."""
-    pagination = soup.find("div", class_=lambda c: c and "paginationContainer" in c)
+    pagination = _PAGINATION_SEL.select_one(soup)
     if not pagination:
         return 1
-    page_links = pagination.find_all("a", href=re.compile(r"page=\d+"))
+    page_links = pagination.find_all("a", href=_PAGE_LINK_RE)
     max_page = 1
     for link in page_links:
-        match = re.search(r"page=(\d+)", link.get("href", ""))
+        match = _PAGE_NUM_RE.search(link.get("href", ""))
         if match:
             max_page = max(max_page, int(match.group(1)))
     return max_page
@@ -423,20 +680,64 @@ def scrape_neighborhood(session: ScraperSession, neighborhood: str, config: dict
     """Scrape all pages of listings for a neighborhood."""
     base_url = build_search_url(neighborhood, config)
     delay = config["scraper"]["request_delay_seconds"]
-    raw_listings = []
-
     log.info("Scraping %s → %s", neighborhood, base_url)
+
+    # Stream page results through one pass: deduplicate by URL (featured listings
+    # appear on multiple pages), then drop sponsored listings above max price or
+    # from unrelated neighborhoods. Listings with empty neighborhood are also
+    # rejected — they're likely sponsored placements where StreetEasy doesn't
+    # show the standard neighborhood label.
+    max_price = config["search"]["max_price"]
+    allowed = NEIGHBORHOOD_ALIASES.get(neighborhood)
+    seen_urls = set()
+    filtered = []
+    raw_count = 0
+    unrelated = 0
+    for listings in _iter_search_pages(session, base_url, delay):
+        raw_count += len(listings)
+        for listing in listings:
+            url = listing["url"]
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            price_val = parse_price(listing["price"])
+            if price_val is not None and price_val > max_price:
+                log.debug("Filtered out %s (%s) — above max $%d",
+                          listing["address"], listing["price"], max_price)
+                continue
+            if allowed and listing["neighborhood"] not in allowed:
+                log.debug("  Rejected: %s — neighborhood '%s' not in %s",
+                          listing["address"], listing["neighborhood"], neighborhood)
+                unrelated += 1
+                continue
+            filtered.append(listing)
+
+    if not raw_count:
+        return []
+
+    if unrelated:
+        log.info("  Filtered %d sponsored/unrelated listing(s)", unrelated)
+
+    log.info("  %s: %d raw → %d unique → %d after filters",
+             neighborhood, raw_count, len(seen_urls), len(filtered))
+
+    return filtered
+
+
+def _iter_search_pages(session: ScraperSession, base_url: str, delay: float):
+    """Yield the parsed listings of each search results page, stopping at the last page."""
     soup = fetch_page(session, base_url)
     if not soup:
-        return []
+        return
 
     listings = parse_listings(soup)
-    raw_listings.extend(listings)
     log.info("  Page 1: found %d listings", len(listings))
-
-    max_page = get_max_page(soup)
     # Cap at 5 pages to avoid excessive requests
-    max_page = min(max_page, 5)
+    max_page = min(get_max_page(soup), 5)
+    # A parsed tree is a web of parent/child reference cycles that only the
+    # cyclic GC would reclaim; decompose frees it before the next page is fetched
+    soup.decompose()
+    yield listings
 
     for page in range(2, max_page + 1):
         time.sleep(delay)
@@ -445,52 +746,59 @@ def scrape_neighborhood(session: ScraperSession, neighborhood: str, config: dict
         if not soup:
             break
         listings = parse_listings(soup)
+        soup.decompose()
         if not listings:
             break
-        raw_listings.extend(listings)
         log.info("  Page %d: found %d listings", page, len(listings))
+        yield listings
 
-    # Deduplicate by URL (featured listings appear on multiple pages)
-    seen_urls = set()
-    unique_listings = []
-    for listing in raw_listings:
-        if listing["url"] not in seen_urls:
-            seen_urls.add(listing["url"])
-            unique_listings.append(listing)
 
-    # Filter out sponsored listings above max price
-    max_price = config["search"]["max_price"]
-    filtered = []
-    for listing in unique_listings:
-        price_val = parse_price(listing["price"])
-        if price_val is not None and price_val > max_price:
-            log.debug("Filtered out %s (%s) — above max $%d",
-                      listing["address"], listing["price"], max_price)
-            continue
-        filtered.append(listing)
+def _scrape_neighborhood_worker(neighborhood: str, config: dict, scrape=None) -> list[dict]:
+    """Scrape one neighborhood on its own session (curl_cffi sessions aren't shared across threads)."""
+    session = get_session(config)
+    try:
+        return (scrape or scrape_neighborhood)(session, neighborhood, config)
+    except Exception as e:
+        log.error("Failed to scrape %s: %s", neighborhood, e)
+        return []
+    finally:
+        session.close()
 
-    # Filter out sponsored listings from unrelated neighborhoods.
-    # Listings with empty neighborhood are also rejected — they're likely sponsored
-    # placements where StreetEasy doesn't show the standard neighborhood label.
-    allowed = NEIGHBORHOOD_ALIASES.get(neighborhood)
-    if allowed:
-        before_count = len(filtered)
-        kept = []
-        for l in filtered:
-            if l["neighborhood"] in allowed:
-                kept.append(l)
-            else:
-                log.debug("  Rejected: %s — neighborhood '%s' not in %s",
-                          l["address"], l["neighborhood"], neighborhood)
-        filtered = kept
-        removed = before_count - len(filtered)
-        if removed:
-            log.info("  Filtered %d sponsored/unrelated listing(s)", removed)
 
-    log.info("  %s: %d raw → %d unique → %d after filters",
-             neighborhood, len(raw_listings), len(unique_listings), len(filtered))
+def scrape_neighborhoods(neighborhoods: list[str], config: dict, scrape=None) -> list[list[dict]]:
+    """Scrape several neighborhoods concurrently.
 
-    return filtered
+    `scrape(session, neighborhood, config)` does the per-neighborhood work;
+    it defaults to the StreetEasy scrape_neighborhood.
+
+    Each worker scrapes one neighborhood at a time (pages within a neighborhood
+    stay sequential with request_delay_seconds between them), so at most
+    `scraper.max_concurrent_scrapes` requests are in flight against StreetEasy.
+    Each worker also waits request_delay_seconds between its neighborhoods and,
+    when there are several workers, a random fraction of it before each one so
+    they don't hit the site in lockstep.
+    Results are returned in the same order as `neighborhoods`.
+    """
+    if not neighborhoods:
+        return []
+    scraper_config = config.get("scraper", {})
+    max_workers = scraper_config.get("max_concurrent_scrapes", 3)
+    max_workers = max(1, min(max_workers, len(neighborhoods)))
+    delay = scraper_config.get("request_delay_seconds", 0)
+    jitter = delay if max_workers > 1 else 0.0
+    worker_state = threading.local()
+
+    def work(neighborhood: str) -> list[dict]:
+        pause = random.uniform(0, jitter) if jitter > 0 else 0.0
+        if getattr(worker_state, "started", False):
+            pause += delay
+        worker_state.started = True
+        if pause > 0:
+            time.sleep(pause)
+        return _scrape_neighborhood_worker(neighborhood, config, scrape)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(work, neighborhoods))
 
 
 # ---------------------------------------------------------------------------
@@ -500,6 +808,36 @@ def scrape_neighborhood(session: ScraperSession, neighborhood: str, config: dict
 GEOCLIENT_BASE = "https://api.nyc.gov/geoclient/v2/address"
 
 
+# Address normalization patterns
+_ADDRESS_UNIT_SUFFIX_RE = re.compile(r"[,\s]*(?:#|apt\.?|unit|floor|fl\.?)\s*\S+$", re.IGNORECASE)
+_BARE_HASH_SUFFIX_RE = re.compile(r"\s*#\S+$")
+_DIRECTIONALS = [
+    (re.compile(r"\be\b\s+"), "east "),
+    (re.compile(r"\bw\b\s+"), "west "),
+    (re.compile(r"\bn\b\s+"), "north "),
+    (re.compile(r"\bs\b\s+"), "south "),
+]
+_STREET_ABBREVIATIONS = [
+    (re.compile(r"\bst\b"), "street"),
+    (re.compile(r"\bave?\b"), "avenue"),
+    (re.compile(r"\bblvd\b"), "boulevard"),
+    (re.compile(r"\brd\b"), "road"),
+    (re.compile(r"\bdr\b"), "drive"),
+    (re.compile(r"\bpl\b"), "place"),
+    (re.compile(r"\bct\b"), "court"),
+    (re.compile(r"\bln\b"), "lane"),
+    (re.compile(r"\bpkwy\b"), "parkway"),
+    (re.compile(r"\bhwy\b"), "highway"),
+    (re.compile(r"\bterr?\b"), "terrace"),
+]
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Geoclient address parsing patterns
+_GEOCLIENT_UNIT_SUFFIX_RE = re.compile(r"[,\s]*(?:#|apt\.?|unit)\s*\S+$", re.IGNORECASE)
+_HOUSE_NUMBER_RE = re.compile(r"^(\d+[\w-]*)\s+(.+)$")
+
+
 def normalize_address(addr: str) -> str:
     """Normalize an address for cross-source duplicate detection.
 
@@ -514,46 +852,43 @@ def normalize_address(addr: str) -> str:
     s = addr.lower().strip()
 
     # Strip unit/apt suffixes (e.g. "#3H", "Apt 4B", "Unit 5C", ", Floor 2")
-    s = re.sub(r"[,\s]*(?:#|apt\.?|unit|floor|fl\.?)\s*\S+$", "", s, flags=re.IGNORECASE).strip()
+    s = _ADDRESS_UNIT_SUFFIX_RE.sub("", s).strip()
     # Also strip bare #suffix with no keyword
-    s = re.sub(r"\s*#\S+$", "", s).strip()
+    s = _BARE_HASH_SUFFIX_RE.sub("", s).strip()
 
     # Directional prefix expansions: must come before abbreviation expansions
     # Match whole word only (word boundary after the abbreviation)
-    s = re.sub(r"\be\b\s+", "east ", s)
-    s = re.sub(r"\bw\b\s+", "west ", s)
-    s = re.sub(r"\bn\b\s+", "north ", s)
-    s = re.sub(r"\bs\b\s+", "south ", s)
+    for pattern, replacement in _DIRECTIONALS:
+        s = pattern.sub(replacement, s)
 
     # Street type abbreviations (whole word)
-    _abbrevs = [
-        (r"\bst\b", "street"),
-        (r"\bave?\b", "avenue"),
-        (r"\bblvd\b", "boulevard"),
-        (r"\brd\b", "road"),
-        (r"\bdr\b", "drive"),
-        (r"\bpl\b", "place"),
-        (r"\bct\b", "court"),
-        (r"\bln\b", "lane"),
-        (r"\bpkwy\b", "parkway"),
-        (r"\bhwy\b", "highway"),
-        (r"\bterr?\b", "terrace"),
-    ]
-    for pattern, replacement in _abbrevs:
-        s = re.sub(pattern, replacement, s)
+    for pattern, replacement in _STREET_ABBREVIATIONS:
+        s = pattern.sub(replacement, s)
 
     # Remove remaining punctuation (commas, periods, etc.) but keep spaces/digits/letters
-    s = re.sub(r"[^\w\s]", "", s)
+    s = _PUNCTUATION_RE.sub("", s)
     # Collapse multiple spaces
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WHITESPACE_RE.sub(" ", s).strip()
     return s
 
 
-def find_cross_source_duplicate(listing: dict, seen: dict) -> str | None:
+def build_canonical_address_index(seen: dict) -> dict[str, str]:
+    """Map canonical_address → URL of the first seen entry with that address."""
+    index: dict[str, str] = {}
+    for url, entry in seen.items():
+        canonical = entry.get("canonical_address")
+        if canonical:
+            index.setdefault(canonical, url)
+    return index
+
+
+def find_cross_source_duplicate(listing: dict, seen: dict,
+                                address_index: dict[str, str] | None = None) -> str | None:
     """Check if a listing from a different source already exists in seen.
 
     Compares by canonical_address. Returns the existing URL (primary key)
     if a match is found, or None if this is a genuinely new listing.
+    Pass an index from build_canonical_address_index to avoid scanning seen.
     """
     candidate = listing.get("canonical_address")
     if not candidate:
@@ -561,6 +896,9 @@ def find_cross_source_duplicate(listing: dict, seen: dict) -> str | None:
     if not candidate:
         return None
 
+    if address_index is not None:
+        return address_index.get(candidate)
+
     for url, entry in seen.items():
         existing_canonical = entry.get("canonical_address")
         if not existing_canonical:
@@ -576,8 +914,8 @@ def _parse_address_for_geoclient(address: str) -> tuple[str, str] | None:
     Returns None if the address can't be parsed.
     """
     # Strip unit/apt suffixes like "#3H", "Apt 4B", ", Unit 5"
-    cleaned = re.sub(r"[,\s]*(?:#|apt\.?|unit)\s*\S+$", "", address, flags=re.IGNORECASE).strip()
-    match = re.match(r"^(\d+[\w-]*)\s+(.+)$", cleaned)
+    cleaned = _GEOCLIENT_UNIT_SUFFIX_RE.sub("", address).strip()
+    match = _HOUSE_NUMBER_RE.match(cleaned)
     if not match:
         return None
     return match.group(1), match.group(2)
@@ -590,6 +928,11 @@ def _format_cross_streets(low: str, high: str) -> str:
     return f"between {low_clean} & {high_clean}"
 
 
+# Successful Geoclient results for this process, keyed by (house number, street, borough).
+# Units in the same building share an entry; failures are not cached so they get retried.
+_geoclient_cache: dict[tuple[str, str, str], dict] = {}
+
+
 def geoclient_lookup(address: str, geoclient_key: str, borough: str = "Manhattan") -> dict | None:
     """Look up cross streets and coordinates for a NYC address via the Geoclient API.
 
@@ -602,8 +945,12 @@ def geoclient_lookup(address: str, geoclient_key: str, borough: str = "Manhattan
         return None
 
     house_number, street = parsed
+    cache_key = (house_number, street, borough)
+    cached = _geoclient_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
     try:
-        resp = requests.get(
+        resp = _http.get(
             GEOCLIENT_BASE,
             params={
                 "houseNumber": house_number,
@@ -614,7 +961,7 @@ def geoclient_lookup(address: str, geoclient_key: str, borough: str = "Manhattan
             timeout=10,
         )
         resp.raise_for_status()
-        data = resp.json().get("address", {})
+        data = _json_loads(resp.content).get("address", {})
 
         # Cross streets
         low = data.get("lowCrossStreetName1", "").strip()
@@ -627,16 +974,44 @@ def geoclient_lookup(address: str, geoclient_key: str, borough: str = "Manhattan
         latitude = float(lat) if lat is not None else None
         longitude = float(lon) if lon is not None else None
 
-        return {
+        result = {
             "cross_streets": cross_streets,
             "latitude": latitude,
             "longitude": longitude,
         }
-    except requests.RequestException as e:
+        _geoclient_cache[cache_key] = result
+        return dict(result)
+    except (requests.RequestException, ValueError) as e:
         log.warning("Geoclient API error for '%s': %s", address, e)
         return None
 
 
+def geoclient_lookup_many(
+    lookups: dict[str, tuple[str, str]], geoclient_key: str, max_workers: int = 8,
+) -> dict[str, dict | None]:
+    """Run several Geoclient lookups concurrently.
+
+    `lookups` maps a caller-chosen key (e.g. the listing URL) to (address, borough).
+    Returns {key: geoclient_lookup result} for every key.
+    """
+    if not lookups:
+        return {}
+    results: dict[str, dict | None] = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(lookups))) as pool:
+        futures = {
+            pool.submit(geoclient_lookup, address, geoclient_key, borough=borough): key
+            for key, (address, borough) in lookups.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                log.warning("Failed geoclient lookup for %s: %s", lookups[key][0], e)
+                results[key] = None
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Subway station proximity
 # ---------------------------------------------------------------------------
@@ -645,15 +1020,18 @@ SUBWAY_DATA_PATH = BASE_DIR / "data" / "subway_stations.json"
 _subway_stations_cache: list[dict] | None = None
 
 
+_EARTH_RADIUS_MI = 3958.8
+
+
 def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Return the distance in miles between two lat/lon points."""
-    R = 3958.8  # Earth radius in miles
     dlat = math.radians(lat2 - lat1)
     dlon = math.radians(lon2 - lon1)
     a = (math.sin(dlat / 2) ** 2
          + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
          * math.sin(dlon / 2) ** 2)
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    # asin form is cheaper than atan2(sqrt(a), sqrt(1-a)); clamp guards rounding past 1
+    return 2 * _EARTH_RADIUS_MI * math.asin(min(1.0, math.sqrt(a)))
 
 
 def _load_subway_stations() -> list[dict]:
@@ -662,14 +1040,44 @@ def _load_subway_stations() -> list[dict]:
     if _subway_stations_cache is not None:
         return _subway_stations_cache
     try:
-        with open(SUBWAY_DATA_PATH) as f:
-            _subway_stations_cache = json.load(f)
+        with open(SUBWAY_DATA_PATH, "rb") as f:
+            _subway_stations_cache = _json_loads(f.read())
     except (FileNotFoundError, json.JSONDecodeError) as e:
         log.warning("Could not load subway station data: %s", e)
         _subway_stations_cache = []
     return _subway_stations_cache
 
 
+# Miles per degree of latitude, rounded down so the bounding box never excludes a match
+_MILES_PER_DEGREE = 69.0
+
+# Side of a spatial-index grid cell in degrees (~0.7 mi of latitude in NYC)
+_STATION_GRID_DEGREES = 0.01
+
+# (stations list, [(lat, lon, lat_rad, lon_rad, cos_lat), ...], grid) for the last list seen;
+# grid maps (lat cell, lon cell) -> indices of the stations in that cell
+_station_geometry_cache: tuple[list[dict], list[tuple[float, ...]], dict[tuple[int, int], list[int]]] | None = None
+
+
+def _station_geometry(stations: list[dict]) -> tuple[list[tuple[float, ...]], dict[tuple[int, int], list[int]]]:
+    """Return per-station (lat, lon, lat_rad, lon_rad, cos(lat)) and a grid index, computed once per stations list."""
+    global _station_geometry_cache
+    cached = _station_geometry_cache
+    if cached is not None and cached[0] is stations and len(cached[1]) == len(stations):
+        return cached[1], cached[2]
+    geometry = []
+    grid: dict[tuple[int, int], list[int]] = {}
+    for i, s in enumerate(stations):
+        lat_rad = math.radians(s["latitude"])
+        geometry.append((s["latitude"], s["longitude"],
+                         lat_rad, math.radians(s["longitude"]), math.cos(lat_rad)))
+        cell = (math.floor(s["latitude"] / _STATION_GRID_DEGREES),
+                math.floor(s["longitude"] / _STATION_GRID_DEGREES))
+        grid.setdefault(cell, []).append(i)
+    _station_geometry_cache = (stations, geometry, grid)
+    return geometry, grid
+
+
 def find_nearby_stations(
     lat: float, lon: float, stations: list[dict],
     max_stations: int = 3, max_miles: float = 0.5,
@@ -679,17 +1087,51 @@ def find_nearby_stations(
     Returns up to max_stations results, each with keys:
         name, routes, distance_mi
     """
-    results = []
-    for s in stations:
-        dist = _haversine(lat, lon, s["latitude"], s["longitude"])
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    cos_lat = math.cos(lat_rad)
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    geometry, grid = _station_geometry(stations)
+
+    # Bounding box around the point — cheap rejection before any trig
+    dlat_max = max_miles / _MILES_PER_DEGREE
+    dlon_max = dlat_max / cos_lat if cos_lat > 0 else 360.0
+
+    # Only visit grid cells overlapping the bounding box; fall back to a full
+    # scan when the box covers more cells than there are stations.
+    lat_lo = math.floor((lat - dlat_max) / _STATION_GRID_DEGREES)
+    lat_hi = math.floor((lat + dlat_max) / _STATION_GRID_DEGREES)
+    lon_lo = math.floor((lon - dlon_max) / _STATION_GRID_DEGREES)
+    lon_hi = math.floor((lon + dlon_max) / _STATION_GRID_DEGREES)
+    if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) < len(geometry):
+        indices = [
+            i
+            for lat_cell in range(lat_lo, lat_hi + 1)
+            for lon_cell in range(lon_lo, lon_hi + 1)
+            for i in grid.get((lat_cell, lon_cell), ())
+        ]
+    else:
+        indices = range(len(geometry))
+
+    # (rounded distance, station index) — index breaks ties in station order
+    candidates = []
+    for i in indices:
+        s_lat_deg, s_lon_deg, s_lat, s_lon, s_cos = geometry[i]
+        if abs(s_lat_deg - lat) > dlat_max or abs(s_lon_deg - lon) > dlon_max:
+            continue
+        a = sin((s_lat - lat_rad) / 2) ** 2 + cos_lat * s_cos * sin((s_lon - lon_rad) / 2) ** 2
+        dist = 2 * _EARTH_RADIUS_MI * asin(sqrt(a))
         if dist <= max_miles:
-            results.append({
-                "name": s["name"],
-                "routes": s["routes"],
-                "distance_mi": round(dist, 2),
-            })
-    results.sort(key=lambda r: r["distance_mi"])
-    return results[:max_stations]
+            candidates.append((round(dist, 2), i))
+
+    return [
+        {
+            "name": stations[i]["name"],
+            "routes": stations[i]["routes"],
+            "distance_mi": dist,
+        }
+        for dist, i in heapq.nsmallest(max_stations, candidates)
+    ]
 
 
 def get_stations_for_neighborhood(
@@ -797,7 +1239,7 @@ def _get_subway_prefs_for_listing(listing: dict, config: dict) -> dict | None:
     hood = listing.get("neighborhood", "")
     # Check by slug and by display name
     for slug, prefs in subway_prefs.items():
-        aliases = NEIGHBORHOOD_ALIASES.get(slug, set())
+        aliases = NEIGHBORHOOD_ALIASES.get(slug, frozenset())
         if hood in aliases or hood == slug:
             return prefs
     return None
@@ -824,6 +1266,7 @@ def is_within_geo_bounds(longitude: float | None, config: dict) -> bool:
     return west <= longitude <= east
 
 
+@functools.lru_cache(maxsize=4096)
 def build_google_maps_url(address: str) -> str:
     """Build a Google Maps search URL for an NYC address."""
     query = quote(f"{address}, New York, NY")
@@ -853,24 +1296,26 @@ def compute_days_on_market(first_seen_str: str | None) -> int | None:
 # Listing status check + stale cleanup
 # ---------------------------------------------------------------------------
 
+_LISTING_GONE_RE = re.compile(r"no longer available|off market", re.IGNORECASE)
+
+
 def check_listing_status(session: ScraperSession, url: str) -> str:
     """Check if a StreetEasy listing is still active.
     Returns 'active', 'gone', or 'unknown'.
     """
-    soup, status = session.fetch_with_status(url)
+    soup, status = session.fetch_with_status(url, head_first=True)
     if status is None:
         return "unknown"      # network error
-    if status == 404:
+    if status in (404, 410):
         return "gone"
     if status == 403:
         return "unknown"      # rate-limited, retry later
     if status >= 400:
         return "unknown"
-    # 200 OK — check page content
-    if soup:
-        text = soup.get_text(separator=" ", strip=True).lower()
-        if "no longer available" in text or "off market" in text:
-            return "gone"
+    # 200 OK — check page content. Search the joined text so a banner split
+    # across elements ("<span>Off</span> <span>Market</span>") still matches.
+    if soup and _LISTING_GONE_RE.search(soup.get_text(separator=" ", strip=True)):
+        return "gone"
     return "active"
 
 
@@ -881,6 +1326,9 @@ def cleanup_stale_listings(
     """Check stale listings and remove rented/gone ones. Returns count removed."""
     now = datetime.now(timezone.utc)
     stale_cutoff = now - timedelta(days=7)
+    # Timestamps at or after this ISO string are recent whatever their offset,
+    # so most entries are settled by a string compare without parsing a datetime
+    fresh_cutoff = (stale_cutoff + timedelta(days=1)).isoformat()
     delay = config.get("scraper", {}).get("request_delay_seconds", 2)
 
     # Collect stale entries (missing last_scraped or older than 7 days)
@@ -889,6 +1337,8 @@ def cleanup_stale_listings(
         ls = entry.get("last_scraped")
         if not ls:
             stale.append((url, None))
+        elif ls >= fresh_cutoff:
+            continue
         else:
             try:
                 ts = datetime.fromisoformat(ls)
@@ -902,8 +1352,21 @@ def cleanup_stale_listings(
     # Sort by staleness (oldest / missing first — most likely gone)
     stale.sort(key=lambda x: x[1] or datetime.min.replace(tzinfo=timezone.utc))
 
+    to_check = stale[:max_checks]
+
+    # Geo backfill for entries missing coordinates. Lookups are independent,
+    # so they run concurrently before the (serial, rate-limited) status checks.
+    geo_results: dict[str, dict | None] = {}
+    if geoclient_key:
+        geo_results = geoclient_lookup_many({
+            url: (seen[url].get("address", ""),
+                  _DISPLAY_NAME_TO_BOROUGH.get(seen[url].get("neighborhood", ""), "Manhattan"))
+            for url, _ in to_check
+            if "latitude" not in seen[url]
+        }, geoclient_key)
+
     removed = 0
-    for i, (url, _) in enumerate(stale[:max_checks]):
+    for i, (url, _) in enumerate(to_check):
         if i > 0:
             time.sleep(delay)
 
@@ -912,9 +1375,8 @@ def cleanup_stale_listings(
             continue  # already removed by geo backfill below
 
         # Geo backfill during cleanup if missing coordinates
-        if geoclient_key and "latitude" not in entry:
-            borough = _DISPLAY_NAME_TO_BOROUGH.get(entry.get("neighborhood", ""), "Manhattan")
-            geo = geoclient_lookup(entry.get("address", ""), geoclient_key, borough=borough)
+        if url in geo_results:
+            geo = geo_results[url]
             if geo and geo["latitude"] and geo["longitude"]:
                 entry["latitude"] = geo["latitude"]
                 entry["longitude"] = geo["longitude"]
@@ -946,27 +1408,35 @@ def cleanup_stale_listings(
 # ---------------------------------------------------------------------------
 
 def _median(values: list[float]) -> float:
-    """Compute median of a sorted list of values."""
-    n = len(values)
-    if n == 0:
+    """Compute median of a list of values (0.0 for an empty list)."""
+    if not values:
         return 0.0
-    s = sorted(values)
-    mid = n // 2
-    if n % 2 == 0:
-        return (s[mid - 1] + s[mid]) / 2
-    return s[mid]
+    return float(statistics.median(values))
+
+
+def _minmax(values) -> tuple[int, int] | None:
+    """Return (min, max) of an iterable in one pass, or None if it is empty."""
+    lo = hi = None
+    for v in values:
+        if lo is None:
+            lo = hi = v
+        elif v < lo:
+            lo = v
+        elif v > hi:
+            hi = v
+    return None if lo is None else (lo, hi)
 
 
 def compute_neighborhood_medians(seen: dict) -> dict[str, float]:
     """Compute median price per neighborhood from all tracked listings."""
-    prices_by_hood: dict[str, list[float]] = {}
+    prices_by_hood: dict[str, list[int]] = {}
     for entry in seen.values():
         hood = entry.get("neighborhood", "")
         if not hood:
             continue
         price = parse_price(entry.get("price", ""))
         if price is not None:
-            prices_by_hood.setdefault(hood, []).append(float(price))
+            prices_by_hood.setdefault(hood, []).append(price)
     return {hood: _median(prices) for hood, prices in prices_by_hood.items()}
 
 
@@ -997,7 +1467,7 @@ def compute_value_score(listing: dict, medians: dict[str, float],
 
     # --- Price per sqft (30%) ---
     sqft_str = listing.get("sqft", "N/A")
-    sqft_match = re.search(r"([\d,]+)", sqft_str.replace(",", ""))
+    sqft_match = _SQFT_RE.search(sqft_str.replace(",", ""))
     if sqft_match:
         sqft_val = int(sqft_match.group(1))
         if sqft_val > 0:
@@ -1067,10 +1537,145 @@ def update_price_history(seen_entry: dict, new_price: int) -> None:
     seen_entry["price"] = f"${new_price:,}"
 
 
-def send_discord_price_drop(webhook_url: str, listing: dict, price_change: dict,
-                            config: dict, days_on_market: int | None = None) -> bool:
-    """Send an orange Discord embed for a price drop alert."""
-    discord_config = config.get("discord", {})
+# ---------------------------------------------------------------------------
+# Discord rate limiting
+# ---------------------------------------------------------------------------
+
+class DiscordRateLimiter:
+    """Pace Discord requests using the X-RateLimit-* headers Discord returns.
+
+    Requests are grouped by route (the webhook URL, or the channel URL for DMs).
+    A route only waits when its bucket has no requests remaining, and then only
+    until the bucket resets; after the reset, requests go one at a time until a
+    response reports the new budget. Routes Discord reports as sharing a bucket
+    share the wait. Safe to use from several threads.
+
+    A 429 means the headers weren't enough (global or shared limits, or a
+    response without headers), so the route also gets an AIMD spacing between
+    requests: it starts at PACE_INITIAL seconds, grows by PACE_INCREASE on every
+    further 429 up to PACE_MAX, shrinks by PACE_DECREASE on every success, and
+    is dropped once it falls below PACE_MIN.
+    """
+
+    PACE_INITIAL = 1.0
+    PACE_INCREASE = 1.5
+    PACE_DECREASE = 0.05
+    PACE_MIN = 0.2
+    PACE_MAX = 5.0
+    # Once a bucket's reset time passes its new budget is unknown until a
+    # response reports it, so one request goes through and the rest wait for
+    # that response (or this many seconds, matching the request timeout)
+    PROBE_TIMEOUT = 10.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._route_buckets: dict[str, str] = {}
+        # bucket id -> (requests remaining, time.monotonic() when it resets)
+        self._buckets: dict[str, tuple[int, float]] = {}
+        # route -> (seconds between requests, time.monotonic() of next allowed request)
+        self._pace: dict[str, tuple[float, float]] = {}
+
+    def wait(self, route: str) -> None:
+        """Block until a request on this route is allowed, then reserve it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = 0.0
+                pace = self._pace.get(route)
+                if pace is not None and now < pace[1]:
+                    delay = pace[1] - now
+                bucket = self._route_buckets.get(route, route)
+                state = self._buckets.get(bucket)
+                if state is not None:
+                    remaining, reset_at = state
+                    if remaining <= 0 and now < reset_at:
+                        delay = max(delay, reset_at - now)
+                if delay <= 0:
+                    if state is not None:
+                        if now >= reset_at:
+                            self._buckets[bucket] = (0, now + self.PROBE_TIMEOUT)
+                        else:
+                            self._buckets[bucket] = (remaining - 1, reset_at)
+                    if pace is not None:
+                        self._pace[route] = (pace[0], now + pace[0])
+                    return
+            log.debug("Discord rate limit pacing for %s, waiting %.2fs", route, delay)
+            time.sleep(delay)
+
+    def update(self, route: str, resp: requests.Response) -> None:
+        """Record the bucket state reported in a response's headers."""
+        self._adjust_pace(route, resp.status_code == 429)
+        headers = resp.headers
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = time.monotonic() + float(headers["X-RateLimit-Reset-After"])
+        except (KeyError, TypeError, ValueError):
+            return
+        bucket = headers.get("X-RateLimit-Bucket") or route
+        with self._lock:
+            self._route_buckets[route] = bucket
+            self._buckets[bucket] = (remaining, reset_at)
+
+    def _adjust_pace(self, route: str, rate_limited: bool) -> None:
+        """Multiplicative increase on a 429, additive decrease otherwise."""
+        with self._lock:
+            pace = self._pace.get(route)
+            if rate_limited:
+                delay = self.PACE_INITIAL if pace is None else pace[0] * self.PACE_INCREASE
+                self._pace[route] = (min(delay, self.PACE_MAX), pace[1] if pace else 0.0)
+            elif pace is not None:
+                delay = pace[0] - self.PACE_DECREASE
+                if delay < self.PACE_MIN:
+                    del self._pace[route]
+                else:
+                    self._pace[route] = (delay, pace[1])
+
+
+_discord_limiter = DiscordRateLimiter()
+
+
+# Upper bound on the random delay added to a 429's Retry-After, so concurrent
+# senders that were limited together don't all retry at the same instant
+DISCORD_RETRY_JITTER_SECONDS = 1.0
+
+
+def _retry_after_seconds(resp: requests.Response) -> float:
+    """Seconds to wait after a 429, from the Retry-After header or JSON body."""
+    try:
+        return float(resp.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    try:
+        return float(_json_loads(resp.content).get("retry_after", 5))
+    except (ValueError, TypeError, AttributeError):
+        return 5.0
+
+
+def _discord_post(url: str, payload: dict | None = None, **kwargs) -> requests.Response:
+    """POST to Discord through the shared rate limiter, retrying once on 429.
+
+    A `payload` dict is sent as a JSON body serialized with _json_dumps (orjson
+    when installed) rather than by requests.
+    """
+    if payload is not None:
+        kwargs["data"] = _json_dumps(payload)
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": "application/json"}
+    _discord_limiter.wait(url)
+    resp = _http.post(url, timeout=10, **kwargs)
+    _discord_limiter.update(url, resp)
+    if resp.status_code == 429:
+        retry_after = _retry_after_seconds(resp) + random.uniform(0, DISCORD_RETRY_JITTER_SECONDS)
+        log.warning("Discord rate limit hit, waiting %.1fs", retry_after)
+        time.sleep(retry_after)
+        _discord_limiter.wait(url)
+        resp = _http.post(url, timeout=10, **kwargs)
+        _discord_limiter.update(url, resp)
+    return resp
+
+
+def build_price_drop_embed(listing: dict, price_change: dict,
+                           days_on_market: int | None = None) -> dict:
+    """Build the orange Discord embed for a price drop (reused by webhook and DM paths)."""
     address = listing.get("address", "Unknown")
     url = listing.get("url", "")
     neighborhood = listing.get("neighborhood", "N/A")
@@ -1094,7 +1699,7 @@ def send_discord_price_drop(webhook_url: str, listing: dict, price_change: dict,
             dom_value += " (may be negotiable!)"
         fields.append({"name": "📅 Days Tracked", "value": dom_value, "inline": True})
 
-    embed = {
+    return {
         "title": f"📉 Price Drop! {address}",
         "url": url,
         "color": 0xFF8C00,  # Orange
@@ -1103,6 +1708,13 @@ def send_discord_price_drop(webhook_url: str, listing: dict, price_change: dict,
         "footer": {"text": "NYC Apartment Tracker • Price Drop"},
     }
 
+
+def send_discord_price_drop(webhook_url: str, listing: dict, price_change: dict,
+                            config: dict, days_on_market: int | None = None) -> bool:
+    """Send an orange Discord embed for a price drop alert."""
+    discord_config = config.get("discord", {})
+    embed = build_price_drop_embed(listing, price_change, days_on_market)
+
     payload = {
         "username": discord_config.get("username", "NYC Apartment Tracker"),
         "avatar_url": discord_config.get("avatar_url", ""),
@@ -1110,12 +1722,7 @@ def send_discord_price_drop(webhook_url: str, listing: dict, price_change: dict,
     }
 
     try:
-        resp = requests.post(webhook_url, json=payload, timeout=10)
-        if resp.status_code == 429:
-            retry_after = resp.json().get("retry_after", 5)
-            log.warning("Discord rate limit hit, waiting %.1fs", retry_after)
-            time.sleep(retry_after)
-            resp = requests.post(webhook_url, json=payload, timeout=10)
+        resp = _discord_post(webhook_url, payload=payload)
         resp.raise_for_status()
         return True
     except requests.RequestException as e:
@@ -1215,12 +1822,7 @@ def send_discord_notification(webhook_url: str, listing: dict, config: dict,
     }
 
     try:
-        resp = requests.post(webhook_url, json=payload, timeout=10)
-        if resp.status_code == 429:
-            retry_after = resp.json().get("retry_after", 5)
-            log.warning("Discord rate limit hit, waiting %.1fs", retry_after)
-            time.sleep(retry_after)
-            resp = requests.post(webhook_url, json=payload, timeout=10)
+        resp = _discord_post(webhook_url, payload=payload)
         if resp.status_code == 400:
             log.error("Discord 400 Bad Request for %s — response: %s", listing.get("address", "?"), resp.text)
         resp.raise_for_status()
@@ -1230,28 +1832,91 @@ def send_discord_notification(webhook_url: str, listing: dict, config: dict,
         return False
 
 
+# Discord caps one message at 10 embeds and 6000 characters of embed text
+DISCORD_MAX_EMBEDS_PER_MESSAGE = 10
+DISCORD_MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def _embed_text_length(embed: dict) -> int:
+    """Count the characters Discord includes in its per-message embed limit."""
+    total = len(embed.get("title", "")) + len(embed.get("description", ""))
+    total += len(embed.get("footer", {}).get("text", ""))
+    total += len(embed.get("author", {}).get("name", ""))
+    for field in embed.get("fields", ()):
+        total += len(field.get("name", "")) + len(field.get("value", ""))
+    return total
+
+
+def _batch_embeds(embeds: list[dict]) -> list[list[dict]]:
+    """Split embeds into per-message batches within Discord's count and size limits."""
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    current_chars = 0
+    for embed in embeds:
+        chars = _embed_text_length(embed)
+        if current and (len(current) >= DISCORD_MAX_EMBEDS_PER_MESSAGE
+                        or current_chars + chars > DISCORD_MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(embed)
+        current_chars += chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+def send_discord_batch(webhook_url: str, listings: list[dict], config: dict,
+                       value_scores: list[dict | None] | None = None) -> int:
+    """Send new-listing embeds in as few webhook messages as Discord allows.
+
+    value_scores, if given, lines up with listings. Returns the number of
+    listings whose message was delivered.
+    """
+    discord_config = config.get("discord", {})
+    if value_scores is None:
+        value_scores = [None] * len(listings)
+    embeds = [build_listing_embed(listing, None, vs) for listing, vs in zip(listings, value_scores)]
+
+    def send(batch: list[dict]) -> int:
+        """Post one message. Returns the number of listings delivered."""
+        payload = {
+            "username": discord_config.get("username", "NYC Apartment Tracker"),
+            "avatar_url": discord_config.get("avatar_url", ""),
+            "embeds": batch,
+        }
+        try:
+            resp = _discord_post(webhook_url, payload=payload)
+            if resp.status_code == 400:
+                log.error("Discord 400 Bad Request for %s — response: %s",
+                          ", ".join(e["title"] for e in batch), resp.text)
+                if len(batch) > 1:
+                    # One bad embed rejects the whole message, so resend the
+                    # batch one embed at a time to deliver the rest
+                    return sum(send([embed]) for embed in batch)
+            resp.raise_for_status()
+            return len(batch)
+        except requests.RequestException as e:
+            log.error("Failed to send Discord notification batch (%d listings): %s", len(batch), e)
+            return 0
+
+    return sum(send(batch) for batch in _batch_embeds(embeds))
+
+
 def send_discord_summary(webhook_url: str, new_listings: list[dict], config: dict) -> bool:
     """Send a single summary notification for the first run instead of flooding."""
     discord_config = config.get("discord", {})
 
     # Count by neighborhood
-    by_neighborhood: dict[str, int] = {}
-    for l in new_listings:
-        n = l.get("neighborhood", "Unknown")
-        by_neighborhood[n] = by_neighborhood.get(n, 0) + 1
+    by_neighborhood = Counter(l.get("neighborhood", "Unknown") for l in new_listings)
 
     neighborhood_lines = "\n".join(
         f"• **{name}**: {count} listings"
-        for name, count in sorted(by_neighborhood.items(), key=lambda x: -x[1])
+        for name, count in by_neighborhood.most_common()
     )
 
     # Price range
-    prices = []
-    for l in new_listings:
-        p = parse_price(l["price"])
-        if p:
-            prices.append(p)
-    price_range = f"${min(prices):,} – ${max(prices):,}" if prices else "N/A"
+    bounds = _minmax(p for p in (parse_price(l["price"]) for l in new_listings) if p)
+    price_range = f"${bounds[0]:,} – ${bounds[1]:,}" if bounds else "N/A"
 
     embed = {
         "title": "🚀 Apartment Tracker Started",
@@ -1273,7 +1938,7 @@ def send_discord_summary(webhook_url: str, new_listings: list[dict], config: dic
     }
 
     try:
-        resp = requests.post(webhook_url, json=payload, timeout=10)
+        resp = _discord_post(webhook_url, payload=payload)
         resp.raise_for_status()
         return True
     except requests.RequestException as e:
@@ -1288,11 +1953,30 @@ def send_discord_summary(webhook_url: str, new_listings: list[dict], config: dic
 DISCORD_API_BASE = "https://discord.com/api/v10"
 
 
-def send_discord_dm(bot_token: str, user_id: str, embed: dict) -> bool:
+# Max users whose DMs are sent concurrently (each user's DMs stay in order)
+MAX_CONCURRENT_DM_USERS = 5
+
+# DM log records are written to notification_log once this many have built up,
+# so a run that is killed part-way loses at most this many (and re-sends those)
+NOTIFICATION_LOG_FLUSH_SIZE = 50
+
+# DM channel ID per Discord user ID. Opening a DM channel is idempotent, so one
+# lookup per user per run is enough.
+_dm_channel_cache: dict[str, str] = {}
+
+
+def _dm_payload(embed: dict) -> bytes:
+    """Serialize a DM message body once so it can be sent to many users."""
+    return _json_dumps({"embeds": [embed]})
+
+
+def send_discord_dm(bot_token: str, user_id: str, embed: dict | bytes) -> bool:
     """Send a DM to a Discord user via the bot token REST API.
 
-    1. Create/get DM channel with the user
+    1. Create/get DM channel with the user (cached per user)
     2. Send the embed message to that channel
+
+    `embed` may also be a message body already serialized by _dm_payload.
     """
     headers = {
         "Authorization": f"Bot {bot_token}",
@@ -1300,37 +1984,29 @@ def send_discord_dm(bot_token: str, user_id: str, embed: dict) -> bool:
     }
 
     # Step 1: Create DM channel
-    try:
-        resp = requests.post(
-            f"{DISCORD_API_BASE}/users/@me/channels",
-            json={"recipient_id": user_id},
-            headers=headers,
-            timeout=10,
-        )
-        resp.raise_for_status()
-        channel_id = resp.json()["id"]
-    except requests.RequestException as e:
-        log.error("Failed to create DM channel for user %s: %s", user_id, e)
-        return False
+    channel_id = _dm_channel_cache.get(user_id)
+    if channel_id is None:
+        try:
+            resp = _discord_post(
+                f"{DISCORD_API_BASE}/users/@me/channels",
+                payload={"recipient_id": user_id},
+                headers=headers,
+            )
+            resp.raise_for_status()
+            channel_id = _json_loads(resp.content)["id"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            log.error("Failed to create DM channel for user %s: %s", user_id, e)
+            return False
+        _dm_channel_cache[user_id] = channel_id
 
     # Step 2: Send message
+    body = embed if isinstance(embed, bytes) else _dm_payload(embed)
     try:
-        resp = requests.post(
+        resp = _discord_post(
             f"{DISCORD_API_BASE}/channels/{channel_id}/messages",
-            json={"embeds": [embed]},
+            data=body,
             headers=headers,
-            timeout=10,
         )
-        if resp.status_code == 429:
-            retry_after = resp.json().get("retry_after", 5)
-            log.warning("Discord DM rate limit, waiting %.1fs", retry_after)
-            time.sleep(retry_after)
-            resp = requests.post(
-                f"{DISCORD_API_BASE}/channels/{channel_id}/messages",
-                json={"embeds": [embed]},
-                headers=headers,
-                timeout=10,
-            )
         resp.raise_for_status()
         return True
     except requests.RequestException as e:
@@ -1343,7 +2019,6 @@ def get_neighborhoods_to_scrape(config: dict) -> list[str]:
     neighborhoods = set(config["search"]["neighborhoods"])
 
     if _use_mongodb():
-        import db as db_module
         users = db_module.get_all_subscribed_users()
         for user in users:
             user_hoods = user.get("filters", {}).get("neighborhoods", [])
@@ -1352,6 +2027,98 @@ def get_neighborhoods_to_scrape(config: dict) -> list[str]:
     return sorted(neighborhoods)
 
 
+def _group_by_matching_user(items: list, listing_of, index: dict[str, list[dict]],
+                            unfiltered: list[dict]) -> dict[str, list]:
+    """Group items by the discord_user_ids whose filters accept their listing.
+
+    Only the users the neighborhood index routes a listing to are checked, and
+    each listing is matched against them in one batch. Items keep their
+    original order within each user's list.
+    """
+    from models import users_matching_listing
+
+    by_user: dict[str, list] = {}
+    for item in items:
+        listing = listing_of(item)
+        candidates = itertools.chain(index.get(listing.get("neighborhood", ""), ()), unfiltered)
+        for user in users_matching_listing(listing, candidates):
+            by_user.setdefault(user["discord_user_id"], []).append(item)
+    return by_user
+
+
+def _send_user_notifications(
+    user: dict,
+    new_listings: list[dict],
+    price_drops: list[dict],
+    medians: dict,
+    bot_token: str,
+    already_sent: set[tuple[str, str, str]],
+    nearby_by_url: dict[str, list[dict] | None],
+    listing_embeds: dict[str, bytes],
+    drop_embeds: dict[str, bytes],
+    pending_logs: list[tuple[str, str, str, bool]],
+) -> int:
+    """Send one user's new-listing and price-drop DMs. Returns the number sent.
+
+    new_listings/price_drops are the items that already match this user's
+    filters. already_sent holds (user_id, url, type)
+    notifications logged before this run. nearby_by_url and the embed dicts
+    (pre-serialized DM bodies) are shared across users, keyed by listing URL. Each DM attempt is appended to
+    pending_logs for the caller to write to notification_log.
+    """
+    total_sent = 0
+    user_id = user["discord_user_id"]
+    notif_settings = user.get("notification_settings", {})
+    user_subway_prefs = user.get("filters", {}).get("subway_preferences")
+
+    # --- New listing DMs ---
+    if notif_settings.get("new_listings", True):
+        for listing in new_listings:
+            # Dedup check
+            if (user_id, listing["url"], "new_listing") in already_sent:
+                continue
+
+            nearby = nearby_by_url.get(listing["url"])
+            embed = listing_embeds[listing["url"]]
+
+            # Per-user subway preferences override the shared embed
+            if user_subway_prefs and nearby:
+                sprefs = _get_subway_prefs_for_listing(
+                    listing, {"subway_preferences": user_subway_prefs})
+                if sprefs:
+                    user_listing = {**listing}
+                    user_listing["subway_info"] = _format_subway_field(nearby, sprefs)
+                    spref_score = compute_subway_pref_score(
+                        listing["latitude"], listing["longitude"],
+                        _load_subway_stations(), sprefs)
+                    if spref_score:
+                        user_listing["subway_pref_score"] = spref_score
+                    else:
+                        user_listing.pop("subway_pref_score", None)
+                    vs = compute_value_score(user_listing, medians, nearby)
+                    embed = build_listing_embed(user_listing, value_score=vs)
+
+            success = send_discord_dm(bot_token, user_id, embed)
+            pending_logs.append((user_id, listing["url"], "new_listing", success))
+            if success:
+                total_sent += 1
+
+    # --- Price drop DMs ---
+    if notif_settings.get("price_drops", True):
+        for drop_info in price_drops:
+            listing = drop_info["listing"]
+            listing_url = listing.get("url", "")
+            if (user_id, listing_url, "price_drop") in already_sent:
+                continue
+
+            success = send_discord_dm(bot_token, user_id, drop_embeds[listing_url])
+            pending_logs.append((user_id, listing_url, "price_drop", success))
+            if success:
+                total_sent += 1
+
+    return total_sent
+
+
 def send_personalized_notifications(
     new_listings: list[dict],
     price_drops: list[dict],
@@ -1371,108 +2138,95 @@ def send_personalized_notifications(
     Returns:
         Total number of DMs sent.
     """
-    import db as db_module
-    from models import listing_matches_user
+    from models import build_user_neighborhood_index
 
     users = db_module.get_all_subscribed_users()
     if not users:
         log.info("No subscribed users — skipping personalized notifications")
         return 0
 
-    total_sent = 0
-
-    for user in users:
-        user_id = user["discord_user_id"]
-        notif_settings = user.get("notification_settings", {})
-
-        # --- New listing DMs ---
-        if notif_settings.get("new_listings", True):
-            for listing in new_listings:
-                if not listing_matches_user(listing, user):
-                    continue
-                # Dedup check
-                if db_module.was_notification_sent(user_id, listing["url"], "new_listing"):
-                    continue
-
-                nearby = None
-                if listing.get("latitude") and listing.get("longitude"):
-                    stations = _load_subway_stations()
-                    nearby = find_nearby_stations(listing["latitude"], listing["longitude"], stations)
-
-                # Per-user subway preferences override
-                user_subway_prefs = user.get("filters", {}).get("subway_preferences")
-                if user_subway_prefs and listing.get("latitude") and listing.get("longitude"):
-                    user_listing = {**listing}
-                    sprefs = _get_subway_prefs_for_listing(
-                        listing, {"subway_preferences": user_subway_prefs})
-                    if sprefs and nearby:
-                        user_listing["subway_info"] = _format_subway_field(nearby, sprefs)
-                        spref_score = compute_subway_pref_score(
-                            listing["latitude"], listing["longitude"],
-                            stations, sprefs)
-                        if spref_score:
-                            user_listing["subway_pref_score"] = spref_score
-                        else:
-                            user_listing.pop("subway_pref_score", None)
-                else:
-                    user_listing = listing
+    # Route each listing only to users whose neighborhood filter can accept it,
+    # instead of evaluating every (user, listing) pair.
+    index, unfiltered = build_user_neighborhood_index(users)
+    new_by_user = _group_by_matching_user(new_listings, lambda l: l, index, unfiltered)
+    drops_by_user = _group_by_matching_user(price_drops, lambda d: d["listing"], index, unfiltered)
+    active_users = [u for u in users
+                    if u["discord_user_id"] in new_by_user or u["discord_user_id"] in drops_by_user]
+    if not active_users:
+        log.info("No new listings or price drops match any subscribed user")
+        return 0
 
-                vs = compute_value_score(user_listing, medians, nearby)
-                embed = build_listing_embed(user_listing, value_score=vs)
+    # One notification_log query per type instead of one per (user, listing)
+    user_ids = [u["discord_user_id"] for u in active_users]
+    already_sent = {
+        (uid, url, "new_listing")
+        for uid, url in db_module.get_sent_notifications(
+            user_ids, [l["url"] for l in new_listings], "new_listing")
+    }
+    already_sent.update(
+        (uid, url, "price_drop")
+        for uid, url in db_module.get_sent_notifications(
+            user_ids, [d["listing"].get("url", "") for d in price_drops], "price_drop")
+    )
 
-                success = send_discord_dm(bot_token, user_id, embed)
-                db_module.log_notification(user_id, listing["url"], "new_listing", success)
-                if success:
-                    total_sent += 1
-                time.sleep(1)
-
-        # --- Price drop DMs ---
-        if notif_settings.get("price_drops", True):
-            for drop_info in price_drops:
-                listing = drop_info["listing"]
-                if not listing_matches_user(listing, user):
-                    continue
-                listing_url = listing.get("url", "")
-                if db_module.was_notification_sent(user_id, listing_url, "price_drop"):
-                    continue
-
-                price_change = drop_info["price_change"]
-                dom = drop_info.get("days_on_market")
-                # Build price drop embed inline
-                address = listing.get("address", "Unknown")
-                old_price = price_change["old_price"]
-                new_price = price_change["new_price"]
-                savings = price_change["savings"]
-                pct = price_change["pct"]
-                neighborhood = listing.get("neighborhood", "N/A")
-
-                fields = [
-                    {"name": "💰 Price", "value": f"~~${old_price:,}~~ → **${new_price:,}**", "inline": True},
-                    {"name": "💵 Savings", "value": f"${savings:,}/mo ({pct}% off)", "inline": True},
-                    {"name": "📍 Neighborhood", "value": neighborhood, "inline": True},
-                ]
-                maps_url = build_google_maps_url(address)
-                fields.append({"name": "🗺️ Map", "value": f"[View on Google Maps]({maps_url})", "inline": True})
-                if dom is not None:
-                    dom_value = f"{dom} days"
-                    if dom >= 30:
-                        dom_value += " (may be negotiable!)"
-                    fields.append({"name": "📅 Days Tracked", "value": dom_value, "inline": True})
-
-                embed = {
-                    "title": f"📉 Price Drop! {address}",
-                    "url": listing_url,
-                    "color": 0xFF8C00,
-                    "fields": fields,
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "footer": {"text": "NYC Apartment Tracker • Price Drop"},
-                }
+    # Nearby stations and embeds depend only on the listing, so build and
+    # serialize them once and share them across users (per-user subway
+    # preferences get their own embed).
+    stations = _load_subway_stations()
+    nearby_by_url: dict[str, list[dict] | None] = {}
+    listing_embeds: dict[str, bytes] = {}
+    for listings in new_by_user.values():
+        for listing in listings:
+            url = listing["url"]
+            if url in listing_embeds:
+                continue
+            nearby = None
+            if listing.get("latitude") and listing.get("longitude"):
+                nearby = find_nearby_stations(listing["latitude"], listing["longitude"], stations)
+            nearby_by_url[url] = nearby
+            vs = compute_value_score(listing, medians, nearby)
+            listing_embeds[url] = _dm_payload(build_listing_embed(listing, value_score=vs))
+    drop_embeds: dict[str, bytes] = {}
+    for drops in drops_by_user.values():
+        for drop_info in drops:
+            url = drop_info["listing"].get("url", "")
+            if url not in drop_embeds:
+                drop_embeds[url] = _dm_payload(build_price_drop_embed(
+                    drop_info["listing"], drop_info["price_change"], drop_info.get("days_on_market")))
+
+    # Users are independent, so overlap their network round-trips; each user's
+    # own DMs are still sent in order.
+    pending_logs: list[tuple[str, str, str, bool]] = []
+    pending_lock = threading.Lock()
+
+    def record(user_logs: list[tuple[str, str, str, bool]]) -> None:
+        with pending_lock:
+            pending_logs.extend(user_logs)
+            if len(pending_logs) < NOTIFICATION_LOG_FLUSH_SIZE:
+                return
+            batch = pending_logs[:]
+            pending_logs.clear()
+        db_module.log_notifications(batch)
+
+    def notify(user: dict) -> int:
+        user_id = user["discord_user_id"]
+        user_logs: list[tuple[str, str, str, bool]] = []
+        try:
+            return _send_user_notifications(
+                user, new_by_user.get(user_id, []), drops_by_user.get(user_id, []),
+                medians, bot_token, already_sent, nearby_by_url, listing_embeds, drop_embeds,
+                user_logs,
+            )
+        finally:
+            # Recorded as each user finishes, not only at the end of the run
+            record(user_logs)
 
-                success = send_discord_dm(bot_token, user_id, embed)
-                db_module.log_notification(user_id, listing_url, "price_drop", success)
-                if success:
-                    total_sent += 1
-                time.sleep(1)
+    try:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_DM_USERS, len(active_users))) as pool:
+            total_sent = sum(pool.map(notify, active_users))
+    finally:
+        # Record whatever is left, even if a worker failed part-way
+        db_module.log_notifications(pending_logs)
 
     log.info("Sent %d personalized DMs to %d users", total_sent, len(users))
     return total_sent
@@ -1501,6 +2255,9 @@ def run_scraper():
     seen = load_seen()
     log.info("Previously seen: %d listings", len(seen))
 
+    # Subway stations for listing enrichment (loaded once for the whole run)
+    stations = _load_subway_stations()
+
     # Discord webhook
     webhook_url = os.environ.get("DISCORD_WEBHOOK_URL", "")
     if not webhook_url:
@@ -1524,21 +2281,22 @@ def run_scraper():
 
     # Scrape
     session = get_session(config)
-    delay = config["scraper"]["request_delay_seconds"]
     new_count = 0
     price_drop_count = 0
     total_found = 0
     new_listings = []
     price_drops = []  # Collected for per-user DMs
+    webhook_listings = []  # New listings to broadcast, with value scores alongside
+    webhook_scores = []
 
     # Pre-compute neighborhood medians for value scoring
     medians = compute_neighborhood_medians(seen)
 
-    for i, neighborhood in enumerate(neighborhoods):
-        if i > 0:
-            time.sleep(delay)
+    scraped = scrape_neighborhoods(neighborhoods, config)
+    # One timestamp for everything this scrape saw, instead of one per listing
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-        listings = scrape_neighborhood(session, neighborhood, config)
+    for neighborhood, listings in zip(neighborhoods, scraped):
         total_found += len(listings)
 
         for listing in listings:
@@ -1548,7 +2306,7 @@ def run_scraper():
             # --- Price drop detection for seen listings ---
             if url in seen:
                 # Update last_scraped timestamp
-                seen[url]["last_scraped"] = datetime.now(timezone.utc).isoformat()
+                seen[url]["last_scraped"] = now_iso
 
                 # Lazy geo backfill for old entries missing coordinates
                 if geoclient_key and "latitude" not in seen[url]:
@@ -1580,7 +2338,6 @@ def run_scraper():
                         if webhook_url and not (bot_token and _use_mongodb()):
                             send_discord_price_drop(webhook_url, drop_listing, change,
                                                     config, days_on_market=dom)
-                            time.sleep(1)
                         # Collect for per-user DMs
                         price_drops.append({
                             "listing": drop_listing,
@@ -1614,8 +2371,8 @@ def run_scraper():
             log.info("NEW: %s — %s — %s", listing["price"], listing["address"], listing["neighborhood"])
 
             seen_entry = {
-                "first_seen": datetime.now(timezone.utc).isoformat(),
-                "last_scraped": datetime.now(timezone.utc).isoformat(),
+                "first_seen": now_iso,
+                "last_scraped": now_iso,
                 "address": listing["address"],
                 "price": listing["price"],
                 "neighborhood": listing.get("neighborhood", ""),
@@ -1631,7 +2388,6 @@ def run_scraper():
                     seen_entry["longitude"] = geo["longitude"]
                     listing["latitude"] = geo["latitude"]
                     listing["longitude"] = geo["longitude"]
-                    stations = _load_subway_stations()
                     nearby = find_nearby_stations(geo["latitude"], geo["longitude"], stations)
                     if nearby:
                         sprefs = _get_subway_prefs_for_listing(listing, config)
@@ -1644,13 +2400,11 @@ def run_scraper():
 
             seen[url] = seen_entry
 
-            # Send Discord webhook notification for non-first-run listings
+            # Queue Discord webhook notification for non-first-run listings
             # Skip broadcast when personalized DMs are enabled
             if not is_first_run and webhook_url and not (bot_token and _use_mongodb()):
-                vs = compute_value_score(listing, medians, nearby)
-                send_discord_notification(webhook_url, listing, config,
-                                          days_on_market=None, value_score=vs)
-                time.sleep(1)  # Rate-limit Discord messages
+                webhook_listings.append(listing)
+                webhook_scores.append(compute_value_score(listing, medians, nearby))
 
     # ---------------------------------------------------------------------------
     # RentHop scraping
@@ -1665,13 +2419,14 @@ def run_scraper():
     rh_seeded = 0
     rh_linked = 0
     rh_new = 0
+    address_index = build_canonical_address_index(seen)
 
-    for i, neighborhood in enumerate(neighborhoods):
-        if neighborhood not in RENTHOP_AREA_MAP:
-            continue
-        time.sleep(delay)
+    # RentHop neighborhoods are scraped concurrently, like StreetEasy above
+    rh_neighborhoods = [n for n in neighborhoods if n in RENTHOP_AREA_MAP]
+    rh_scraped = scrape_neighborhoods(rh_neighborhoods, config, scrape=scrape_renthop_neighborhood)
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-        rh_listings = scrape_renthop_neighborhood(session, neighborhood, config)
+    for neighborhood, rh_listings in zip(rh_neighborhoods, rh_scraped):
         total_found += len(rh_listings)
 
         for listing in rh_listings:
@@ -1679,7 +2434,7 @@ def run_scraper():
 
             # Already seen on RentHop (URL match) — just refresh timestamp
             if url in seen:
-                seen[url]["last_scraped"] = datetime.now(timezone.utc).isoformat()
+                seen[url]["last_scraped"] = now_iso
                 if "source" not in seen[url]:
                     seen[url]["source"] = "renthop"
                 continue
@@ -1695,20 +2450,19 @@ def run_scraper():
             listing["canonical_address"] = normalize_address(listing["address"])
 
             # Cross-source dedup: same apartment already tracked via StreetEasy?
-            dup_url = find_cross_source_duplicate(listing, seen)
+            dup_url = find_cross_source_duplicate(listing, seen, address_index)
             if dup_url:
                 # Link RentHop URL into the existing StreetEasy entry
                 alt_urls = seen[dup_url].get("alt_urls", {})
                 alt_urls["renthop"] = url
                 seen[dup_url]["alt_urls"] = alt_urls
-                seen[dup_url]["last_scraped"] = datetime.now(timezone.utc).isoformat()
+                seen[dup_url]["last_scraped"] = now_iso
                 rh_linked += 1
                 log.debug("RentHop duplicate of SE listing: %s ↔ %s", dup_url, url)
                 continue
 
             # Enrich with subway info using coordinates from RentHop card
             if listing.get("latitude") and listing.get("longitude"):
-                stations = _load_subway_stations()
                 nearby = find_nearby_stations(listing["latitude"], listing["longitude"], stations)
                 if nearby:
                     sprefs = _get_subway_prefs_for_listing(listing, config)
@@ -1723,8 +2477,8 @@ def run_scraper():
 
             # Genuinely new RentHop listing
             seen_entry = {
-                "first_seen": datetime.now(timezone.utc).isoformat(),
-                "last_scraped": datetime.now(timezone.utc).isoformat(),
+                "first_seen": now_iso,
+                "last_scraped": now_iso,
                 "address": listing["address"],
                 "price": listing["price"],
                 "neighborhood": listing.get("neighborhood", ""),
@@ -1735,6 +2489,8 @@ def run_scraper():
                 seen_entry["latitude"] = listing["latitude"]
                 seen_entry["longitude"] = listing["longitude"]
             seen[url] = seen_entry
+            if seen_entry["canonical_address"]:
+                address_index.setdefault(seen_entry["canonical_address"], url)
 
             if is_first_renthop_run:
                 # Seed only — no notifications on first RentHop run
@@ -1748,15 +2504,18 @@ def run_scraper():
                          listing["price"], listing["address"], listing["neighborhood"])
 
                 if not is_first_run and webhook_url and not (bot_token and _use_mongodb()):
-                    vs = compute_value_score(listing, medians, nearby)
-                    send_discord_notification(webhook_url, listing, config,
-                                              days_on_market=None, value_score=vs)
-                    time.sleep(1)
+                    webhook_listings.append(listing)
+                    webhook_scores.append(compute_value_score(listing, medians, nearby))
 
     if is_first_renthop_run and rh_seeded > 0:
         log.info("First RentHop run: seeded %d listings, linked %d as StreetEasy duplicates",
                  rh_seeded, rh_linked)
 
+    # New-listing webhook notifications go out together, up to 10 embeds per message
+    if webhook_listings:
+        sent = send_discord_batch(webhook_url, webhook_listings, config, webhook_scores)
+        log.info("Sent %d/%d new listing notification(s) to the webhook", sent, len(webhook_listings))
+
     # On first run, send a single summary instead (only if no personalized DMs)
     if is_first_run and webhook_url and new_listings and not (bot_token and _use_mongodb()):
         send_discord_summary(webhook_url, new_listings, config)
@@ -1791,9 +2550,13 @@ def run_scraper():
             f.write(f"total_found={total_found}\n")
 
 
-def compute_digest_analytics(seen: dict, recent_listings: list[dict]) -> dict:
+def compute_digest_analytics(seen: dict, recent_listings: list[dict],
+                             medians: dict[str, float] | None = None) -> dict:
     """Compute analytics for the daily digest.
 
+    Pass medians (from compute_neighborhood_medians) when the caller already
+    has them for this seen dict; otherwise they are computed here.
+
     Returns dict with:
       - avg_by_hood: {neighborhood: avg_price}
       - price_trends: {neighborhood: "up"/"down"/"stable"}
@@ -1805,18 +2568,66 @@ def compute_digest_analytics(seen: dict, recent_listings: list[dict]) -> dict:
     now = datetime.now(timezone.utc)
     cutoff_7d = (now - timedelta(days=7)).isoformat()
     cutoff_14d = (now - timedelta(days=14)).isoformat()
+    # Anything first seen after this can't be 30+ days old; the extra day of
+    # slack keeps the string comparison safe for naive or offset timestamps.
+    stale_candidate_cutoff = (now - timedelta(days=29)).isoformat()
+
+    if medians is None:
+        medians = compute_neighborhood_medians(seen)
 
-    # Average price by neighborhood (all tracked)
+    # One pass over tracked listings feeds every section of the digest
     prices_by_hood: dict[str, list[float]] = {}
     all_prices: list[float] = []
-    for entry in seen.values():
+    recent_by_hood: dict[str, list[float]] = {}
+    prev_by_hood: dict[str, list[float]] = {}
+    scored_listings = []
+    stale_listings = []
+    for url, entry in seen.items():
         hood = entry.get("neighborhood", "")
-        if not hood:
-            continue
+        first_seen = entry.get("first_seen", "")
         price = parse_price(entry.get("price", ""))
+
         if price is not None:
-            prices_by_hood.setdefault(hood, []).append(float(price))
-            all_prices.append(float(price))
+            # Average price by neighborhood (all tracked)
+            if hood:
+                prices_by_hood.setdefault(hood, []).append(float(price))
+                all_prices.append(float(price))
+                # Price trends: last 7 days vs previous 7 days
+                if first_seen:
+                    if first_seen >= cutoff_7d:
+                        recent_by_hood.setdefault(hood, []).append(float(price))
+                    elif first_seen >= cutoff_14d:
+                        prev_by_hood.setdefault(hood, []).append(float(price))
+
+            # Value score for top deals
+            fake_listing = {
+                "price": entry.get("price", ""),
+                "neighborhood": hood,
+                "sqft": "N/A",
+            }
+            vs = compute_value_score(fake_listing, medians)
+            if vs:
+                scored_listings.append({
+                    "url": url,
+                    "address": entry.get("address", "Unknown"),
+                    "price": entry.get("price", "N/A"),
+                    "neighborhood": hood,
+                    "score": vs["score"],
+                    "grade": vs["grade"],
+                })
+
+        # Stale listings (30+ days) — only parse dates of plausible candidates
+        if not first_seen or first_seen >= stale_candidate_cutoff:
+            continue
+        dom = compute_days_on_market(first_seen)
+        if dom is not None and dom >= 30:
+            stale_listings.append({
+                "url": url,
+                "address": entry.get("address", "Unknown"),
+                "price": entry.get("price", "N/A"),
+                "neighborhood": hood,
+                "days": dom,
+            })
 
     avg_by_hood = {}
     for hood, prices in sorted(prices_by_hood.items()):
@@ -1824,26 +2635,14 @@ def compute_digest_analytics(seen: dict, recent_listings: list[dict]) -> dict:
 
     overall_avg = round(sum(all_prices) / len(all_prices)) if all_prices else 0
 
-    # Price trends: compare last 7 days vs previous 7 days
-    recent_by_hood: dict[str, list[float]] = {}
-    prev_by_hood: dict[str, list[float]] = {}
-    for entry in seen.values():
-        hood = entry.get("neighborhood", "")
-        first_seen = entry.get("first_seen", "")
-        price = parse_price(entry.get("price", ""))
-        if not hood or price is None or not first_seen:
-            continue
-        if first_seen >= cutoff_7d:
-            recent_by_hood.setdefault(hood, []).append(float(price))
-        elif first_seen >= cutoff_14d:
-            prev_by_hood.setdefault(hood, []).append(float(price))
-
     price_trends = {}
-    all_hoods = set(recent_by_hood.keys()) | set(prev_by_hood.keys())
-    for hood in all_hoods:
-        recent_avg = sum(recent_by_hood.get(hood, [])) / len(recent_by_hood[hood]) if recent_by_hood.get(hood) else None
-        prev_avg = sum(prev_by_hood.get(hood, [])) / len(prev_by_hood[hood]) if prev_by_hood.get(hood) else None
-        if recent_avg is not None and prev_avg is not None and prev_avg > 0:
+    for hood, recent in recent_by_hood.items():
+        prev = prev_by_hood.get(hood)
+        if not prev:
+            continue
+        recent_avg = sum(recent) / len(recent)
+        prev_avg = sum(prev) / len(prev)
+        if prev_avg > 0:
             change_pct = ((recent_avg - prev_avg) / prev_avg) * 100
             if change_pct > 2:
                 price_trends[hood] = "up"
@@ -1852,50 +2651,14 @@ def compute_digest_analytics(seen: dict, recent_listings: list[dict]) -> dict:
             else:
                 price_trends[hood] = "stable"
 
-    # Top 5 best deals by value score
-    medians = compute_neighborhood_medians(seen)
-    scored_listings = []
-    for url, entry in seen.items():
-        price = parse_price(entry.get("price", ""))
-        if price is None:
-            continue
-        fake_listing = {
-            "price": entry.get("price", ""),
-            "neighborhood": entry.get("neighborhood", ""),
-            "sqft": "N/A",
-        }
-        vs = compute_value_score(fake_listing, medians)
-        if vs:
-            scored_listings.append({
-                "url": url,
-                "address": entry.get("address", "Unknown"),
-                "price": entry.get("price", "N/A"),
-                "neighborhood": entry.get("neighborhood", ""),
-                "score": vs["score"],
-                "grade": vs["grade"],
-            })
-    scored_listings.sort(key=lambda x: -x["score"])
-    top_deals = scored_listings[:5]
-
-    # Stale listings (30+ days)
-    stale_listings = []
-    for url, entry in seen.items():
-        dom = compute_days_on_market(entry.get("first_seen"))
-        if dom is not None and dom >= 30:
-            stale_listings.append({
-                "url": url,
-                "address": entry.get("address", "Unknown"),
-                "price": entry.get("price", "N/A"),
-                "neighborhood": entry.get("neighborhood", ""),
-                "days": dom,
-            })
-    stale_listings.sort(key=lambda x: -x["days"])
+    top_deals = heapq.nlargest(5, scored_listings, key=lambda x: x["score"])
+    stale_listings = heapq.nlargest(10, stale_listings, key=lambda x: x["days"])
 
     return {
         "avg_by_hood": avg_by_hood,
         "price_trends": price_trends,
         "top_deals": top_deals,
-        "stale_listings": stale_listings[:10],
+        "stale_listings": stale_listings,
         "total_tracked": len(seen),
         "overall_avg": overall_avg,
     }
@@ -1914,64 +2677,60 @@ def send_discord_digest(webhook_url: str, listings: list[dict], config: dict,
 
     # Build neighborhood summary lines
     hood_lines = []
-    for hood in sorted(by_neighborhood, key=lambda h: -len(by_neighborhood[h])):
+    hood_counts = Counter({hood: len(entries) for hood, entries in by_neighborhood.items()})
+    for hood, _count in hood_counts.most_common():
         entries = by_neighborhood[hood]
         prices = [parse_price(e.get("price", "")) for e in entries]
         prices = [p for p in prices if p]
         if prices:
-            price_str = f"${min(prices):,}–${max(prices):,}" if len(prices) > 1 else f"${prices[0]:,}"
+            lo, hi = _minmax(prices)
+            price_str = f"${lo:,}–${hi:,}" if len(prices) > 1 else f"${lo:,}"
         else:
             price_str = "N/A"
         hood_lines.append(f"• **{hood}**: {len(entries)} listing(s) — {price_str}")
 
     today_str = datetime.now(timezone.utc).strftime("%b %d, %Y")
-    new_listings_desc = "\n".join(hood_lines) if hood_lines else "No new listings today."
 
-    # Build full description with analytics
-    sections = [
-        f"**{len(listings)} new listing(s)** found in the last 24 hours.\n",
-        new_listings_desc,
-    ]
+    # Build full description with analytics as one list of lines, joined once
+    lines = [f"**{len(listings)} new listing(s)** found in the last 24 hours.", ""]
+    lines.extend(hood_lines or ["No new listings today."])
 
     if analytics:
         # Market summary
         total = analytics.get("total_tracked", 0)
         avg = analytics.get("overall_avg", 0)
         if total and avg:
-            sections.append(f"\n**Market Summary**: {total} listings tracked, avg ${avg:,}/mo")
+            lines += ["", f"**Market Summary**: {total} listings tracked, avg ${avg:,}/mo"]
 
         # Average by neighborhood
         avg_by_hood = analytics.get("avg_by_hood", {})
         trends = analytics.get("price_trends", {})
         if avg_by_hood:
-            avg_lines = []
+            lines += ["", "**Avg Price by Neighborhood:**"]
             for hood, avg_price in sorted(avg_by_hood.items()):
                 trend = trends.get(hood, "")
                 trend_icon = {"up": " \u2191", "down": " \u2193", "stable": " \u2192"}.get(trend, "")
-                avg_lines.append(f"• {hood}: ${avg_price:,}{trend_icon}")
-            sections.append("\n**Avg Price by Neighborhood:**\n" + "\n".join(avg_lines))
+                lines.append(f"• {hood}: ${avg_price:,}{trend_icon}")
 
         # Top deals
         top_deals = analytics.get("top_deals", [])
         if top_deals:
-            deal_lines = []
+            lines += ["", "**Top 5 Best Deals:**"]
             for d in top_deals:
-                deal_lines.append(
+                lines.append(
                     f"• [{d['address']}]({d['url']}) — {d['price']} ({d['grade']}, {d['score']}/10)"
                 )
-            sections.append("\n**Top 5 Best Deals:**\n" + "\n".join(deal_lines))
 
         # Stale listings
         stale = analytics.get("stale_listings", [])
         if stale:
-            stale_lines = []
+            lines += ["", "**Negotiation Targets (30+ days):**"]
             for s in stale[:5]:
-                stale_lines.append(
+                lines.append(
                     f"• [{s['address']}]({s['url']}) — {s['price']} ({s['days']}d)"
                 )
-            sections.append("\n**Negotiation Targets (30+ days):**\n" + "\n".join(stale_lines))
 
-    description = "\n".join(sections)
+    description = "\n".join(lines)
     # Discord embed description limit is 4096 chars
     if len(description) > 4096:
         description = description[:4093] + "..."
@@ -1991,7 +2750,7 @@ def send_discord_digest(webhook_url: str, listings: list[dict], config: dict,
     }
 
     try:
-        resp = requests.post(webhook_url, json=payload, timeout=10)
+        resp = _discord_post(webhook_url, payload=payload)
         resp.raise_for_status()
         return True
     except requests.RequestException as e:
@@ -2013,6 +2772,8 @@ def run_digest():
         log.error("No notification method configured — cannot send digest")
         return
 
+    # The full seen set is needed anyway (analytics, medians, total tracked), so
+    # the 24-hour window is filtered in memory rather than with a second query
     seen = load_seen()
     cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
 
@@ -2030,7 +2791,8 @@ def run_digest():
     log.info("Found %d listings in the last 24 hours (out of %d total)", len(recent), len(seen))
 
     # Always send digest — analytics are valuable even with 0 new listings
-    analytics = compute_digest_analytics(seen, recent)
+    medians = compute_neighborhood_medians(seen)
+    analytics = compute_digest_analytics(seen, recent, medians)
 
     # Send webhook digest (skip if personalized DMs enabled)
     if webhook_url and not (bot_token and _use_mongodb()):
@@ -2039,36 +2801,46 @@ def run_digest():
 
     # Send per-user digest DMs
     if bot_token and _use_mongodb():
-        import db as db_module
-        from models import listing_matches_user
+        from models import build_user_neighborhood_index
+
+        from datetime import datetime as _dt
+        today_str = _dt.now(timezone.utc).strftime("%b %d, %Y")
+        digest_key = f"digest-{today_str}"
 
         users = db_module.get_all_subscribed_users()
-        dm_count = 0
+        # One lookup for everyone who already got today's digest
+        already_sent = db_module.get_sent_user_ids_for("daily_digest", digest_key)
+        # Match each listing against only its neighborhood candidates
+        index, unfiltered = build_user_neighborhood_index(users)
+        recent_by_user = _group_by_matching_user(recent, lambda l: l, index, unfiltered)
+        # Listings appear in many users' digests; parse each price only once
+        price_by_url = {l["url"]: parse_price(l["price"]) for l in recent}
+        digests: list[tuple[str, dict]] = []  # (user_id, embed)
         for user in users:
             notif_settings = user.get("notification_settings", {})
             if not notif_settings.get("daily_digest", True):
                 continue
+            user_id = user["discord_user_id"]
+            if user_id in already_sent:
+                continue
 
-            # Filter recent listings to those matching user preferences
-            user_recent = [l for l in recent if listing_matches_user(l, user)]
-            user_analytics = compute_digest_analytics(seen, user_recent)
+            # Recent listings matching user preferences
+            user_recent = recent_by_user.get(user_id, [])
 
             # Build digest embed for this user
-            from datetime import datetime as _dt
-            today_str = _dt.now(timezone.utc).strftime("%b %d, %Y")
-
             by_hood: dict[str, list[dict]] = {}
             for entry in user_recent:
                 hood = entry.get("neighborhood", "Unknown") or "Unknown"
                 by_hood.setdefault(hood, []).append(entry)
 
             hood_lines = []
-            for hood in sorted(by_hood, key=lambda h: -len(by_hood[h])):
+            hood_counts = Counter({hood: len(entries) for hood, entries in by_hood.items()})
+            for hood, _count in hood_counts.most_common():
                 entries = by_hood[hood]
-                prices = [parse_price(e.get("price", "")) for e in entries]
-                prices = [p for p in prices if p]
+                prices = [p for p in (price_by_url[e["url"]] for e in entries) if p]
                 if prices:
-                    price_str = f"${min(prices):,}–${max(prices):,}" if len(prices) > 1 else f"${prices[0]:,}"
+                    lo, hi = _minmax(prices)
+                    price_str = f"${lo:,}–${hi:,}" if len(prices) > 1 else f"${lo:,}"
                 else:
                     price_str = "N/A"
                 hood_lines.append(f"• **{hood}**: {len(entries)} listing(s) — {price_str}")
@@ -2076,8 +2848,9 @@ def run_digest():
             desc = f"**{len(user_recent)} new listing(s)** matching your filters in the last 24 hours.\n\n"
             desc += "\n".join(hood_lines) if hood_lines else "No matching listings today."
 
-            if user_analytics.get("total_tracked"):
-                desc += f"\n\n**Total tracked**: {user_analytics['total_tracked']} listings"
+            # Analytics only depend on `seen`, so every user shares the run-wide result
+            if analytics.get("total_tracked"):
+                desc += f"\n\n**Total tracked**: {analytics['total_tracked']} listings"
 
             if len(desc) > 4096:
                 desc = desc[:4093] + "..."
@@ -2090,14 +2863,25 @@ def run_digest():
                 "footer": {"text": "NYC Apartment Tracker • Daily Digest"},
             }
 
-            user_id = user["discord_user_id"]
-            if db_module.was_notification_sent(user_id, f"digest-{today_str}", "daily_digest"):
-                continue
-            success = send_discord_dm(bot_token, user_id, embed)
-            db_module.log_notification(user_id, f"digest-{today_str}", "daily_digest", success)
-            if success:
-                dm_count += 1
-            time.sleep(1)
+            digests.append((user_id, embed))
+
+        # Each user's digest is a single independent DM, so send them concurrently
+        dm_count = 0
+        if digests:
+            digest_logs: list[tuple[str, str, str, bool]] = []
+
+            def send_digest(digest: tuple[str, dict]) -> bool:
+                user_id, embed = digest
+                success = send_discord_dm(bot_token, user_id, embed)
+                digest_logs.append((user_id, digest_key, "daily_digest", success))
+                return success
+
+            try:
+                with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_DM_USERS, len(digests))) as pool:
+                    dm_count = sum(pool.map(send_digest, digests))
+            finally:
+                # Record whatever was sent, even if a worker failed part-way
+                db_module.log_notifications(digest_logs)
 
         log.info("Sent %d per-user digest DMs", dm_count)
 
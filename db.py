@@ -6,12 +6,16 @@ to its original JSON-file persistence.
 
 from __future__ import annotations
 
+import copy
 import logging
 import os
+import sys
+import threading
+import time
 from datetime import datetime, timezone
 from typing import Any
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, ReturnDocument, UpdateOne
 from pymongo.collection import Collection
 from pymongo.database import Database
 
@@ -20,6 +24,17 @@ log = logging.getLogger("apartment_tracker.db")
 _client: MongoClient | None = None
 _db: Database | None = None
 
+# Pool settings for the shared client. The bot handles a few concurrent users,
+# so a small pool kept warm (minPoolSize) spares button clicks a fresh
+# TCP+TLS+auth handshake; idle connections beyond that are recycled after a minute.
+MONGO_CLIENT_OPTIONS: dict[str, Any] = {
+    "maxPoolSize": 10,
+    "minPoolSize": 2,
+    "maxIdleTimeMS": 60_000,
+    "serverSelectionTimeoutMS": 5_000,
+    "retryWrites": True,
+}
+
 
 def get_client() -> MongoClient:
     """Return a singleton MongoClient, creating it on first call."""
@@ -28,7 +43,7 @@ def get_client() -> MongoClient:
         uri = os.environ.get("MONGODB_URI", "")
         if not uri:
             raise RuntimeError("MONGODB_URI environment variable is not set")
-        _client = MongoClient(uri)
+        _client = MongoClient(uri, **MONGO_CLIENT_OPTIONS)
     return _client
 
 
@@ -48,6 +63,8 @@ def close():
         _client.close()
         _client = None
         _db = None
+    with _user_cache_lock:
+        _user_cache.clear()
 
 
 def ensure_indexes():
@@ -58,8 +75,12 @@ def ensure_indexes():
     db.seen_listings.create_index("url", unique=True)
     db.seen_listings.create_index("canonical_address")
 
-    # user_preferences: unique on discord_user_id
+    # user_preferences: unique on discord_user_id; the scraper's matcher and
+    # digest load subscribers with find({"subscribed": True}), so index just
+    # those documents rather than scanning paused users too
     db.user_preferences.create_index("discord_user_id", unique=True)
+    db.user_preferences.create_index(
+        "subscribed", partialFilterExpression={"subscribed": True})
 
     # notification_log: compound index for dedup lookups + 30-day TTL
     db.notification_log.create_index([
@@ -67,6 +88,12 @@ def ensure_indexes():
         ("listing_url", ASCENDING),
         ("notification_type", ASCENDING),
     ])
+    # Digest dedup looks up every recipient of one key (get_sent_user_ids_for),
+    # which the user-first index above can't serve
+    db.notification_log.create_index([
+        ("listing_url", ASCENDING),
+        ("notification_type", ASCENDING),
+    ])
     db.notification_log.create_index("sent_at", expireAfterSeconds=30 * 24 * 3600)
 
 
@@ -80,20 +107,21 @@ def _seen_col() -> Collection:
 
 def load_seen_from_mongo() -> dict[str, dict]:
     """Load all seen listings from MongoDB into the same dict format the scraper uses."""
-    result: dict[str, dict] = {}
-    for doc in _seen_col().find():
-        url = doc.pop("url")
-        doc.pop("_id", None)
-        result[url] = doc
-    return result
+    cursor = _seen_col().find({}, projection={"_id": 0}).batch_size(1000)
+    return {doc.pop("url"): doc for doc in cursor}
 
 
-def save_seen_to_mongo(seen: dict[str, dict]) -> None:
-    """Upsert all seen listings to MongoDB."""
-    col = _seen_col()
-    for url, entry in seen.items():
-        doc = {**entry, "url": url}
-        col.update_one({"url": url}, {"$set": doc}, upsert=True)
+def save_seen_to_mongo(seen: dict[str, dict], previous: dict[str, dict] | None = None) -> int:
+    """Upsert seen listings to MongoDB in a single unordered bulk_write.
+
+    When `previous` (the entries as loaded) is given, only listings that are new
+    or whose entry changed since then are written. Returns the number written.
+    """
+    if previous is None:
+        return upsert_seen_listings(seen)
+    return upsert_seen_listings(
+        {url: entry for url, entry in seen.items() if previous.get(url) != entry}
+    )
 
 
 def upsert_seen_listing(url: str, entry: dict) -> None:
@@ -102,6 +130,18 @@ def upsert_seen_listing(url: str, entry: dict) -> None:
     _seen_col().update_one({"url": url}, {"$set": doc}, upsert=True)
 
 
+def upsert_seen_listings(entries: dict[str, dict]) -> int:
+    """Upsert many seen listings in one unordered bulk_write. Returns the number sent."""
+    if not entries:
+        return 0
+    _seen_col().bulk_write(
+        [UpdateOne({"url": url}, {"$set": {**entry, "url": url}}, upsert=True)
+         for url, entry in entries.items()],
+        ordered=False,
+    )
+    return len(entries)
+
+
 def delete_seen_listing(url: str) -> None:
     """Remove a seen listing by URL."""
     _seen_col().delete_one({"url": url})
@@ -124,12 +164,36 @@ def _user_col() -> Collection:
     return get_db().user_preferences
 
 
+# Recently read or written user documents, so a burst of settings-panel
+# interactions doesn't cost a MongoDB round trip each. The bot is the only
+# writer of user_preferences and every write below refreshes or drops the
+# affected entry; the TTL bounds staleness from anything else.
+USER_CACHE_TTL_SECONDS = 60.0
+USER_CACHE_MAX_ENTRIES = 10_000
+_user_cache: dict[str, tuple[float, dict]] = {}  # discord_user_id -> (expires_at, doc)
+_user_cache_lock = threading.Lock()
+
+
+def _cache_user(discord_user_id: str, doc: dict | None) -> None:
+    with _user_cache_lock:
+        if doc is None:
+            _user_cache.pop(discord_user_id, None)
+            return
+        if discord_user_id not in _user_cache and len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+            # Evict the oldest insertion
+            _user_cache.pop(next(iter(_user_cache)))
+        _user_cache[discord_user_id] = (time.monotonic() + USER_CACHE_TTL_SECONDS, doc)
+
+
 def get_user(discord_user_id: str) -> dict | None:
     """Get a user's preferences by Discord user ID."""
-    doc = _user_col().find_one({"discord_user_id": discord_user_id})
-    if doc:
-        doc.pop("_id", None)
-    return doc
+    with _user_cache_lock:
+        cached = _user_cache.get(discord_user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return copy.deepcopy(cached[1])
+    doc = _user_col().find_one({"discord_user_id": discord_user_id}, {"_id": 0})
+    _cache_user(discord_user_id, doc)
+    return copy.deepcopy(doc)
 
 
 def create_user(discord_user_id: str, discord_username: str, filters: dict | None = None,
@@ -149,17 +213,38 @@ def create_user(discord_user_id: str, discord_username: str, filters: dict | Non
     }
     _user_col().insert_one(doc)
     doc.pop("_id", None)
+    _cache_user(discord_user_id, copy.deepcopy(doc))
     return doc
 
 
 def update_user(discord_user_id: str, updates: dict) -> bool:
     """Update a user's preferences. Returns True if document was found."""
     updates["updated_at"] = datetime.now(timezone.utc)
-    result = _user_col().update_one(
+    # Returning the updated document keeps the cache warm, so the read that
+    # usually follows a write is served without another round trip
+    doc = _user_col().find_one_and_update(
         {"discord_user_id": discord_user_id},
         {"$set": updates},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    _cache_user(discord_user_id, doc)
+    return doc is not None
+
+
+def toggle_no_fee(discord_user_id: str) -> dict | None:
+    """Flip filters.no_fee in one atomic update and return the updated user (None if not found)."""
+    doc = _user_col().find_one_and_update(
+        {"discord_user_id": discord_user_id},
+        [{"$set": {
+            "filters.no_fee": {"$not": "$filters.no_fee"},
+            "updated_at": datetime.now(timezone.utc),
+        }}],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
     )
-    return result.matched_count > 0
+    _cache_user(discord_user_id, doc)
+    return copy.deepcopy(doc)
 
 
 def set_user_subscribed(discord_user_id: str, subscribed: bool) -> bool:
@@ -168,10 +253,17 @@ def set_user_subscribed(discord_user_id: str, subscribed: bool) -> bool:
 
 
 def get_all_subscribed_users() -> list[dict]:
-    """Get all users with subscribed=True."""
+    """Get all users with subscribed=True.
+
+    Neighborhood slugs are interned so the matcher's slug lookups hit the
+    interned keys in models by identity.
+    """
     users = []
     for doc in _user_col().find({"subscribed": True}):
         doc.pop("_id", None)
+        filters = doc.get("filters")
+        if filters and filters.get("neighborhoods"):
+            filters["neighborhoods"] = [sys.intern(s) for s in filters["neighborhoods"]]
         users.append(doc)
     return users
 
@@ -188,6 +280,7 @@ def get_all_users() -> list[dict]:
 def delete_user(discord_user_id: str) -> bool:
     """Permanently delete a user. Returns True if user existed."""
     result = _user_col().delete_one({"discord_user_id": discord_user_id})
+    _cache_user(discord_user_id, None)
     return result.deleted_count > 0
 
 
@@ -209,6 +302,31 @@ def was_notification_sent(discord_user_id: str, listing_url: str,
     }) is not None
 
 
+def get_sent_notifications(discord_user_ids: list[str], listing_urls: list[str],
+                           notification_type: str) -> set[tuple[str, str]]:
+    """Return the (discord_user_id, listing_url) pairs already notified, in one query."""
+    if not discord_user_ids or not listing_urls:
+        return set()
+    cursor = _notif_col().find(
+        {
+            "discord_user_id": {"$in": list(discord_user_ids)},
+            "listing_url": {"$in": list(listing_urls)},
+            "notification_type": notification_type,
+        },
+        {"_id": 0, "discord_user_id": 1, "listing_url": 1},
+    )
+    return {(doc["discord_user_id"], doc["listing_url"]) for doc in cursor}
+
+
+def get_sent_user_ids_for(notification_type: str, listing_url: str) -> set[str]:
+    """Return the users already sent this notification for `listing_url`, in one query."""
+    cursor = _notif_col().find(
+        {"listing_url": listing_url, "notification_type": notification_type},
+        {"_id": 0, "discord_user_id": 1},
+    )
+    return {doc["discord_user_id"] for doc in cursor}
+
+
 def log_notification(discord_user_id: str, listing_url: str,
                      notification_type: str, success: bool) -> None:
     """Log a sent notification for deduplication."""
@@ -219,3 +337,23 @@ def log_notification(discord_user_id: str, listing_url: str,
         "sent_at": datetime.now(timezone.utc),
         "success": success,
     })
+
+
+def log_notifications(notifications: list[tuple[str, str, str, bool]]) -> None:
+    """Log a batch of (discord_user_id, listing_url, notification_type, success) in one write."""
+    if not notifications:
+        return
+    sent_at = datetime.now(timezone.utc)
+    _notif_col().insert_many(
+        [
+            {
+                "discord_user_id": discord_user_id,
+                "listing_url": listing_url,
+                "notification_type": notification_type,
+                "sent_at": sent_at,
+                "success": success,
+            }
+            for discord_user_id, listing_url, notification_type, success in notifications
+        ],
+        ordered=False,
+    )
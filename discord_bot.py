@@ -9,8 +9,11 @@ Slash commands:
   /setup       — Post the welcome panel in a channel
 """
 
+import asyncio
+import functools
 import logging
 import os
+from typing import NamedTuple
 
 import discord
 from discord import app_commands
@@ -35,10 +38,21 @@ intents = discord.Intents.default()
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 
+async def _db(func, *args):
+    """Run a blocking db_module call in a worker thread.
+
+    pymongo is synchronous; calling it directly from a handler would stall the
+    event loop (and every other user's interaction) for the whole round trip.
+    Handlers defer their interaction before the first call, since Discord
+    rejects an initial response sent more than 3 seconds after the click.
+    """
+    return await asyncio.to_thread(func, *args)
+
+
 @bot.event
 async def on_ready():
     # Register persistent view so welcome panel buttons survive restarts
-    bot.add_view(WelcomeView())
+    bot.add_view(_get_welcome_view())
 
     log.info("Bot ready as %s (ID: %s)", bot.user, bot.user.id)
     try:
@@ -49,7 +63,7 @@ async def on_ready():
 
     # Ensure MongoDB indexes
     try:
-        db_module.ensure_indexes()
+        await _db(db_module.ensure_indexes)
         log.info("MongoDB indexes ensured")
     except Exception as e:
         log.error("Failed to ensure MongoDB indexes: %s", e)
@@ -59,21 +73,65 @@ async def on_ready():
 # Helper: build settings embed showing current filter values
 # ---------------------------------------------------------------------------
 
-def _build_settings_embed(user: dict, message: str | None = None) -> discord.Embed:
-    """Build a settings embed with the user's current filter summary."""
-    filters = user.get("filters", {})
+def _fmt_hoods(hoods, empty: str = "All neighborhoods") -> str:
+    """Comma-joined display names for neighborhood slugs, or `empty` when there are none."""
+    # A list, not a generator: str.join materializes a generator into a sequence first
+    return ", ".join([VALID_NEIGHBORHOODS.get(h, h) for h in hoods]) if hoods else empty
+
+
+def _fmt_price_range(min_p: int, max_p: int) -> str:
+    """Display string for a min/max price filter."""
+    # A max of 0 disables the price filter entirely (min included), see listing_matches_user
+    if max_p <= 0:
+        return "No limit"
+    max_s = f"${max_p:,}"
+    return f"${min_p:,} – {max_s}" if min_p > 0 else f"Up to {max_s}"
+
+
+class FilterSummary(NamedTuple):
+    """Display strings for the filter fields shared by the settings and status embeds."""
+    hoods: str
+    price: str
+    beds: str
+    no_fee: str
 
-    hoods = filters.get("neighborhoods", [])
-    hood_display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in hoods) if hoods else "All neighborhoods"
 
-    max_p = filters.get("max_price", 0)
-    min_p = filters.get("min_price", 0)
-    price_display = f"${min_p:,} – ${max_p:,}" if min_p else f"Up to ${max_p:,}" if max_p else "No limit"
+@functools.lru_cache(maxsize=4096)
+def _render_settings_fields(neighborhoods: tuple[str, ...], min_p: int, max_p: int,
+                            beds: tuple[str, ...], no_fee: bool) -> FilterSummary:
+    """Return the display strings for a filter set.
 
-    beds = filters.get("bed_rooms", [])
+    Memoized so re-rendering an unchanged filter set skips the joins and formatting.
+    """
+    hood_display = _fmt_hoods(neighborhoods)
     bed_display = ", ".join(b.title() for b in beds) if beds else "Any"
+    return FilterSummary(hood_display, _fmt_price_range(min_p, max_p), bed_display, "Yes" if no_fee else "No")
+
+
+def _summarize_filters(filters: dict) -> FilterSummary:
+    """_render_settings_fields for a user's `filters` sub-document."""
+    return _render_settings_fields(
+        tuple(filters.get("neighborhoods", [])),
+        filters.get("min_price", 0) or 0,
+        filters.get("max_price", 0) or 0,
+        tuple(filters.get("bed_rooms", [])),
+        bool(filters.get("no_fee")),
+    )
+
+
+def _add_filter_fields(embed: discord.Embed, summary: FilterSummary) -> None:
+    """Add the Neighborhoods / Price Range / Bed Types / No-Fee Only fields."""
+    embed.add_field(name="Neighborhoods", value=summary.hoods, inline=False)
+    embed.add_field(name="Price Range", value=summary.price, inline=True)
+    embed.add_field(name="Bed Types", value=summary.beds, inline=True)
+    embed.add_field(name="No-Fee Only", value=summary.no_fee, inline=True)
+
+
+def _build_settings_embed(user: dict, message: str | None = None) -> discord.Embed:
+    """Build a settings embed with the user's current filter summary."""
+    filters = user.get("filters", {})
 
-    no_fee = "Yes" if filters.get("no_fee") else "No"
+    summary = _summarize_filters(filters)
 
     geo = filters.get("geo_bounds")
     if geo and geo.get("west_longitude") is not None:
@@ -81,7 +139,7 @@ def _build_settings_embed(user: dict, message: str | None = None) -> discord.Emb
         east_ave = geo.get("east_avenue") or avenue_for_longitude(geo["east_longitude"]) or str(geo["east_longitude"])
         apply_to = geo.get("apply_to", [])
         if apply_to:
-            hood_names = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in apply_to)
+            hood_names = _fmt_hoods(apply_to)
             geo_display = f"{west_ave} → {east_ave} ({hood_names} only)"
         else:
             geo_display = f"{west_ave} → {east_ave} (all neighborhoods)"
@@ -92,10 +150,7 @@ def _build_settings_embed(user: dict, message: str | None = None) -> discord.Emb
     description += "Use the buttons below to configure your filters."
 
     embed = discord.Embed(title="Settings", description=description, color=0x3498DB)
-    embed.add_field(name="Neighborhoods", value=hood_display, inline=False)
-    embed.add_field(name="Price Range", value=price_display, inline=True)
-    embed.add_field(name="Bed Types", value=bed_display, inline=True)
-    embed.add_field(name="No-Fee Only", value=no_fee, inline=True)
+    _add_filter_fields(embed, summary)
     embed.add_field(name="Geo Filter", value=geo_display, inline=True)
 
     subway_prefs = filters.get("subway_preferences")
@@ -129,23 +184,24 @@ class WelcomeView(discord.ui.View):
         user_id = str(interaction.user.id)
         username = str(interaction.user)
 
-        existing = db_module.get_user(user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        existing = await _db(db_module.get_user, user_id)
         if existing and existing.get("subscribed"):
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "You're already subscribed! Click **Settings** to adjust your filters.",
                 ephemeral=True,
             )
             return
 
         if existing:
-            db_module.set_user_subscribed(user_id, True)
-            await interaction.response.send_message(
+            await _db(db_module.set_user_subscribed, user_id, True)
+            await interaction.followup.send(
                 "Welcome back! Your previous preferences have been restored.",
                 ephemeral=True,
             )
             return
 
-        db_module.create_user(user_id, username)
+        await _db(db_module.create_user, user_id, username)
         embed = discord.Embed(
             title="You're subscribed!",
             description=(
@@ -156,47 +212,39 @@ class WelcomeView(discord.ui.View):
             ),
             color=0x2ECC71,
         )
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     @discord.ui.button(label="Settings", style=discord.ButtonStyle.primary,
                        emoji="⚙️", custom_id="welcome:settings")
     async def settings_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
-        user = db_module.get_user(user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        user = await _db(db_module.get_user, user_id)
 
         if not user:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "Click **Subscribe** first to get started!", ephemeral=True,
             )
             return
 
         view = SettingsView(user_id)
         embed = _build_settings_embed(user)
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
 
     @discord.ui.button(label="My Status", style=discord.ButtonStyle.secondary,
                        emoji="📊", custom_id="welcome:status")
     async def status_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
-        user = db_module.get_user(user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        user = await _db(db_module.get_user, user_id)
 
         if not user:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "Click **Subscribe** first to get started!", ephemeral=True,
             )
             return
 
-        filters = user.get("filters", {})
-
-        hoods = filters.get("neighborhoods", [])
-        hood_display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in hoods) if hoods else "All neighborhoods"
-
-        max_p = filters.get("max_price", 0)
-        min_p = filters.get("min_price", 0)
-        price_display = f"${min_p:,} – ${max_p:,}" if min_p else f"Up to ${max_p:,}" if max_p else "No limit"
-
-        beds = filters.get("bed_rooms", [])
-        bed_display = ", ".join(b.title() for b in beds) if beds else "Any"
+        summary = _summarize_filters(user.get("filters", {}))
 
         subscribed = user.get("subscribed", False)
 
@@ -204,27 +252,25 @@ class WelcomeView(discord.ui.View):
             title=f"Your Status — {'Active' if subscribed else 'Paused'}",
             color=0x2ECC71 if subscribed else 0x95A5A6,
         )
-        embed.add_field(name="Neighborhoods", value=hood_display, inline=False)
-        embed.add_field(name="Price Range", value=price_display, inline=True)
-        embed.add_field(name="Bed Types", value=bed_display, inline=True)
-        embed.add_field(name="No-Fee Only", value="Yes" if filters.get("no_fee") else "No", inline=True)
+        _add_filter_fields(embed, summary)
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     @discord.ui.button(label="Unsubscribe", style=discord.ButtonStyle.danger,
                        emoji="🔕", custom_id="welcome:unsubscribe")
     async def unsubscribe_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = str(interaction.user.id)
-        existing = db_module.get_user(user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        existing = await _db(db_module.get_user, user_id)
 
         if not existing or not existing.get("subscribed"):
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "You're not currently subscribed.", ephemeral=True,
             )
             return
 
-        db_module.set_user_subscribed(user_id, False)
-        await interaction.response.send_message(
+        await _db(db_module.set_user_subscribed, user_id, False)
+        await interaction.followup.send(
             "Notifications paused. Click **Subscribe** to resume anytime.",
             ephemeral=True,
         )
@@ -249,6 +295,23 @@ def _build_welcome_embed() -> discord.Embed:
     )
 
 
+# The welcome panel never changes: one embed and one persistent view serve
+# every /setup and the restart registration in on_ready
+_WELCOME_EMBED = _build_welcome_embed()
+_welcome_view: WelcomeView | None = None
+
+
+def _get_welcome_view() -> WelcomeView:
+    """Return the shared WelcomeView, creating it on first use.
+
+    Views need a running event loop, so it can't be built at import time.
+    """
+    global _welcome_view
+    if _welcome_view is None:
+        _welcome_view = WelcomeView()
+    return _welcome_view
+
+
 @bot.tree.command(name="setup", description="Post the welcome panel in this channel")
 async def setup_command(interaction: discord.Interaction):
     # Delete any existing welcome panels from the bot in this channel
@@ -259,9 +322,7 @@ async def setup_command(interaction: discord.Interaction):
                     await msg.delete()
                     break
 
-    embed = _build_welcome_embed()
-    view = WelcomeView()
-    await interaction.channel.send(embed=embed, view=view)
+    await interaction.channel.send(embed=_WELCOME_EMBED, view=_get_welcome_view())
     await interaction.response.send_message("Welcome panel posted!", ephemeral=True)
 
 
@@ -274,9 +335,10 @@ async def subscribe(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
     username = str(interaction.user)
 
-    existing = db_module.get_user(user_id)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    existing = await _db(db_module.get_user, user_id)
     if existing and existing.get("subscribed"):
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "You're already subscribed! Use `/settings` to adjust your filters.",
             ephemeral=True,
         )
@@ -284,8 +346,8 @@ async def subscribe(interaction: discord.Interaction):
 
     if existing:
         # Re-subscribe (was previously unsubscribed)
-        db_module.set_user_subscribed(user_id, True)
-        await interaction.response.send_message(
+        await _db(db_module.set_user_subscribed, user_id, True)
+        await interaction.followup.send(
             "Welcome back! Your previous preferences have been restored.\n"
             "Use `/settings` to adjust your filters or `/status` to view them.",
             ephemeral=True,
@@ -293,7 +355,7 @@ async def subscribe(interaction: discord.Interaction):
         return
 
     # New user
-    db_module.create_user(user_id, username)
+    await _db(db_module.create_user, user_id, username)
     embed = discord.Embed(
         title="Welcome to NYC Apartment Tracker!",
         description=(
@@ -306,7 +368,7 @@ async def subscribe(interaction: discord.Interaction):
         ),
         color=0x2ECC71,
     )
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
 
 # ---------------------------------------------------------------------------
@@ -316,24 +378,25 @@ async def subscribe(interaction: discord.Interaction):
 @bot.tree.command(name="unsubscribe", description="Pause apartment notifications")
 async def unsubscribe(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    existing = db_module.get_user(user_id)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    existing = await _db(db_module.get_user, user_id)
 
     if not existing:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "You're not subscribed. Use `/subscribe` to get started!",
             ephemeral=True,
         )
         return
 
     if not existing.get("subscribed"):
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "You're already unsubscribed. Use `/subscribe` to re-enable notifications.",
             ephemeral=True,
         )
         return
 
-    db_module.set_user_subscribed(user_id, False)
-    await interaction.response.send_message(
+    await _db(db_module.set_user_subscribed, user_id, False)
+    await interaction.followup.send(
         "Notifications paused. Your preferences are saved — use `/subscribe` to resume anytime.",
         ephemeral=True,
     )
@@ -346,10 +409,11 @@ async def unsubscribe(interaction: discord.Interaction):
 @bot.tree.command(name="status", description="View your current filter settings")
 async def status(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    user = db_module.get_user(user_id)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    user = await _db(db_module.get_user, user_id)
 
     if not user:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "You're not subscribed. Use `/subscribe` to get started!",
             ephemeral=True,
         )
@@ -358,27 +422,7 @@ async def status(interaction: discord.Interaction):
     filters = user.get("filters", {})
     notif = user.get("notification_settings", {})
 
-    # Neighborhoods
-    hoods = filters.get("neighborhoods", [])
-    if hoods:
-        hood_display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in hoods)
-    else:
-        hood_display = "All neighborhoods"
-
-    # Price
-    min_p = filters.get("min_price", 0)
-    max_p = filters.get("max_price", 0)
-    if max_p > 0:
-        price_display = f"${min_p:,} – ${max_p:,}" if min_p else f"Up to ${max_p:,}"
-    else:
-        price_display = "No limit"
-
-    # Beds
-    beds = filters.get("bed_rooms", [])
-    bed_display = ", ".join(b.title() for b in beds) if beds else "Any"
-
-    # No-fee
-    no_fee = "Yes" if filters.get("no_fee") else "No"
+    summary = _summarize_filters(filters)
 
     # Notifications
     notif_types = []
@@ -397,13 +441,10 @@ async def status(interaction: discord.Interaction):
         title=f"Your Settings — {status_icon}",
         color=0x2ECC71 if subscribed else 0x95A5A6,
     )
-    embed.add_field(name="Neighborhoods", value=hood_display, inline=False)
-    embed.add_field(name="Price Range", value=price_display, inline=True)
-    embed.add_field(name="Bed Types", value=bed_display, inline=True)
-    embed.add_field(name="No-Fee Only", value=no_fee, inline=True)
+    _add_filter_fields(embed, summary)
     embed.add_field(name="Notifications", value=notif_display, inline=False)
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
 
 # ---------------------------------------------------------------------------
@@ -413,10 +454,11 @@ async def status(interaction: discord.Interaction):
 @bot.tree.command(name="settings", description="Configure your apartment search filters")
 async def settings(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
-    user = db_module.get_user(user_id)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    user = await _db(db_module.get_user, user_id)
 
     if not user:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "You need to `/subscribe` first!",
             ephemeral=True,
         )
@@ -424,7 +466,7 @@ async def settings(interaction: discord.Interaction):
 
     view = SettingsView(user_id)
     embed = _build_settings_embed(user)
-    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
 
 
 class SettingsView(discord.ui.View):
@@ -436,11 +478,12 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="Neighborhoods", style=discord.ButtonStyle.primary, emoji="📍")
     async def neighborhoods_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = NeighborhoodSelectView(self.user_id, user)
         hoods = user.get("filters", {}).get("neighborhoods", [])
-        hood_display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in hoods) if hoods else "None selected"
-        await interaction.response.edit_message(
+        hood_display = _fmt_hoods(hoods, "None selected")
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Select Neighborhoods",
                 description=f"**Current:** {hood_display}\n\nSelect from the dropdowns below, then click **Back to Settings**.",
@@ -451,17 +494,18 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="Price Range", style=discord.ButtonStyle.primary, emoji="💰")
     async def price_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        user = await _db(db_module.get_user, self.user_id)
         modal = PriceRangeModal(self.user_id, user)
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="Bed Types", style=discord.ButtonStyle.primary, emoji="🛏️")
     async def beds_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = BedTypeSelectView(self.user_id, user)
         beds = user.get("filters", {}).get("bed_rooms", [])
         bed_display = ", ".join(b.title() for b in beds) if beds else "Any"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Select Bed Types",
                 description=f"**Current:** {bed_display}\n\nChoose which apartment sizes to include, then click **Back to Settings**.",
@@ -472,19 +516,18 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="No-Fee Toggle", style=discord.ButtonStyle.secondary, emoji="💵")
     async def no_fee_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
-        filters = user.get("filters", {})
-        new_val = not filters.get("no_fee", False)
-        db_module.update_user(self.user_id, {"filters.no_fee": new_val})
-        # Re-fetch and redisplay settings in the same message
-        user = db_module.get_user(self.user_id)
+        # Flip and read back in one round trip, then redisplay in the same message
+        await interaction.response.defer()
+        user = await _db(db_module.toggle_no_fee, self.user_id)
+        new_val = user.get("filters", {}).get("no_fee", False)
         status = "ON — no-fee only" if new_val else "OFF — all listings"
         embed = _build_settings_embed(user, message=f"No-fee filter: **{status}**")
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.edit_original_response(embed=embed, view=self)
 
     @discord.ui.button(label="Notifications", style=discord.ButtonStyle.secondary, emoji="🔔")
     async def notif_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = NotificationToggleView(self.user_id, user)
         notif = user.get("notification_settings", {})
         items = []
@@ -495,7 +538,7 @@ class SettingsView(discord.ui.View):
         if notif.get("daily_digest", True):
             items.append("Daily digest")
         current = ", ".join(items) if items else "None"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Notification Settings",
                 description=f"**Current:** {current}\n\nToggle which types of notifications you receive.",
@@ -506,7 +549,8 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="Subway Prefs", style=discord.ButtonStyle.secondary, emoji="🚇", row=1)
     async def subway_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = SubwayPrefsView(self.user_id, user)
         subway_prefs = user.get("filters", {}).get("subway_preferences") or {}
         hoods = user.get("filters", {}).get("neighborhoods", [])
@@ -519,7 +563,7 @@ class SettingsView(discord.ui.View):
             current = "**Current:** " + ", ".join(lines)
         else:
             current = "**Current:** Off (using global defaults)"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Subway Station Preferences",
                 description=f"{current}\n\n"
@@ -532,18 +576,19 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="Geo Filter", style=discord.ButtonStyle.secondary, emoji="🗺️", row=1)
     async def geo_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = GeoFilterView(self.user_id, user)
         geo = user.get("filters", {}).get("geo_bounds")
         if geo and geo.get("west_longitude") is not None:
             west_ave = geo.get("west_avenue") or avenue_for_longitude(geo["west_longitude"]) or "?"
             east_ave = geo.get("east_avenue") or avenue_for_longitude(geo["east_longitude"]) or "?"
             apply_to = geo.get("apply_to", [])
-            hood_names = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in apply_to) if apply_to else "all"
+            hood_names = _fmt_hoods(apply_to, "all")
             current = f"**Current:** {west_ave} → {east_ave} (applies to: {hood_names})"
         else:
             current = "**Current:** Off (no geo filter set)"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Geo Filter — Longitude Bounds",
                 description=f"{current}\n\n"
@@ -557,70 +602,72 @@ class SettingsView(discord.ui.View):
 
     @discord.ui.button(label="Done", style=discord.ButtonStyle.success, emoji="✅", row=1)
     async def done_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
-        filters = user.get("filters", {})
-
-        hoods = filters.get("neighborhoods", [])
-        hood_display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in hoods) if hoods else "All neighborhoods"
-        max_p = filters.get("max_price", 0)
-        min_p = filters.get("min_price", 0)
-        price_display = f"${min_p:,} – ${max_p:,}" if min_p else f"Up to ${max_p:,}" if max_p else "No limit"
-        beds = filters.get("bed_rooms", [])
-        bed_display = ", ".join(b.title() for b in beds) if beds else "Any"
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
+        summary = _summarize_filters(user.get("filters", {}))
 
         embed = discord.Embed(
             title="Settings Saved!",
             description="Your filters have been updated. You'll receive notifications matching these criteria.",
             color=0x2ECC71,
         )
-        embed.add_field(name="Neighborhoods", value=hood_display, inline=False)
-        embed.add_field(name="Price Range", value=price_display, inline=True)
-        embed.add_field(name="Bed Types", value=bed_display, inline=True)
-        embed.add_field(name="No-Fee Only", value="Yes" if filters.get("no_fee") else "No", inline=True)
+        _add_filter_fields(embed, summary)
 
         # Remove all buttons — settings panel is closed
-        await interaction.response.edit_message(embed=embed, view=None)
+        await interaction.edit_original_response(embed=embed, view=None)
 
 
 # ---------------------------------------------------------------------------
 # Neighborhood selection (grouped by borough, Discord 25-option limit)
 # ---------------------------------------------------------------------------
 
-# Group neighborhoods by area for select menus
-_MANHATTAN_HOODS = {k: v for k, v in VALID_NEIGHBORHOODS.items() if k in {
+# Group neighborhoods by area for select menus. Each group is built once, in
+# display-name order, so select menus don't re-sort on every view.
+_HOODS_BY_DISPLAY = sorted(VALID_NEIGHBORHOODS.items(), key=lambda x: x[1])
+_MANHATTAN_HOODS = {k: v for k, v in _HOODS_BY_DISPLAY if k in {
     "battery-park-city", "carnegie-hill", "chelsea", "chinatown", "civic-center",
     "east-village", "financial-district", "flatiron", "fulton-seaport", "gramercy-park",
     "greenwich-village", "hells-kitchen", "hudson-yards", "kips-bay", "lenox-hill",
     "les", "little-italy", "manhattan-valley", "midtown", "midtown-east",
     "midtown-south", "midtown-west", "murray-hill", "noho", "nolita",
 }}
-_MANHATTAN_HOODS_2 = {k: v for k, v in VALID_NEIGHBORHOODS.items() if k in {
+_MANHATTAN_HOODS_2 = {k: v for k, v in _HOODS_BY_DISPLAY if k in {
     "nomad", "soho", "stuyvesant-town", "tribeca", "two-bridges",
     "upper-east-side", "upper-west-side", "west-village", "yorkville",
 }}
-_BROOKLYN_HOODS = {k: v for k, v in VALID_NEIGHBORHOODS.items() if k in {
+_BROOKLYN_HOODS = {k: v for k, v in _HOODS_BY_DISPLAY if k in {
     "bay-ridge", "bed-stuy", "boerum-hill", "brooklyn-heights", "bushwick",
     "carroll-gardens", "clinton-hill", "cobble-hill", "crown-heights",
     "downtown-brooklyn", "dumbo", "flatbush", "fort-greene", "gowanus",
     "greenpoint", "kensington", "park-slope", "prospect-heights",
     "red-hook", "sunset-park", "williamsburg", "windsor-terrace",
 }}
-_QUEENS_UPTOWN = {k: v for k, v in VALID_NEIGHBORHOODS.items() if k in {
+_QUEENS_UPTOWN = {k: v for k, v in _HOODS_BY_DISPLAY if k in {
     "astoria", "flushing", "forest-hills", "jackson-heights",
     "long-island-city", "ridgewood", "sunnyside", "woodside",
     "east-harlem", "hamilton-heights", "harlem", "inwood",
     "morningside-heights", "washington-heights",
 }}
 
+# Select-menu group for each slug, to split a user's selection in one pass
+_SLUG_TO_GROUP = {
+    slug: group
+    for group, hoods in (
+        ("manhattan", _MANHATTAN_HOODS),
+        ("manhattan2", _MANHATTAN_HOODS_2),
+        ("brooklyn", _BROOKLYN_HOODS),
+        ("queens", _QUEENS_UPTOWN),
+    )
+    for slug in hoods
+}
+
 
 def _make_hood_select(hoods: dict[str, str], current: list[str], placeholder: str) -> discord.ui.Select:
-    options = []
-    for slug, display in sorted(hoods.items(), key=lambda x: x[1]):
-        options.append(discord.SelectOption(
-            label=display,
-            value=slug,
-            default=slug in current,
-        ))
+    selected = frozenset(current)
+    options = [
+        discord.SelectOption(label=display, value=slug, default=slug in selected)
+        for slug, display in hoods.items()
+    ]
     select = discord.ui.Select(
         placeholder=placeholder,
         min_values=0,
@@ -657,11 +704,12 @@ class NeighborhoodSelectView(discord.ui.View):
         self.add_item(self.queens_select)
 
         self._selections: dict[str, list[str]] = {
-            "manhattan": [s for s in current if s in _MANHATTAN_HOODS],
-            "manhattan2": [s for s in current if s in _MANHATTAN_HOODS_2],
-            "brooklyn": [s for s in current if s in _BROOKLYN_HOODS],
-            "queens": [s for s in current if s in _QUEENS_UPTOWN],
+            "manhattan": [], "manhattan2": [], "brooklyn": [], "queens": [],
         }
+        for slug in current:
+            group = _SLUG_TO_GROUP.get(slug)
+            if group:
+                self._selections[group].append(slug)
 
     def _make_callback(self, group: str):
         async def callback(interaction: discord.Interaction):
@@ -671,7 +719,8 @@ class NeighborhoodSelectView(discord.ui.View):
                 "brooklyn": self.brooklyn_select,
                 "queens": self.queens_select,
             }
-            self._selections[group] = select_map[group].values
+            select = select_map[group]
+            self._selections[group] = select.values
 
             # Combine all selections
             all_hoods = []
@@ -679,35 +728,42 @@ class NeighborhoodSelectView(discord.ui.View):
                 all_hoods.extend(vals)
 
             user_id = str(interaction.user.id)
-            db_module.update_user(user_id, {"filters.neighborhoods": all_hoods})
+            await interaction.response.defer()
+            await _db(db_module.update_user, user_id, {"filters.neighborhoods": all_hoods})
 
-            # Rebuild view so dropdown defaults reflect the new selections
-            user = db_module.get_user(self.user_id)
-            new_view = NeighborhoodSelectView(self.user_id, user)
+            # Only this dropdown's selection changed; update its defaults in place
+            selected = frozenset(select.values)
+            for opt in select.options:
+                opt.default = opt.value in selected
 
-            display = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in all_hoods) or "None selected"
-            await interaction.response.edit_message(
+            display = _fmt_hoods(all_hoods, "None selected")
+            await interaction.edit_original_response(
                 embed=discord.Embed(
                     title="Select Neighborhoods",
                     description=f"**Current:** {display}\n\nSelect from the dropdowns below, then click **Back to Settings**.",
                     color=0x3498DB,
                 ),
-                view=new_view,
+                view=self,
             )
         return callback
 
     @discord.ui.button(label="← Back to Settings", style=discord.ButtonStyle.secondary, row=4)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user)
         view = SettingsView(self.user_id)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await interaction.edit_original_response(embed=embed, view=view)
 
 
 # ---------------------------------------------------------------------------
 # Price range modal
 # ---------------------------------------------------------------------------
 
+# Upper bound for either price input; anything above is a typo, not a budget
+MAX_PRICE_INPUT = 100_000
+
+
 class PriceRangeModal(discord.ui.Modal, title="Set Price Range"):
     def __init__(self, user_id: str, user: dict):
         super().__init__()
@@ -740,18 +796,25 @@ class PriceRangeModal(discord.ui.Modal, title="Set Price Range"):
             )
             return
 
+        if not (0 <= min_p <= MAX_PRICE_INPUT and 0 <= max_p <= MAX_PRICE_INPUT):
+            await interaction.response.send_message(
+                f"Prices must be between $0 and ${MAX_PRICE_INPUT:,}.", ephemeral=True,
+            )
+            return
+
         if max_p > 0 and min_p > max_p:
             await interaction.response.send_message(
                 "Minimum price cannot be greater than maximum price.", ephemeral=True,
             )
             return
 
-        db_module.update_user(self.user_id, {
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await _db(db_module.update_user, self.user_id, {
             "filters.min_price": min_p,
             "filters.max_price": max_p,
         })
-        price_str = f"${min_p:,} – ${max_p:,}" if min_p else f"Up to ${max_p:,}"
-        await interaction.response.send_message(
+        price_str = _fmt_price_range(min_p, max_p)
+        await interaction.followup.send(
             f"Price range updated: **{price_str}**\n"
             "The settings panel above reflects your changes.",
             ephemeral=True,
@@ -883,56 +946,57 @@ class GeoFilterView(discord.ui.View):
             "east_avenue": east_ave,
             "apply_to": apply_to,
         }
-        db_module.update_user(self.user_id, {"filters.geo_bounds": geo_data})
+        await interaction.response.defer()
+        await _db(db_module.update_user, self.user_id, {"filters.geo_bounds": geo_data})
 
         if apply_to:
-            hood_names = ", ".join(VALID_NEIGHBORHOODS.get(h, h) for h in apply_to)
+            hood_names = _fmt_hoods(apply_to)
             scope = f"Applies to: **{hood_names}** only"
         else:
             scope = "Applies to: **all neighborhoods**"
 
-        user = db_module.get_user(self.user_id)
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user, f"Geo filter saved: **{west_ave} → {east_ave}**\n{scope}")
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
     @discord.ui.button(label="Clear Geo Filter", style=discord.ButtonStyle.danger, emoji="🗑️", row=3)
     async def clear_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        db_module.update_user(self.user_id, {"filters.geo_bounds": None})
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        await _db(db_module.update_user, self.user_id, {"filters.geo_bounds": None})
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user, "Geo filter **removed** — all longitudes allowed.")
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
     @discord.ui.button(label="Back to Settings", style=discord.ButtonStyle.secondary, row=4)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user)
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
 
 # ---------------------------------------------------------------------------
 # Bed type selection
 # ---------------------------------------------------------------------------
 
-BED_OPTIONS = [
-    discord.SelectOption(label="Studio", value="studio"),
-    discord.SelectOption(label="1 Bedroom", value="1"),
-    discord.SelectOption(label="2 Bedrooms", value="2"),
-    discord.SelectOption(label="3+ Bedrooms", value="3"),
-]
+# (label, value) pairs; each view builds its own SelectOptions so it can set default=
+_BED_LABEL_VALUE = (
+    ("Studio", "studio"),
+    ("1 Bedroom", "1"),
+    ("2 Bedrooms", "2"),
+    ("3+ Bedrooms", "3"),
+)
 
 
 class BedTypeSelectView(discord.ui.View):
     def __init__(self, user_id: str, user: dict):
         super().__init__(timeout=300)
         self.user_id = user_id
-        current = user.get("filters", {}).get("bed_rooms", [])
-        options = []
-        for opt in BED_OPTIONS:
-            options.append(discord.SelectOption(
-                label=opt.label,
-                value=opt.value,
-                default=opt.value in current,
-            ))
+        current = frozenset(user.get("filters", {}).get("bed_rooms", []))
+        options = [
+            discord.SelectOption(label=label, value=value, default=value in current)
+            for label, value in _BED_LABEL_VALUE
+        ]
         self.select = discord.ui.Select(
             placeholder="Select bed types",
             min_values=0,
@@ -945,28 +1009,31 @@ class BedTypeSelectView(discord.ui.View):
     async def on_select(self, interaction: discord.Interaction):
         selected = self.select.values
         user_id = str(interaction.user.id)
-        db_module.update_user(user_id, {"filters.bed_rooms": selected})
+        await interaction.response.defer()
+        await _db(db_module.update_user, user_id, {"filters.bed_rooms": selected})
 
-        # Rebuild view so dropdown defaults reflect the new selections
-        user = db_module.get_user(self.user_id)
-        new_view = BedTypeSelectView(self.user_id, user)
+        # Update dropdown defaults in place to reflect the new selections
+        current = frozenset(selected)
+        for opt in self.select.options:
+            opt.default = opt.value in current
 
         display = ", ".join(s.title() for s in selected) if selected else "Any"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Select Bed Types",
                 description=f"**Current:** {display}\n\nChoose which apartment sizes to include, then click **Back to Settings**.",
                 color=0x3498DB,
             ),
-            view=new_view,
+            view=self,
         )
 
     @discord.ui.button(label="← Back to Settings", style=discord.ButtonStyle.secondary)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user)
         view = SettingsView(self.user_id)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await interaction.edit_original_response(embed=embed, view=view)
 
 
 # ---------------------------------------------------------------------------
@@ -977,6 +1044,8 @@ class NotificationToggleView(discord.ui.View):
     def __init__(self, user_id: str, user: dict):
         super().__init__(timeout=300)
         self.user_id = user_id
+        # The user as of this view's last render, reused by Back to Settings
+        self.user = user
         notif = user.get("notification_settings", {})
 
         self.new_listings_btn = discord.ui.Button(
@@ -1005,15 +1074,16 @@ class NotificationToggleView(discord.ui.View):
 
     def _make_toggle(self, setting: str):
         async def callback(interaction: discord.Interaction):
-            user = db_module.get_user(self.user_id)
-            notif = user.get("notification_settings", {})
+            await interaction.response.defer()
+            user = await _db(db_module.get_user, self.user_id)
+            notif = user.setdefault("notification_settings", {})
             new_val = not notif.get(setting, True)
-            db_module.update_user(self.user_id, {f"notification_settings.{setting}": new_val})
+            await _db(db_module.update_user, self.user_id, {f"notification_settings.{setting}": new_val})
+            # Apply the write locally rather than reading the user back
+            notif[setting] = new_val
 
             # Rebuild the view with updated button labels/colors
-            user = db_module.get_user(self.user_id)
             new_view = NotificationToggleView(self.user_id, user)
-            notif = user.get("notification_settings", {})
             items = []
             if notif.get("new_listings", True):
                 items.append("New listings")
@@ -1022,7 +1092,7 @@ class NotificationToggleView(discord.ui.View):
             if notif.get("daily_digest", True):
                 items.append("Daily digest")
             current = ", ".join(items) if items else "None"
-            await interaction.response.edit_message(
+            await interaction.edit_original_response(
                 embed=discord.Embed(
                     title="Notification Settings",
                     description=f"**Current:** {current}\n\nToggle which types of notifications you receive.",
@@ -1034,10 +1104,10 @@ class NotificationToggleView(discord.ui.View):
 
     @discord.ui.button(label="← Back to Settings", style=discord.ButtonStyle.secondary, row=1)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
-        embed = _build_settings_embed(user)
+        await interaction.response.defer()
+        embed = _build_settings_embed(self.user)
         view = SettingsView(self.user_id)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await interaction.edit_original_response(embed=embed, view=view)
 
 
 # ---------------------------------------------------------------------------
@@ -1090,7 +1160,8 @@ class SubwayPrefsView(discord.ui.View):
             )
             return
         slug = self.hood_select.values[0]
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = SubwayStationSelectView(self.user_id, user, slug)
         hood_name = VALID_NEIGHBORHOODS.get(slug, slug)
         subway_prefs = user.get("filters", {}).get("subway_preferences") or {}
@@ -1099,7 +1170,7 @@ class SubwayPrefsView(discord.ui.View):
             current = ", ".join(p["name"] for p in existing)
         else:
             current = "None"
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title=f"Subway Stations — {hood_name}",
                 description=f"**Current:** {current}\n\n"
@@ -1111,16 +1182,18 @@ class SubwayPrefsView(discord.ui.View):
 
     @discord.ui.button(label="Clear All", style=discord.ButtonStyle.danger, emoji="🗑️", row=1)
     async def clear_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        db_module.update_user(self.user_id, {"filters.subway_preferences": None})
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        await _db(db_module.update_user, self.user_id, {"filters.subway_preferences": None})
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user, "Subway preferences **cleared** — using global defaults.")
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
     @discord.ui.button(label="Back to Settings", style=discord.ButtonStyle.secondary, row=2)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user)
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
 
 class SubwayStationSelectView(discord.ui.View):
@@ -1165,29 +1238,30 @@ class SubwayStationSelectView(discord.ui.View):
 
     @discord.ui.button(label="Save (Equal Weight)", style=discord.ButtonStyle.success, emoji="💾", row=1)
     async def save_equal_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
         if not self.station_select or not self.station_select.values:
             # Clear prefs for this neighborhood
-            user = db_module.get_user(self.user_id)
+            user = await _db(db_module.get_user, self.user_id)
             full_prefs = user.get("filters", {}).get("subway_preferences") or {}
             full_prefs.pop(self.neighborhood_slug, None)
             save_val = full_prefs if full_prefs else None
-            db_module.update_user(self.user_id, {"filters.subway_preferences": save_val})
-            user = db_module.get_user(self.user_id)
+            await _db(db_module.update_user, self.user_id, {"filters.subway_preferences": save_val})
+            user = await _db(db_module.get_user, self.user_id)
             embed = _build_settings_embed(user, f"Subway prefs cleared for **{VALID_NEIGHBORHOODS.get(self.neighborhood_slug, self.neighborhood_slug)}**.")
-            await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+            await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
             return
 
         selected = self.station_select.values
         prefs = {"preferred_stations": [{"name": n, "weight": 1.0} for n in selected]}
-        user = db_module.get_user(self.user_id)
+        user = await _db(db_module.get_user, self.user_id)
         full_prefs = user.get("filters", {}).get("subway_preferences") or {}
         full_prefs[self.neighborhood_slug] = prefs
-        db_module.update_user(self.user_id, {"filters.subway_preferences": full_prefs})
+        await _db(db_module.update_user, self.user_id, {"filters.subway_preferences": full_prefs})
 
         hood_name = VALID_NEIGHBORHOODS.get(self.neighborhood_slug, self.neighborhood_slug)
-        user = db_module.get_user(self.user_id)
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user, f"Saved **{len(selected)} station(s)** for {hood_name} (equal weight).")
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
     @discord.ui.button(label="Set Weights", style=discord.ButtonStyle.primary, emoji="⚖️", row=1)
     async def weights_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -1223,21 +1297,23 @@ class SubwayStationSelectView(discord.ui.View):
 
     @discord.ui.button(label="Remove Prefs", style=discord.ButtonStyle.danger, emoji="🗑️", row=2)
     async def remove_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         full_prefs = user.get("filters", {}).get("subway_preferences") or {}
         full_prefs.pop(self.neighborhood_slug, None)
         save_val = full_prefs if full_prefs else None
-        db_module.update_user(self.user_id, {"filters.subway_preferences": save_val})
+        await _db(db_module.update_user, self.user_id, {"filters.subway_preferences": save_val})
         hood_name = VALID_NEIGHBORHOODS.get(self.neighborhood_slug, self.neighborhood_slug)
-        user = db_module.get_user(self.user_id)
+        user = await _db(db_module.get_user, self.user_id)
         embed = _build_settings_embed(user, f"Subway prefs **removed** for {hood_name}.")
-        await interaction.response.edit_message(embed=embed, view=SettingsView(self.user_id))
+        await interaction.edit_original_response(embed=embed, view=SettingsView(self.user_id))
 
     @discord.ui.button(label="Back", style=discord.ButtonStyle.secondary, row=2)
     async def back_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer()
+        user = await _db(db_module.get_user, self.user_id)
         view = SubwayPrefsView(self.user_id, user)
-        await interaction.response.edit_message(
+        await interaction.edit_original_response(
             embed=discord.Embed(
                 title="Subway Station Preferences",
                 description="Select a neighborhood to configure preferred subway stations.",
@@ -1287,14 +1363,15 @@ class SubwayWeightModal(discord.ui.Modal, title="Set Station Weights"):
                 return
             stations.append({"name": self.station_names[i], "weight": weight})
 
-        user = db_module.get_user(self.user_id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        user = await _db(db_module.get_user, self.user_id)
         full_prefs = user.get("filters", {}).get("subway_preferences") or {}
         full_prefs[self.neighborhood_slug] = {"preferred_stations": stations}
-        db_module.update_user(self.user_id, {"filters.subway_preferences": full_prefs})
+        await _db(db_module.update_user, self.user_id, {"filters.subway_preferences": full_prefs})
 
         hood_name = VALID_NEIGHBORHOODS.get(self.neighborhood_slug, self.neighborhood_slug)
         details = ", ".join(f"{s['name']} (×{s['weight']})" for s in stations)
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f"Subway weights saved for **{hood_name}**:\n{details}\n\n"
             "The settings panel above reflects your changes.",
             ephemeral=True,
@@ -7,16 +7,24 @@ Usage:
 This is idempotent — re-running will upsert without duplicates.
 """
 
+import itertools
 import json
 import logging
 import os
 import sys
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON for seen_listings.json
+    orjson = None
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("migrate")
 
 SEEN_PATH = Path(__file__).resolve().parent / "seen_listings.json"
+SEEN_WAL_PATH = SEEN_PATH.with_suffix(".wal.jsonl")
+UPSERT_BATCH_SIZE = 1000
 
 
 def main():
@@ -29,25 +37,37 @@ def main():
         log.error("seen_listings.json not found at %s", SEEN_PATH)
         sys.exit(1)
 
-    with open(SEEN_PATH) as f:
-        data = json.load(f)
+    data = (orjson.loads if orjson is not None else json.loads)(SEEN_PATH.read_bytes())
 
     if isinstance(data, list):
         log.info("Converting old list format to dict...")
         from datetime import datetime, timezone
         data = {url: {"first_seen": datetime.now(timezone.utc).isoformat()} for url in data}
 
+    # Apply changes the tracker appended since it last rewrote seen_listings.json
+    if SEEN_WAL_PATH.exists():
+        with open(SEEN_WAL_PATH) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("deleted"):
+                    data.pop(record["url"], None)
+                else:
+                    data[record["url"]] = record["entry"]
+
     log.info("Loaded %d listings from seen_listings.json", len(data))
 
     import db as db_module
     db_module.ensure_indexes()
 
+    # One bulk_write round trip per batch instead of one upsert per listing
     count = 0
-    for url, entry in data.items():
-        db_module.upsert_seen_listing(url, entry)
-        count += 1
-        if count % 50 == 0:
-            log.info("  Migrated %d / %d listings...", count, len(data))
+    items = iter(data.items())
+    while batch := dict(itertools.islice(items, UPSERT_BATCH_SIZE)):
+        count += db_module.upsert_seen_listings(batch)
+        log.info("  Migrated %d / %d listings...", count, len(data))
 
     log.info("Migration complete: %d listings upserted to MongoDB", count)
 
@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import functools
 import re
+import sys
+from typing import Iterable, NamedTuple
+
 from apartment_tracker import NEIGHBORHOOD_ALIASES, parse_price
 
+_DIGITS_RE = re.compile(r"(\d+)")
+
 
 # ---------------------------------------------------------------------------
 # Valid neighborhoods — every StreetEasy slug we support
@@ -86,6 +92,9 @@ VALID_NEIGHBORHOODS: dict[str, str] = {
     "morningside-heights": "Morningside Heights",
     "washington-heights": "Washington Heights",
 }
+# Interned so lookups with interned slugs from Mongo (db.get_all_subscribed_users)
+# match keys by identity instead of comparing hyphenated strings.
+VALID_NEIGHBORHOODS = {sys.intern(slug): name for slug, name in VALID_NEIGHBORHOODS.items()}
 
 
 # Reverse lookup: display name -> set of slugs that cover it
@@ -107,110 +116,162 @@ def _get_slugs_for_display_name(display_name: str) -> set[str]:
     return slugs
 
 
-def listing_matches_user(listing: dict, user_prefs: dict) -> bool:
-    """Check if a listing matches a user's filter preferences.
+@functools.lru_cache(maxsize=256)
+def _accepted_neighborhood_names(slugs: tuple[str, ...]) -> frozenset[str]:
+    """Listing neighborhood names accepted by a filter on these slugs.
 
-    Args:
-        listing: Dict with keys like address, price, neighborhood, beds, latitude, longitude.
-                 `neighborhood` is the display name (e.g. "East Village").
-        user_prefs: User preferences document from MongoDB with a `filters` sub-dict.
-
-    Returns:
-        True if the listing passes all active filters.
+    A slug accepts its NEIGHBORHOOD_ALIASES entries plus its own display name
+    from VALID_NEIGHBORHOODS, so "upper-west-side" accepts "Manhattan Valley".
     """
-    filters = user_prefs.get("filters", {})
-
-    # --- Neighborhood filter ---
-    user_neighborhoods = filters.get("neighborhoods", [])
-    if user_neighborhoods:
-        listing_hood = listing.get("neighborhood", "")
-        if not listing_hood:
-            return False
-
-        # Check if listing neighborhood matches any user-subscribed slug.
-        # A listing in "Manhattan Valley" matches user subscription to "upper-west-side"
-        # because NEIGHBORHOOD_ALIASES["upper-west-side"] includes "Manhattan Valley".
-        matched = False
-        for slug in user_neighborhoods:
-            aliases = NEIGHBORHOOD_ALIASES.get(slug, set())
-            if listing_hood in aliases:
-                matched = True
-                break
-            # Also match exact display name from VALID_NEIGHBORHOODS
-            display = VALID_NEIGHBORHOODS.get(slug, "")
-            if display and listing_hood == display:
-                matched = True
-                break
-        if not matched:
-            return False
+    names: set[str] = set()
+    for slug in slugs:
+        names.update(NEIGHBORHOOD_ALIASES.get(slug, ()))
+        display = VALID_NEIGHBORHOODS.get(slug, "")
+        if display:
+            names.add(display)
+    return frozenset(names)
+
+
+# Reverse of _accepted_neighborhood_names: listing display name -> slugs that accept it
+_DISPLAY_TO_ACCEPTING_SLUGS: dict[str, frozenset[str]] = {}
+for _slug in NEIGHBORHOOD_ALIASES.keys() | VALID_NEIGHBORHOODS.keys():
+    for _name in _accepted_neighborhood_names.__wrapped__((_slug,)):
+        _name = sys.intern(_name)
+        _DISPLAY_TO_ACCEPTING_SLUGS[_name] = _DISPLAY_TO_ACCEPTING_SLUGS.get(_name, frozenset()) | {sys.intern(_slug)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_user_bed_filters(user_beds: tuple[str, ...]) -> tuple[bool, frozenset[str]]:
+    """Split a bed_rooms filter into (wants studio, bedroom counts as digit strings)."""
+    wants_studio = False
+    nums = set()
+    for bed_type in user_beds:
+        if bed_type.lower() == "studio":
+            wants_studio = True
+        bed_num = _DIGITS_RE.search(bed_type)
+        if bed_num:
+            nums.add(bed_num.group(1))
+    return wants_studio, frozenset(nums)
+
+
+def build_user_neighborhood_index(users: list[dict]) -> tuple[dict[str, list[dict]], list[dict]]:
+    """Bin users by the listing neighborhood names their neighborhood filter accepts.
+
+    Returns (index, unfiltered): index maps a listing display name to the users
+    whose subscribed slugs accept it (same rule as listing_matches_user), and
+    unfiltered lists users with no neighborhood filter, who are candidates for
+    every listing. Users keep their input order within each list.
+    """
+    index: dict[str, list[dict]] = {}
+    unfiltered: list[dict] = []
+    for user in users:
+        slugs = user.get("filters", {}).get("neighborhoods", [])
+        if not slugs:
+            unfiltered.append(user)
+            continue
+        for name in _accepted_neighborhood_names(tuple(slugs)):
+            index.setdefault(name, []).append(user)
+    return index, unfiltered
+
+
+class _MatchListing(NamedTuple):
+    """The listing fields the matcher reads, normalized once per listing."""
+    price: int | None
+    accepting: frozenset[str]  # slugs whose filter accepts the listing's neighborhood
+    beds: str  # lowercased
+    bed_num: str | None  # first digit run in beds
+    longitude: float | None
+
+
+def _match_listing(listing: dict) -> _MatchListing:
+    beds = listing.get("beds", "").lower()
+    bed_num = _DIGITS_RE.search(beds)
+    return _MatchListing(
+        price=parse_price(listing.get("price", "")),
+        accepting=_DISPLAY_TO_ACCEPTING_SLUGS.get(listing.get("neighborhood", ""), frozenset()),
+        beds=beds,
+        bed_num=bed_num.group(1) if bed_num else None,
+        longitude=listing.get("longitude"),
+    )
+
+
+def _matches(listing: _MatchListing, filters: dict) -> bool:
+    # Filters are checked cheapest first so a rejection short-circuits the rest.
+    # The neighborhood check goes last: callers that route listings through
+    # build_user_neighborhood_index only pass users it already accepts.
 
     # --- Price filter ---
     min_price = filters.get("min_price", 0) or 0
     max_price = filters.get("max_price", 0) or 0
-    if max_price > 0:
-        listing_price = parse_price(listing.get("price", ""))
-        if listing_price is not None:
-            if listing_price > max_price:
-                return False
-            if min_price > 0 and listing_price < min_price:
+    if max_price > 0 and listing.price is not None:
+        if listing.price > max_price:
+            return False
+        if min_price > 0 and listing.price < min_price:
+            return False
+
+    # --- Geo bounds filter ---
+    geo_bounds = filters.get("geo_bounds")
+    if geo_bounds:
+        west = geo_bounds.get("west_longitude")
+        east = geo_bounds.get("east_longitude")
+        if listing.longitude is not None and west is not None and east is not None:
+            # Only apply geo filter to specific neighborhoods if apply_to is set
+            apply_to = geo_bounds.get("apply_to", [])
+            should_apply = not apply_to or not listing.accepting.isdisjoint(apply_to)
+            if should_apply and not (west <= listing.longitude <= east):
                 return False
 
     # --- Bed type filter ---
     user_beds = filters.get("bed_rooms", [])
     if user_beds:
-        listing_beds = listing.get("beds", "").lower()
-        if not listing_beds or listing_beds == "n/a":
+        if not listing.beds or listing.beds == "n/a":
             pass  # Don't filter out listings with unknown bed count
         else:
-            matched_bed = False
-            for bed_type in user_beds:
-                if bed_type.lower() == "studio" and "studio" in listing_beds:
-                    matched_bed = True
-                    break
-                # Match "1" with "1 bed", "1 bedroom", etc.
-                bed_num = re.search(r"(\d+)", bed_type)
-                if bed_num:
-                    listing_num = re.search(r"(\d+)", listing_beds)
-                    if listing_num and listing_num.group(1) == bed_num.group(1):
-                        matched_bed = True
-                        break
-            if not matched_bed:
+            wants_studio, bed_nums = _parse_user_bed_filters(tuple(user_beds))
+            # Match "1" with "1 bed", "1 bedroom", etc.
+            if not (wants_studio and "studio" in listing.beds) and listing.bed_num not in bed_nums:
                 return False
 
+    # --- Neighborhood filter ---
+    # A listing in "Manhattan Valley" matches user subscription to "upper-west-side"
+    # because NEIGHBORHOOD_ALIASES["upper-west-side"] includes "Manhattan Valley".
+    user_neighborhoods = filters.get("neighborhoods", [])
+    if user_neighborhoods and listing.accepting.isdisjoint(user_neighborhoods):
+        return False
+
     # --- No-fee filter ---
     if filters.get("no_fee"):
         # If user wants no-fee only, we can't determine fee status from listing data.
         # This is enforced at the scrape URL level instead. Pass through here.
         pass
 
-    # --- Geo bounds filter ---
-    geo_bounds = filters.get("geo_bounds")
-    if geo_bounds:
-        # Only apply geo filter to specific neighborhoods if apply_to is set
-        apply_to = geo_bounds.get("apply_to", [])
-        should_apply = True
-        if apply_to:
-            listing_hood = listing.get("neighborhood", "")
-            should_apply = False
-            for slug in apply_to:
-                aliases = NEIGHBORHOOD_ALIASES.get(slug, set())
-                display = VALID_NEIGHBORHOODS.get(slug, "")
-                if listing_hood in aliases or listing_hood == display:
-                    should_apply = True
-                    break
-
-        if should_apply:
-            listing_lon = listing.get("longitude")
-            if listing_lon is not None:
-                west = geo_bounds.get("west_longitude")
-                east = geo_bounds.get("east_longitude")
-                if west is not None and east is not None:
-                    if not (west <= listing_lon <= east):
-                        return False
-
     return True
 
 
+def listing_matches_user(listing: dict, user_prefs: dict) -> bool:
+    """Check if a listing matches a user's filter preferences.
+
+    Args:
+        listing: Dict with keys like address, price, neighborhood, beds, latitude, longitude.
+                 `neighborhood` is the display name (e.g. "East Village").
+        user_prefs: User preferences document from MongoDB with a `filters` sub-dict.
+
+    Returns:
+        True if the listing passes all active filters.
+    """
+    return _matches(_match_listing(listing), user_prefs.get("filters", {}))
+
+
+def users_matching_listing(listing: dict, users: Iterable[dict]) -> list[dict]:
+    """Return the users (in order) whose filters accept `listing`.
+
+    Same rule as listing_matches_user, but the listing's price, neighborhood and
+    bed count are parsed once for the whole batch instead of once per user.
+    """
+    match_listing = _match_listing(listing)
+    return [user for user in users if _matches(match_listing, user.get("filters", {}))]
+
+
 # ---------------------------------------------------------------------------
 # Default preferences for new subscribers
 # ---------------------------------------------------------------------------
@@ -12,12 +12,17 @@ import re
 import time
 from urllib.parse import urlencode, quote
 
+import soupsieve
 from bs4 import BeautifulSoup
 
 log = logging.getLogger("apartment_tracker.renthop")
 
 RENTHOP_BASE = "https://www.renthop.com"
 
+_DIGITS_RE = re.compile(r"(\d+)")
+_LISTING_PATH_RE = re.compile(r"/listings/(.+)")
+_PAGE_PARAM_RE = re.compile(r"[?&]page=(\d+)")
+
 # Maps StreetEasy neighborhood slugs → RentHop area URL slugs
 # Format is typically {neighborhood}-{borough}-ny
 # (Manhattan uses "new-york", Brooklyn uses "brooklyn", Queens uses "queens")
@@ -114,7 +119,7 @@ def build_renthop_search_url(neighborhood_slug: str, config: dict, page: int = 1
         if str(bed).lower() == "studio":
             params.append(("bedrooms[]", "0"))
         else:
-            num = re.search(r"(\d+)", str(bed))
+            num = _DIGITS_RE.search(str(bed))
             if num:
                 params.append(("bedrooms[]", num.group(1)))
 
@@ -138,7 +143,7 @@ def _extract_unit_from_renthop_url(href: str) -> str:
     Example: /listings/246-west-22nd-street/na/75... → "" (na means no unit)
     """
     path = href.replace(RENTHOP_BASE, "")
-    m = re.match(r"/listings/(.+)", path)
+    m = _LISTING_PATH_RE.match(path)
     if not m:
         return ""
     parts = m.group(1).rstrip("/").split("/")
@@ -152,6 +157,22 @@ def _extract_unit_from_renthop_url(href: str) -> str:
     return unit_candidate.upper()
 
 
+# Beds/baths/sqft cells in a search card, compiled once instead of on every .select() call
+_DETAIL_DIVS_SEL = soupsieve.compile('div[class*="font-size-10"][class*="align-bottom"]')
+
+# Card parsing patterns, compiled once rather than looked up per card
+_LISTING_HREF_RE = re.compile(r"/listings/")
+_QUERY_STRING_RE = re.compile(r"\?.*$")
+_CITY_SUFFIX_RE = re.compile(r",\s*(New York|Brooklyn|Queens|Bronx|Staten Island),?\s*NY.*$", re.I)
+_UNIT_SUFFIX_RE = re.compile(r"(?:#|apt\.?|unit)\s*\S+$", re.I)
+_BED_WORD_RE = re.compile(r"\bbed\b", re.I)
+_BED_COUNT_RE = re.compile(r"(\d+)\s*bed", re.I)
+_STUDIO_WORD_RE = re.compile(r"\bstudio\b", re.I)
+_BATH_WORD_RE = re.compile(r"\bbath\b", re.I)
+_BATH_COUNT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*bath", re.I)
+_SQFT_RE = re.compile(r"([\d,]+)\s*(?:sq\.?\s*ft|ft²|sqft)", re.I)
+
+
 def _parse_renthop_card(card, neighborhood_slug: str) -> dict | None:
     """Parse a single RentHop search-listing card.
 
@@ -170,14 +191,14 @@ def _parse_renthop_card(card, neighborhood_slug: str) -> dict | None:
         return None
 
     # URL — canonical listing page
-    link = card.find("a", href=re.compile(r"/listings/"))
+    link = card.find("a", href=_LISTING_HREF_RE)
     if not link:
         return None
     href = link.get("href", "")
     if not href.startswith("http"):
         href = RENTHOP_BASE + href
     # Strip query params
-    clean_url = re.sub(r"\?.*$", "", href)
+    clean_url = _QUERY_STRING_RE.sub("", href)
 
     # Address: best source is the title link text (already properly cased by RentHop)
     # e.g. "East 10th Street, New York, NY..." or "East 14th Street"
@@ -186,12 +207,12 @@ def _parse_renthop_card(card, neighborhood_slug: str) -> dict | None:
         title_link = link
     address = title_link.get_text(separator=" ", strip=True)
     # Strip ", New York, NY..." / ", Brooklyn, NY..." suffix and trailing ellipsis
-    address = re.sub(r",\s*(New York|Brooklyn|Queens|Bronx|Staten Island),?\s*NY.*$", "", address, flags=re.I).strip()
+    address = _CITY_SUFFIX_RE.sub("", address).strip()
     address = address.rstrip(".").strip()
 
     # Append unit from URL only if address doesn't already include one
     unit = _extract_unit_from_renthop_url(href)
-    if unit and not re.search(r"(?:#|apt\.?|unit)\s*\S+$", address, re.I):
+    if unit and not _UNIT_SUFFIX_RE.search(address):
         address = f"{address} #{unit}"
 
     if not address:
@@ -213,23 +234,23 @@ def _parse_renthop_card(card, neighborhood_slug: str) -> dict | None:
     # through the card (outside the info div). Collect all such div texts.
     beds = "N/A"
     baths = "N/A"
-    detail_divs = card.find_all("div", class_=lambda c: c and "font-size-10" in c and "align-bottom" in c)
+    detail_divs = _DETAIL_DIVS_SEL.select(card)
     for div in detail_divs:
         text = div.get_text(strip=True)
-        if re.search(r"\bbed\b", text, re.I):
-            m = re.search(r"(\d+)\s*bed", text, re.I)
+        if _BED_WORD_RE.search(text):
+            m = _BED_COUNT_RE.search(text)
             beds = f"{m.group(1)} bed" if m else "Studio"
-        elif re.search(r"\bstudio\b", text, re.I):
+        elif _STUDIO_WORD_RE.search(text):
             beds = "Studio"
-        elif re.search(r"\bbath\b", text, re.I):
-            m = re.search(r"(\d+(?:\.\d+)?)\s*bath", text, re.I)
+        elif _BATH_WORD_RE.search(text):
+            m = _BATH_COUNT_RE.search(text)
             if m:
                 baths = f"{m.group(1)} bath"
 
     # Sqft — RentHop rarely shows this in search results but check just in case
     sqft = "N/A"
     card_text = card.get_text(separator=" ", strip=True)
-    sqft_match = re.search(r"([\d,]+)\s*(?:sq\.?\s*ft|ft²|sqft)", card_text, re.I)
+    sqft_match = _SQFT_RE.search(card_text)
     if sqft_match:
         sqft = f"{sqft_match.group(1)} ft²"
 
@@ -270,7 +291,7 @@ def _get_max_page(soup: BeautifulSoup, area: str) -> int:
     """Extract the maximum page number from RentHop pagination links."""
     max_page = 1
     for link in soup.find_all("a", href=re.compile(rf"/apartments-for-rent/{re.escape(area)}")):
-        m = re.search(r"[?&]page=(\d+)", link.get("href", ""))
+        m = _PAGE_PARAM_RE.search(link.get("href", ""))
         if m:
             max_page = max(max_page, int(m.group(1)))
     return max_page
@@ -306,20 +327,43 @@ def scrape_renthop_neighborhood(
     if area_display not in title_text and "apartment" not in title_text:
         log.warning("RentHop: unexpected page title for %s: %s", neighborhood_slug, title_text[:80])
 
-    raw_listings: list[dict] = []
+    from apartment_tracker import parse_price
+
+    # Deduplicate by URL and drop listings above max price as cards are parsed
+    max_price = config.get("search", {}).get("max_price", 0)
+    seen_urls: set[str] = set()
+    unique: list[dict] = []
+    raw_count = 0
+
+    def collect(cards, page: int) -> None:
+        nonlocal raw_count
+        for card in cards:
+            try:
+                listing = _parse_renthop_card(card, neighborhood_slug)
+            except Exception as e:
+                log.debug("Failed to parse RentHop card page %d: %s", page, e)
+                continue
+            if not listing or not listing.get("url"):
+                continue
+            raw_count += 1
+            if listing["url"] in seen_urls:
+                continue
+            seen_urls.add(listing["url"])
+            if max_price:
+                price_val = parse_price(listing["price"])
+                if price_val is not None and price_val > max_price:
+                    log.debug("RentHop filtered (price): %s (%s)", listing["address"], listing["price"])
+                    continue
+            unique.append(listing)
 
     cards = soup.find_all("div", class_="search-listing")
     log.info("  RentHop %s page 1: %d cards", neighborhood_slug, len(cards))
-    for card in cards:
-        try:
-            listing = _parse_renthop_card(card, neighborhood_slug)
-            if listing and listing.get("url"):
-                raw_listings.append(listing)
-        except Exception as e:
-            log.debug("Failed to parse RentHop card: %s", e)
+    collect(cards, 1)
 
     # Pagination — cap at 3 pages to avoid excessive requests
     max_page = min(_get_max_page(soup, area), 3)
+    # Free the page's tree now rather than whenever the cyclic GC runs
+    soup.decompose()
     for page in range(2, max_page + 1):
         time.sleep(delay)
         page_url = build_renthop_search_url(neighborhood_slug, config, page=page)
@@ -330,61 +374,34 @@ def scrape_renthop_neighborhood(
         if not cards:
             break
         log.info("  RentHop %s page %d: %d cards", neighborhood_slug, page, len(cards))
-        for card in cards:
-            try:
-                listing = _parse_renthop_card(card, neighborhood_slug)
-                if listing and listing.get("url"):
-                    raw_listings.append(listing)
-            except Exception as e:
-                log.debug("Failed to parse RentHop card page %d: %s", page, e)
-
-    # Deduplicate by URL
-    seen_urls: set[str] = set()
-    unique: list[dict] = []
-    for listing in raw_listings:
-        if listing["url"] not in seen_urls:
-            seen_urls.add(listing["url"])
-            unique.append(listing)
-
-    # Filter above max price
-    max_price = config.get("search", {}).get("max_price", 0)
-    if max_price:
-        from apartment_tracker import parse_price
-        filtered = []
-        for listing in unique:
-            price_val = parse_price(listing["price"])
-            if price_val is not None and price_val > max_price:
-                log.debug("RentHop filtered (price): %s (%s)", listing["address"], listing["price"])
-                continue
-            filtered.append(listing)
-        unique = filtered
+        collect(cards, page)
+        soup.decompose()
 
     log.info("  RentHop %s: %d raw → %d after dedup/filter",
-             neighborhood_slug, len(raw_listings), len(unique))
+             neighborhood_slug, raw_count, len(unique))
     return unique
 
 
+_LISTING_GONE_RE = re.compile(
+    r"no longer available|listing has been removed|this listing is no longer|apartment has been rented",
+    re.IGNORECASE,
+)
+
+
 def check_renthop_listing_status(session, url: str) -> str:
     """Check if a RentHop listing is still active.
 
     Returns 'active', 'gone', or 'unknown'.
     """
-    soup, status = session.fetch_with_status(url)
+    soup, status = session.fetch_with_status(url, head_first=True)
     if status is None:
         return "unknown"
-    if status == 404:
+    if status in (404, 410):
         return "gone"
     if status == 403:
         return "unknown"  # rate-limited
     if status >= 400:
         return "unknown"
-    if soup:
-        text = soup.get_text(separator=" ", strip=True).lower()
-        if any(phrase in text for phrase in [
-            "no longer available",
-            "listing has been removed",
-            "this listing is no longer",
-            "apartment has been rented",
-        ]):
-            return "gone"
+    if soup and _LISTING_GONE_RE.search(soup.get_text(separator=" ", strip=True)):
+        return "gone"
     return "active"
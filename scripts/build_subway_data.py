@@ -12,6 +12,7 @@ import csv
 import io
 import json
 from pathlib import Path
+from typing import Iterable
 
 import requests
 
@@ -19,18 +20,21 @@ MTA_CSV_URL = "https://data.ny.gov/api/views/39hk-dx4f/rows.csv?accessType=DOWNL
 OUTPUT_PATH = Path(__file__).resolve().parent.parent / "data" / "subway_stations.json"
 
 
-def download_csv() -> str:
-    """Download the MTA Stations CSV."""
+def download_csv() -> requests.Response:
+    """Start downloading the MTA Stations CSV; the body is streamed from resp.raw."""
     print(f"Downloading MTA Stations CSV from {MTA_CSV_URL}...")
-    resp = requests.get(MTA_CSV_URL, timeout=30)
+    resp = requests.get(MTA_CSV_URL, stream=True, timeout=30)
     resp.raise_for_status()
-    print(f"Downloaded {len(resp.text):,} bytes")
-    return resp.text
+    resp.raw.decode_content = True  # undo any gzip transfer encoding
+    return resp
 
 
-def parse_stations(csv_text: str) -> list[dict]:
-    """Parse CSV and group stations by Complex ID, merging routes."""
-    reader = csv.DictReader(io.StringIO(csv_text))
+def parse_stations(csv_file: Iterable[str] | str) -> list[dict]:
+    """Parse CSV lines (or the whole CSV as a str) and group stations by Complex ID, merging routes."""
+    if isinstance(csv_file, str):
+        # DictReader would iterate a str character by character
+        csv_file = io.StringIO(csv_file)
+    reader = csv.DictReader(csv_file)
 
     complexes: dict[str, dict] = {}
 
@@ -53,24 +57,23 @@ def parse_stations(csv_text: str) -> list[dict]:
         except ValueError:
             continue
 
-        if complex_id not in complexes:
-            complexes[complex_id] = {
+        existing = complexes.get(complex_id)
+        if existing is None:
+            # Keep the first station name; coordinates are averaged over
+            # every entry in the complex for better accuracy
+            existing = complexes[complex_id] = {
                 "name": station_name,
-                "latitude": lat_f,
-                "longitude": lon_f,
+                "lat_sum": 0.0,
+                "lon_sum": 0.0,
+                "n": 0,
                 "routes": set(),
             }
+        existing["lat_sum"] += lat_f
+        existing["lon_sum"] += lon_f
+        existing["n"] += 1
 
         # Merge routes (space-separated in CSV, e.g. "N Q R W")
-        if line:
-            for route in line.split():
-                complexes[complex_id]["routes"].add(route)
-
-        # Use the first station name, but average coordinates for complexes
-        # with multiple entries for better accuracy
-        existing = complexes[complex_id]
-        existing["latitude"] = (existing["latitude"] + lat_f) / 2
-        existing["longitude"] = (existing["longitude"] + lon_f) / 2
+        existing["routes"].update(line.split())
 
     # Convert to list, sort routes for determinism
     stations = []
@@ -78,8 +81,8 @@ def parse_stations(csv_text: str) -> list[dict]:
         stations.append({
             "complex_id": complex_id,
             "name": data["name"],
-            "latitude": round(data["latitude"], 6),
-            "longitude": round(data["longitude"], 6),
+            "latitude": round(data["lat_sum"] / data["n"], 6),
+            "longitude": round(data["lon_sum"] / data["n"], 6),
             "routes": sorted(data["routes"]),
         })
 
@@ -89,8 +92,9 @@ def parse_stations(csv_text: str) -> list[dict]:
 
 
 def main():
-    csv_text = download_csv()
-    stations = parse_stations(csv_text)
+    # Parse while downloading instead of holding the whole body as a str
+    with download_csv() as resp:
+        stations = parse_stations(io.TextIOWrapper(resp.raw, encoding="utf-8-sig", newline=""))
     print(f"Parsed {len(stations)} unique station complexes")
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -2,6 +2,8 @@
 
 import json
 import os
+import subprocess
+import sys
 import tempfile
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -13,6 +15,13 @@ from bs4 import BeautifulSoup
 import apartment_tracker as at
 
 
+@pytest.fixture(autouse=True)
+def fresh_discord_limiter():
+    """Keep Discord rate-limit state from leaking between tests."""
+    with patch.object(at, "_discord_limiter", at.DiscordRateLimiter()):
+        yield
+
+
 # ---------------------------------------------------------------------------
 # Helpers to build fake HTML listing cards
 # ---------------------------------------------------------------------------
@@ -174,6 +183,16 @@ class TestParseListings:
         soup = BeautifulSoup("<html><body></body></html>", "lxml")
         assert at.parse_listings(soup) == []
 
+    def test_class_based_card_fallback(self):
+        card = make_listing_card(address="Fallback Apt").replace(
+            'data-testid="listing-card"',
+            'class="sc-1 ListingCard-module__cardContainer___x1"',
+        )
+        listings = at.parse_listings(make_search_page([card]))
+        assert len(listings) == 1
+        assert listings[0]["address"] == "Fallback Apt"
+        assert listings[0]["price"] == "$3,000"
+
 
 # ---------------------------------------------------------------------------
 # get_max_page
@@ -360,6 +379,106 @@ class TestSeenListings:
         with patch.object(at, "SEEN_PATH", seen_file):
             assert at.load_seen() == {}
 
+    def test_unchanged_seen_is_not_rewritten(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        seen = {"https://streeteasy.com/building/test/1": {"first_seen": "2026-02-11T00:00:00+00:00"}}
+        with patch.object(at, "SEEN_PATH", seen_file):
+            at.save_seen(seen)
+            with patch("builtins.open", side_effect=AssertionError("rewrote file")):
+                at.save_seen(dict(seen))
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        with patch.object(at, "SEEN_PATH", seen_file):
+            at.save_seen({"https://streeteasy.com/building/test/1": {"price": "$3,000"}})
+            with patch.object(at.os, "replace", side_effect=OSError("disk full")), \
+                 patch.object(at, "SEEN_WAL_COMPACT_RECORDS", 0):
+                with pytest.raises(OSError):
+                    at.save_seen({"https://streeteasy.com/building/test/2": {"price": "$2,000"}})
+            assert list(at.load_seen()) == ["https://streeteasy.com/building/test/1"]
+
+    def test_changes_are_appended_to_wal(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        with patch.object(at, "SEEN_PATH", seen_file):
+            at.save_seen({"https://se.com/a": {"price": "$3,000"},
+                          "https://se.com/b": {"price": "$2,000"}})
+            base = seen_file.read_bytes()
+            seen = at.load_seen()
+            seen["https://se.com/a"]["price"] = "$2,900"
+            del seen["https://se.com/b"]
+            seen["https://se.com/c"] = {"price": "$1,800"}
+            at.save_seen(seen)
+            assert seen_file.read_bytes() == base
+            # Header naming the base file, then one record per change
+            assert len((tmp_path / "seen.wal.jsonl").read_text().splitlines()) == 4
+            assert at.load_seen() == {"https://se.com/a": {"price": "$2,900"},
+                                      "https://se.com/c": {"price": "$1,800"}}
+
+    def test_full_wal_is_compacted(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        wal_file = tmp_path / "seen.wal.jsonl"
+        with patch.object(at, "SEEN_PATH", seen_file), \
+             patch.object(at, "SEEN_WAL_COMPACT_RECORDS", 2):
+            at.save_seen({"https://se.com/a": {"price": "$3,000"}})
+            at.save_seen({"https://se.com/a": {"price": "$2,900"}})
+            assert wal_file.read_text() != ""
+            at.save_seen({"https://se.com/a": {"price": "$2,800"}})
+            assert wal_file.read_text() == ""
+            assert json.loads(seen_file.read_text()) == {"https://se.com/a": {"price": "$2,800"}}
+
+    def test_stale_wal_after_crash_before_clear_is_skipped(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        with patch.object(at, "SEEN_PATH", seen_file):
+            at.save_seen({"https://se.com/a": {"price": "$3,000"},
+                          "https://se.com/b": {"price": "$2,000"}})
+            at.save_seen({"https://se.com/a": {"price": "$2,900"},
+                          "https://se.com/b": {"price": "$2,000"}})
+            final = {"https://se.com/a": {"price": "$2,800"}}
+            # Killed after SEEN_PATH is replaced but before the log is cleared
+            with patch.object(at, "SEEN_WAL_COMPACT_RECORDS", 0), \
+                 patch.object(at, "_clear_seen_wal", side_effect=KeyboardInterrupt):
+                with pytest.raises(KeyboardInterrupt):
+                    at.save_seen(final)
+            assert (tmp_path / "seen.wal.jsonl").read_text() != ""
+            at._seen_file_snapshot = None
+            assert at.load_seen() == final
+            # The next save rewrites the file and clears the stale log
+            at.save_seen({"https://se.com/a": {"price": "$2,700"}})
+            assert (tmp_path / "seen.wal.jsonl").read_text() == ""
+            assert at.load_seen() == {"https://se.com/a": {"price": "$2,700"}}
+
+    def test_truncated_wal_record_is_ignored(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        seen_file.write_text(json.dumps({"https://se.com/a": {"price": "$3,000"}}))
+        (tmp_path / "seen.wal.jsonl").write_text(
+            '{"url":"https://se.com/b","entry":{"price":"$2,000"}}\n{"url":"https://se.com/c","en')
+        with patch.object(at, "SEEN_PATH", seen_file):
+            assert set(at.load_seen()) == {"https://se.com/a", "https://se.com/b"}
+
+    @pytest.mark.parametrize("uri, fails", [("mongodb://localhost:27017", True), (None, False)])
+    def test_missing_db_module_only_tolerated_without_mongodb_uri(self, uri, fails):
+        env = {k: v for k, v in os.environ.items() if k != "MONGODB_URI"}
+        if uri:
+            env["MONGODB_URI"] = uri
+        code = "import sys; sys.modules['pymongo'] = None; import apartment_tracker"
+        result = subprocess.run([sys.executable, "-c", code], env=env,
+                                cwd=Path(at.__file__).parent, capture_output=True, text=True)
+        assert (result.returncode != 0) is fails
+        if fails:
+            assert "pymongo" in result.stderr
+
+    def test_load_interns_neighborhoods(self, tmp_path):
+        seen_file = tmp_path / "seen.json"
+        seen_file.write_text(json.dumps({
+            "https://se.com/a": {"neighborhood": "East Village"},
+            "https://se.com/b": {"neighborhood": "East Village"},
+            "https://se.com/c": {"neighborhood": None},
+        }))
+        with patch.object(at, "SEEN_PATH", seen_file):
+            loaded = at.load_seen()
+        assert loaded["https://se.com/a"]["neighborhood"] is loaded["https://se.com/b"]["neighborhood"]
+        assert loaded["https://se.com/c"]["neighborhood"] is None
+
     def test_migrate_list_format(self, tmp_path):
         seen_file = tmp_path / "seen.json"
         seen_file.write_text(json.dumps(["https://streeteasy.com/building/test/1"]))
@@ -459,6 +578,74 @@ class TestScrapeNeighborhoodIntegration:
         result = at.scrape_neighborhood(FakeSession(), "chelsea", self.CONFIG)
         assert result == []
 
+    def test_scrape_neighborhoods_preserves_order(self):
+        """Concurrent scraping returns results in the same order as the input."""
+        pages = {
+            "chelsea": make_search_page([
+                make_listing_card(address="C1", url="/building/c/1", neighborhood="Chelsea"),
+            ]),
+            "flatiron": make_search_page([
+                make_listing_card(address="F1", url="/building/f/1", neighborhood="Flatiron"),
+                make_listing_card(address="F2", url="/building/f/2", neighborhood="Flatiron"),
+            ]),
+        }
+
+        class FakeSession:
+            def fetch(self, url):
+                for hood, soup in pages.items():
+                    if f"/for-rent/{hood}/" in url:
+                        return soup
+                return None
+
+            def close(self):
+                pass
+
+        with patch.object(at, "get_session", return_value=FakeSession()):
+            results = at.scrape_neighborhoods(["flatiron", "chelsea", "soho"], self.CONFIG)
+        assert [len(r) for r in results] == [2, 1, 0]
+        assert results[0][0]["address"] == "F1"
+
+    def test_scrape_neighborhoods_single_worker_waits_between_neighborhoods(self):
+        """With one worker, neighborhoods are still spaced request_delay_seconds apart."""
+        config = {**self.CONFIG, "scraper": {"request_delay_seconds": 2, "max_concurrent_scrapes": 1}}
+        with patch.object(at, "_scrape_neighborhood_worker", return_value=[]), \
+             patch.object(at.time, "sleep") as mock_sleep:
+            at.scrape_neighborhoods(["chelsea", "soho", "tribeca"], config)
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2, 2]
+
+    def test_scrape_neighborhoods_custom_scraper_waits_between_neighborhoods(self):
+        """The RentHop path (a custom scrape callable) keeps the same spacing."""
+        config = {**self.CONFIG, "scraper": {"request_delay_seconds": 2, "max_concurrent_scrapes": 1}}
+        scraped = []
+
+        class FakeSession:
+            def close(self):
+                pass
+
+        def fake_renthop(session, neighborhood, cfg):
+            scraped.append(neighborhood)
+            return [{"url": neighborhood}]
+
+        with patch.object(at, "get_session", return_value=FakeSession()), \
+             patch.object(at.time, "sleep") as mock_sleep:
+            results = at.scrape_neighborhoods(["chelsea", "soho"], config, scrape=fake_renthop)
+        assert scraped == ["chelsea", "soho"]
+        assert results == [[{"url": "chelsea"}], [{"url": "soho"}]]
+        mock_sleep.assert_called_once_with(2)
+
+    def test_scrape_neighborhoods_staggers_concurrent_workers(self):
+        """Concurrent workers add a random fraction of the delay on top of it."""
+        config = {**self.CONFIG, "scraper": {"request_delay_seconds": 2, "max_concurrent_scrapes": 2}}
+        with patch.object(at, "_scrape_neighborhood_worker", return_value=[]), \
+             patch.object(at.random, "uniform", side_effect=lambda lo, hi: hi) as mock_uniform, \
+             patch.object(at.time, "sleep") as mock_sleep:
+            at.scrape_neighborhoods(["chelsea", "soho", "tribeca", "nolita"], config)
+        assert {c.args for c in mock_uniform.call_args_list} == {(0, 2)}
+        pauses = [c.args[0] for c in mock_sleep.call_args_list]
+        assert len(pauses) == 4
+        # Every neighborhood after a worker's first waits at least the full delay
+        assert pauses.count(2) <= 2 and all(p in (2, 4) for p in pauses)
+
 
 # ---------------------------------------------------------------------------
 # NEIGHBORHOOD_ALIASES completeness
@@ -475,7 +662,7 @@ class TestNeighborhoodAliases:
 
     def test_aliases_are_sets_of_strings(self):
         for slug, aliases in at.NEIGHBORHOOD_ALIASES.items():
-            assert isinstance(aliases, set), f"Aliases for '{slug}' should be a set"
+            assert isinstance(aliases, frozenset), f"Aliases for '{slug}' should be a frozenset"
             for a in aliases:
                 assert isinstance(a, str), f"Alias '{a}' for '{slug}' should be a string"
                 assert len(a) > 0, f"Empty alias found for '{slug}'"
@@ -527,19 +714,25 @@ class TestFormatCrossStreets:
 # ---------------------------------------------------------------------------
 
 class TestGeoclientLookup:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        at._geoclient_cache.clear()
+        yield
+        at._geoclient_cache.clear()
+
     def test_returns_cross_streets_and_coordinates(self):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "address": {
                 "lowCrossStreetName1": "2 AVENUE",
                 "highCrossStreetName1": "1 AVENUE",
                 "latitude": 40.7357,
                 "longitude": -73.9823,
             }
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
-        with patch("apartment_tracker.requests.get", return_value=mock_response) as mock_get:
+        with patch.object(at._http, "get", return_value=mock_response) as mock_get:
             result = at.geoclient_lookup("337 East 21st Street #3H", "fake-key")
             assert result is not None
             assert result["cross_streets"] == "between 2 Avenue & 1 Avenue"
@@ -553,11 +746,11 @@ class TestGeoclientLookup:
     def test_returns_none_cross_streets_on_missing_fields(self):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "address": {"latitude": 40.73, "longitude": -73.98}
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
-        with patch("apartment_tracker.requests.get", return_value=mock_response):
+        with patch.object(at._http, "get", return_value=mock_response):
             result = at.geoclient_lookup("337 East 21st Street #3H", "fake-key")
             assert result is not None
             assert result["cross_streets"] is None
@@ -568,27 +761,56 @@ class TestGeoclientLookup:
         assert result is None
 
     def test_returns_none_on_api_error(self):
-        with patch("apartment_tracker.requests.get", side_effect=at.requests.RequestException("timeout")):
+        with patch.object(at._http, "get", side_effect=at.requests.RequestException("timeout")):
             result = at.geoclient_lookup("337 East 21st Street #3H", "fake-key")
             assert result is None
 
     def test_handles_missing_coordinates(self):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "address": {
                 "lowCrossStreetName1": "BROADWAY",
                 "highCrossStreetName1": "5 AVENUE",
             }
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
-        with patch("apartment_tracker.requests.get", return_value=mock_response):
+        with patch.object(at._http, "get", return_value=mock_response):
             result = at.geoclient_lookup("200 West 23rd Street", "fake-key")
             assert result is not None
             assert result["cross_streets"] == "between Broadway & 5 Avenue"
             assert result["latitude"] is None
             assert result["longitude"] is None
 
+    def test_caches_by_building_and_skips_failures(self):
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({"address": {"latitude": 40.73, "longitude": -73.98}}).encode()
+        with patch.object(at._http, "get", side_effect=at.requests.RequestException("timeout")):
+            assert at.geoclient_lookup("337 East 21st Street #3H", "fake-key") is None
+        with patch.object(at._http, "get", return_value=mock_response) as mock_get:
+            first = at.geoclient_lookup("337 East 21st Street #3H", "fake-key")
+            second = at.geoclient_lookup("337 East 21st Street #5B", "fake-key")
+            assert first == second
+            assert first is not second
+            mock_get.assert_called_once()
+
+    def test_lookup_many_keys_results_by_caller_key(self):
+        def fake_lookup(address, key, borough="Manhattan"):
+            if address == "boom":
+                raise ValueError("bad")
+            return {"cross_streets": None, "latitude": 40.7, "longitude": -73.9, "borough": borough}
+
+        with patch("apartment_tracker.geoclient_lookup", side_effect=fake_lookup):
+            results = at.geoclient_lookup_many({
+                "a": ("1 Main St", "Brooklyn"),
+                "b": ("boom", "Manhattan"),
+            }, "fake-key")
+        assert results["a"]["borough"] == "Brooklyn"
+        assert results["b"] is None
+
+    def test_lookup_many_empty(self):
+        assert at.geoclient_lookup_many({}, "fake-key") == {}
+
 
 class TestBoroughLookup:
     def test_manhattan_slugs(self):
@@ -616,11 +838,11 @@ class TestBoroughLookup:
     def test_geoclient_passes_borough(self):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             "address": {"latitude": 40.742, "longitude": -73.958}
-        }
+        }).encode()
         mock_response.raise_for_status = MagicMock()
-        with patch("apartment_tracker.requests.get", return_value=mock_response) as mock_get:
+        with patch.object(at._http, "get", return_value=mock_response) as mock_get:
             at.geoclient_lookup("10-10 Jackson Avenue", "fake-key", borough="Queens")
             call_kwargs = mock_get.call_args
             assert call_kwargs[1]["params"]["borough"] == "Queens"
@@ -764,13 +986,13 @@ class TestDiscordCrossStreets:
             "url": "https://streeteasy.com/building/test/1",
             "cross_streets": "between 1st Ave & 2nd Ave",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, self.CONFIG)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = payload["embeds"][0]["fields"]
             cross_field = [f for f in fields if "Cross Streets" in f["name"]]
             assert len(cross_field) == 1
@@ -782,13 +1004,13 @@ class TestDiscordCrossStreets:
             "baths": "1 bath", "sqft": "650 ft²", "neighborhood": "East Village",
             "url": "https://streeteasy.com/building/test/1",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, self.CONFIG)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = payload["embeds"][0]["fields"]
             cross_field = [f for f in fields if "Cross Streets" in f["name"]]
             assert len(cross_field) == 0
@@ -800,13 +1022,13 @@ class TestDiscordCrossStreets:
             "url": "https://streeteasy.com/building/test/1",
             "subway_info": "L at 1st Ave (0.2 mi)\n6 at Astor Pl (0.3 mi)",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, self.CONFIG)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = payload["embeds"][0]["fields"]
             subway_field = [f for f in fields if "Subway" in f["name"]]
             assert len(subway_field) == 1
@@ -814,6 +1036,58 @@ class TestDiscordCrossStreets:
             assert subway_field[0]["inline"] is False
 
 
+class TestDiscordBatch:
+    CONFIG = {"discord": {"username": "Test Bot"}}
+
+    def _listing(self, i, **extra):
+        return {"price": "$3,000", "address": f"{i} Test St", "beds": "1 bed",
+                "neighborhood": "East Village", "url": f"https://streeteasy.com/building/test/{i}", **extra}
+
+    def test_sends_up_to_ten_embeds_per_message(self):
+        listings = [self._listing(i) for i in range(23)]
+        scores = [{"score": 8.0, "grade": "A", "color": 0x2ECC71}] + [None] * 22
+        with patch.object(at._http, "post", return_value=MagicMock(status_code=204)) as mock_post:
+            sent = at.send_discord_batch("https://discord.com/webhook", listings, self.CONFIG, scores)
+        assert sent == 23
+        payloads = [json.loads(c[1]["data"]) for c in mock_post.call_args_list]
+        assert [len(p["embeds"]) for p in payloads] == [10, 10, 3]
+        assert payloads[0]["username"] == "Test Bot"
+        assert payloads[0]["embeds"][0]["title"] == "🏠 0 Test St"
+        assert payloads[0]["embeds"][0]["color"] == 0x2ECC71
+        assert payloads[2]["embeds"][-1]["title"] == "🏠 22 Test St"
+
+    def test_splits_on_total_embed_size(self):
+        listings = [self._listing(i, subway_info="x" * 1000) for i in range(10)]
+        batches = at._batch_embeds([at.build_listing_embed(l) for l in listings])
+        assert len(batches) > 1
+        assert sum(len(b) for b in batches) == 10
+        for batch in batches:
+            assert sum(at._embed_text_length(e) for e in batch) <= at.DISCORD_MAX_EMBED_CHARS_PER_MESSAGE
+
+    def test_failed_message_not_counted(self):
+        listings = [self._listing(i) for i in range(12)]
+        failed = MagicMock(status_code=500)
+        failed.raise_for_status.side_effect = at.requests.HTTPError("boom")
+        with patch.object(at._http, "post", side_effect=[failed, MagicMock(status_code=204)]):
+            assert at.send_discord_batch("https://discord.com/webhook", listings, self.CONFIG) == 2
+
+    def test_bad_request_resends_one_embed_at_a_time(self):
+        listings = [self._listing(i) for i in range(3)]
+
+        def post(url, **kwargs):
+            embeds = json.loads(kwargs["data"])["embeds"]
+            if any(e["title"] == "🏠 1 Test St" for e in embeds):
+                resp = MagicMock(status_code=400, text="bad embed")
+                resp.raise_for_status.side_effect = at.requests.HTTPError("400")
+                return resp
+            return MagicMock(status_code=204)
+
+        with patch.object(at._http, "post", side_effect=post) as mock_post:
+            assert at.send_discord_batch("https://discord.com/webhook", listings, self.CONFIG) == 2
+        sizes = [len(json.loads(c[1]["data"])["embeds"]) for c in mock_post.call_args_list]
+        assert sizes == [3, 1, 1, 1]
+
+
 # ---------------------------------------------------------------------------
 # Haversine distance
 # ---------------------------------------------------------------------------
@@ -918,6 +1192,21 @@ class TestFindNearbyStations:
         assert "distance_mi" in r
         assert isinstance(r["distance_mi"], float)
 
+    def test_grid_lookup_matches_full_scan(self):
+        """Stations in neighboring grid cells are found; results equal a full haversine scan."""
+        stations = [
+            {"name": f"S{i}", "latitude": 40.70 + 0.003 * (i % 12), "longitude": -74.00 + 0.003 * (i // 12),
+             "routes": ["A"]}
+            for i in range(144)
+        ]
+        for lat, lon, max_miles in [(40.7199, -73.9801, 0.5), (40.7300, -73.9700, 1.0), (40.75, -73.90, 0.2)]:
+            results = at.find_nearby_stations(lat, lon, stations, max_stations=10, max_miles=max_miles)
+            expected = sorted(
+                (round(d, 2), i) for i, s in enumerate(stations)
+                if (d := at._haversine(lat, lon, s["latitude"], s["longitude"])) <= max_miles
+            )[:10]
+            assert [r["name"] for r in results] == [stations[i]["name"] for _, i in expected]
+
 
 # ---------------------------------------------------------------------------
 # _format_subway_field
@@ -958,14 +1247,14 @@ class TestDailyDigest:
             {"url": "/b", "address": "Apt B", "price": "$3,500", "neighborhood": "East Village"},
             {"url": "/c", "address": "Apt C", "price": "$2,800", "neighborhood": "Chelsea"},
         ]
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             result = at.send_discord_digest("https://discord.com/webhook", listings, self.CONFIG)
             assert result is True
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             embed = payload["embeds"][0]
             assert "Daily Digest" in embed["title"]
             assert "3 new listing(s)" in embed["description"]
@@ -974,14 +1263,14 @@ class TestDailyDigest:
             assert embed["color"] == 0x3498DB
 
     def test_send_discord_digest_empty_listings(self):
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             result = at.send_discord_digest("https://discord.com/webhook", [], self.CONFIG)
             assert result is True
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             assert "0 new listing(s)" in payload["embeds"][0]["description"]
 
     def test_run_digest_filters_recent(self):
@@ -1032,6 +1321,99 @@ class TestDailyDigest:
                 analytics_arg = mock_digest.call_args[0][3]
             assert analytics_arg is not None
 
+    def test_run_digest_computes_analytics_once_for_all_users(self):
+        users = [{"discord_user_id": f"u{i}", "filters": {}} for i in range(3)]
+        seen = {"https://se.com/a": {"price": "$3,000", "neighborhood": "Chelsea",
+                                     "first_seen": "2026-01-01T00:00:00+00:00"}}
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_user_ids_for.return_value = set()
+        with patch.object(at, "load_config", return_value={"discord": {}}), \
+             patch.object(at, "load_seen", return_value=seen), \
+             patch.object(at, "_use_mongodb", return_value=True), \
+             patch.object(at, "db_module", fake_db), \
+             patch.dict(os.environ, {"DISCORD_BOT_TOKEN": "token"}, clear=True), \
+             patch.object(at, "compute_digest_analytics",
+                          wraps=at.compute_digest_analytics) as mock_analytics, \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            at.run_digest()
+        mock_analytics.assert_called_once()
+        assert mock_dm.call_count == 3
+        assert all("**Total tracked**: 1 listings" in c[0][2]["description"]
+                   for c in mock_dm.call_args_list)
+
+    def test_run_digest_routes_listings_by_user_neighborhood(self):
+        users = [
+            {"discord_user_id": "ev", "filters": {"neighborhoods": ["east-village"]}},
+            {"discord_user_id": "all", "filters": {}},
+        ]
+        recent_ts = datetime.now(timezone.utc).isoformat()
+        seen = {
+            "https://se.com/a": {"price": "$3,000", "neighborhood": "East Village",
+                                 "first_seen": recent_ts},
+            "https://se.com/b": {"price": "$2,000", "neighborhood": "Chelsea",
+                                 "first_seen": recent_ts},
+        }
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_user_ids_for.return_value = set()
+        with patch.object(at, "load_config", return_value={"discord": {}}), \
+             patch.object(at, "load_seen", return_value=seen), \
+             patch.object(at, "_use_mongodb", return_value=True), \
+             patch.object(at, "db_module", fake_db), \
+             patch.dict(os.environ, {"DISCORD_BOT_TOKEN": "token"}, clear=True), \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            at.run_digest()
+        descs = {c[0][1]: c[0][2]["description"] for c in mock_dm.call_args_list}
+        assert descs["ev"].startswith("**1 new listing(s)**")
+        assert "Chelsea" not in descs["ev"]
+        assert descs["all"].startswith("**2 new listing(s)**")
+        assert "**East Village**: 1 listing(s) — $3,000" in descs["all"]
+        assert "**Chelsea**: 1 listing(s) — $2,000" in descs["all"]
+
+    def test_run_digest_user_dms_skip_already_sent_in_one_lookup(self):
+        users = [{"discord_user_id": f"u{i}", "filters": {}} for i in range(3)]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_user_ids_for.return_value = {"u1"}
+        with patch.object(at, "load_config", return_value={"discord": {}}), \
+             patch.object(at, "load_seen", return_value={}), \
+             patch.object(at, "_use_mongodb", return_value=True), \
+             patch.object(at, "db_module", fake_db), \
+             patch.dict(os.environ, {"DISCORD_BOT_TOKEN": "token"}, clear=True), \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            at.run_digest()
+        assert sorted(c[0][1] for c in mock_dm.call_args_list) == ["u0", "u2"]
+        fake_db.get_sent_user_ids_for.assert_called_once()
+        assert fake_db.get_sent_user_ids_for.call_args[0][0] == "daily_digest"
+        fake_db.was_notification_sent.assert_not_called()
+        fake_db.log_notifications.assert_called_once()
+        logged = fake_db.log_notifications.call_args[0][0]
+        assert sorted((uid, kind, ok) for uid, _, kind, ok in logged) == [
+            ("u0", "daily_digest", True), ("u2", "daily_digest", True)]
+
+    def test_run_digest_logs_sent_dms_when_a_send_raises(self):
+        users = [{"discord_user_id": f"u{i}", "filters": {}} for i in range(3)]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_user_ids_for.return_value = set()
+
+        def send(token, user_id, embed):
+            if user_id == "u1":
+                raise ValueError("bad embed")
+            return True
+
+        with patch.object(at, "load_config", return_value={"discord": {}}), \
+             patch.object(at, "load_seen", return_value={}), \
+             patch.object(at, "_use_mongodb", return_value=True), \
+             patch.object(at, "db_module", fake_db), \
+             patch.dict(os.environ, {"DISCORD_BOT_TOKEN": "token"}, clear=True), \
+             patch.object(at, "send_discord_dm", side_effect=send):
+            with pytest.raises(ValueError):
+                at.run_digest()
+        logged = fake_db.log_notifications.call_args[0][0]
+        assert sorted(uid for uid, _, _, _ in logged) == ["u0", "u2"]
+
 
 # ---------------------------------------------------------------------------
 # parse_args
@@ -1099,13 +1481,13 @@ class TestGoogleMapsUrl:
             "baths": "1 bath", "sqft": "650 ft²", "neighborhood": "East Village",
             "url": "https://streeteasy.com/building/test/1",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, {"discord": {}})
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = payload["embeds"][0]["fields"]
             map_field = [f for f in fields if "Map" in f["name"]]
             assert len(map_field) == 1
@@ -1163,14 +1545,14 @@ class TestPriceDropDetection:
     def test_send_discord_price_drop(self):
         listing = {"address": "123 Test St", "url": "https://streeteasy.com/test", "neighborhood": "Chelsea"}
         change = {"old_price": 3000, "new_price": 2800, "savings": 200, "pct": 6.7}
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             result = at.send_discord_price_drop("https://discord.com/webhook", listing, change, {"discord": {}})
             assert result is True
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             embed = payload["embeds"][0]
             assert "Price Drop" in embed["title"]
             assert embed["color"] == 0xFF8C00
@@ -1210,14 +1592,14 @@ class TestStaleness:
             "baths": "1 bath", "sqft": "650 ft²", "neighborhood": "East Village",
             "url": "https://streeteasy.com/building/test/1",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, {"discord": {}},
                                          days_on_market=35)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = {f["name"]: f["value"] for f in payload["embeds"][0]["fields"]}
             assert "35 days" in fields["📅 Days Tracked"]
             assert "negotiable" in fields["📅 Days Tracked"]
@@ -1228,14 +1610,14 @@ class TestStaleness:
             "baths": "1 bath", "sqft": "650 ft²", "neighborhood": "East Village",
             "url": "https://streeteasy.com/building/test/1",
         }
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, {"discord": {}},
                                          days_on_market=10)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = {f["name"]: f["value"] for f in payload["embeds"][0]["fields"]}
             assert "10 days" in fields["📅 Days Tracked"]
             assert "negotiable" not in fields["📅 Days Tracked"]
@@ -1243,14 +1625,14 @@ class TestStaleness:
     def test_days_tracked_in_price_drop(self):
         listing = {"address": "123 Test St", "url": "https://streeteasy.com/test", "neighborhood": "Chelsea"}
         change = {"old_price": 3000, "new_price": 2800, "savings": 200, "pct": 6.7}
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_price_drop("https://discord.com/webhook", listing, change,
                                        {"discord": {}}, days_on_market=40)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             fields = {f["name"]: f["value"] for f in payload["embeds"][0]["fields"]}
             assert "40 days" in fields["📅 Days Tracked"]
             assert "negotiable" in fields["📅 Days Tracked"]
@@ -1274,6 +1656,11 @@ class TestValueScore:
     def test_compute_neighborhood_medians_empty(self):
         assert at.compute_neighborhood_medians({}) == {}
 
+    def test_minmax(self):
+        assert at._minmax([3200, 2800, 3500, 3000]) == (2800, 3500)
+        assert at._minmax(iter([3000])) == (3000, 3000)
+        assert at._minmax([]) is None
+
     def test_value_score_below_median_scores_high(self):
         medians = {"Chelsea": 3500.0}
         listing = {"price": "$2,800", "neighborhood": "Chelsea", "sqft": "N/A"}
@@ -1317,14 +1704,14 @@ class TestValueScore:
             "url": "https://streeteasy.com/building/test/1",
         }
         vs = {"score": 7.5, "grade": "B", "color": 0x27AE60}
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_notification("https://discord.com/webhook", listing, {"discord": {}},
                                          value_score=vs)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             embed = payload["embeds"][0]
             assert embed["color"] == 0x27AE60
             fields = {f["name"]: f["value"] for f in embed["fields"]}
@@ -1390,13 +1777,13 @@ class TestDigestAnalytics:
     def test_digest_includes_analytics(self):
         seen = self._make_seen()
         analytics = at.compute_digest_analytics(seen, [])
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_digest("https://discord.com/webhook", [], {"discord": {}}, analytics=analytics)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             desc = payload["embeds"][0]["description"]
             assert "Market Summary" in desc
             assert "Avg Price by Neighborhood" in desc
@@ -1414,13 +1801,13 @@ class TestDigestAnalytics:
                 "neighborhood": f"Neighborhood{i % 20}",
             }
         analytics = at.compute_digest_analytics(seen, [])
-        with patch("apartment_tracker.requests.post") as mock_post:
+        with patch.object(at._http, "post") as mock_post:
             mock_resp = MagicMock()
             mock_resp.status_code = 200
             mock_resp.raise_for_status = MagicMock()
             mock_post.return_value = mock_resp
             at.send_discord_digest("https://discord.com/webhook", [], {"discord": {}}, analytics=analytics)
-            payload = mock_post.call_args[1]["json"]
+            payload = json.loads(mock_post.call_args[1]["data"])
             desc = payload["embeds"][0]["description"]
             assert len(desc) <= 4096
 
@@ -1501,12 +1888,48 @@ class TestCheckListingStatus:
         session.fetch_with_status.return_value = (soup, 200)
         assert at.check_listing_status(session, "https://streeteasy.com/x") == "gone"
 
+    def test_200_off_market_split_across_elements_returns_gone(self):
+        soup = BeautifulSoup("<html><body><div><span>Off</span> <span>Market</span></div></body></html>", "lxml")
+        session = MagicMock()
+        session.fetch_with_status.return_value = (soup, 200)
+        assert at.check_listing_status(session, "https://streeteasy.com/x") == "gone"
+
     def test_200_normal_listing_returns_active(self):
         soup = BeautifulSoup("<html><body><span class='price'>$3,000</span></body></html>", "lxml")
         session = MagicMock()
         session.fetch_with_status.return_value = (soup, 200)
         assert at.check_listing_status(session, "https://streeteasy.com/x") == "active"
 
+    def test_requests_head_first(self):
+        session = MagicMock()
+        session.fetch_with_status.return_value = (None, 404)
+        at.check_listing_status(session, "https://streeteasy.com/x")
+        session.fetch_with_status.assert_called_once_with("https://streeteasy.com/x", head_first=True)
+
+    def test_head_404_skips_get(self):
+        session = at.ScraperSession()
+        session._session = MagicMock()
+        session._session.head.return_value = MagicMock(status_code=404)
+        assert session.fetch_with_status("https://streeteasy.com/x", head_first=True) == (None, 404)
+        session._session.get.assert_not_called()
+
+    def test_head_403_falls_through_to_get(self):
+        session = at.ScraperSession()
+        session._session = MagicMock()
+        session._session.head.return_value = MagicMock(status_code=403)
+        session._session.get.return_value = MagicMock(status_code=200, content=b"<html><body>ok</body></html>")
+        soup, status = session.fetch_with_status("https://streeteasy.com/x", head_first=True)
+        assert status == 200 and soup is not None
+        session._session.get.assert_called_once()
+
+    def test_head_200_falls_through_to_get(self):
+        session = at.ScraperSession()
+        session._session = MagicMock()
+        session._session.head.return_value = MagicMock(status_code=200)
+        session._session.get.return_value = MagicMock(status_code=200, content=b"<html><body>ok</body></html>")
+        soup, status = session.fetch_with_status("https://streeteasy.com/x", head_first=True)
+        assert status == 200 and soup is not None
+
 
 # ---------------------------------------------------------------------------
 # cleanup_stale_listings
@@ -1563,6 +1986,15 @@ class TestCleanupStaleListings:
         assert removed == 0
         session.fetch_with_status.assert_not_called()
 
+    def test_offset_timestamp_near_cutoff_still_checked(self):
+        # 7.5 days old, written with a -05:00 offset; compares "later" as a string
+        ts = (datetime.now(timezone.utc) - timedelta(days=7, hours=12)).astimezone(
+            timezone(timedelta(hours=-5))).isoformat()
+        seen = {"https://streeteasy.com/nyc": {"address": "Apt", "last_scraped": ts}}
+        session = MagicMock()
+        session.fetch_with_status.return_value = (None, 404)
+        assert at.cleanup_stale_listings(session, seen, self.CONFIG, "") == 1
+
     def test_respects_max_checks(self):
         old_ts = (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
         seen = {}
@@ -1824,3 +2256,195 @@ class TestPerUserSubwayPrefs:
             user_listing = listing
         # Should be the same object
         assert user_listing is listing
+
+
+# ---------------------------------------------------------------------------
+# send_discord_dm / send_personalized_notifications
+# ---------------------------------------------------------------------------
+
+class TestPersonalizedNotifications:
+    LISTING = {
+        "url": "https://streeteasy.com/building/test/1",
+        "address": "123 Test St #1",
+        "price": "$3,000",
+        "neighborhood": "East Village",
+        "beds": "1 bed",
+    }
+
+    @pytest.fixture(autouse=True)
+    def clear_dm_channels(self):
+        at._dm_channel_cache.clear()
+        yield
+        at._dm_channel_cache.clear()
+
+    def _user(self, user_id):
+        return {"discord_user_id": user_id, "subscribed": True,
+                "filters": {"neighborhoods": ["east-village"]}}
+
+    def test_dm_channel_created_once_per_user(self):
+        channel_resp = MagicMock(status_code=200)
+        channel_resp.content = b'{"id": "chan-1"}'
+        message_resp = MagicMock(status_code=200)
+        with patch.object(at._http, "post", side_effect=[channel_resp, message_resp, message_resp]) as mock_post:
+            assert at.send_discord_dm("token", "u1", {"title": "a"})
+            assert at.send_discord_dm("token", "u1", {"title": "b"})
+        urls = [c[0][0] for c in mock_post.call_args_list]
+        assert urls.count(f"{at.DISCORD_API_BASE}/users/@me/channels") == 1
+        assert urls[-1] == f"{at.DISCORD_API_BASE}/channels/chan-1/messages"
+
+    def test_dm_accepts_preserialized_payload(self):
+        at._dm_channel_cache["u1"] = "chan-1"
+        payload = at._dm_payload({"title": "a"})
+        with patch.object(at._http, "post", return_value=MagicMock(status_code=200)) as mock_post:
+            assert at.send_discord_dm("token", "u1", payload)
+            assert at.send_discord_dm("token", "u1", {"title": "a"})
+        bodies = [c[1]["data"] for c in mock_post.call_args_list]
+        assert bodies[0] is payload
+        assert json.loads(bodies[1]) == {"embeds": [{"title": "a"}]}
+
+    def test_sends_to_every_matching_user(self):
+        users = [self._user(f"u{i}") for i in range(4)]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_notifications.return_value = set()
+        with patch.object(at, "db_module", fake_db), \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            sent = at.send_personalized_notifications([self.LISTING], [], {}, {}, "token")
+        assert sent == 4
+        assert sorted(c[0][1] for c in mock_dm.call_args_list) == ["u0", "u1", "u2", "u3"]
+        fake_db.log_notifications.assert_called_once()
+        assert len(fake_db.log_notifications.call_args[0][0]) == 4
+
+    def test_logs_are_flushed_as_users_finish(self):
+        users = [self._user(f"u{i}") for i in range(4)]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_notifications.return_value = set()
+        with patch.object(at, "db_module", fake_db), \
+             patch.object(at, "NOTIFICATION_LOG_FLUSH_SIZE", 2), \
+             patch.object(at, "send_discord_dm", return_value=True):
+            at.send_personalized_notifications([self.LISTING], [], {}, {}, "token")
+        # Two chunks written while the workers ran, then an empty final flush
+        assert [len(c[0][0]) for c in fake_db.log_notifications.call_args_list] == [2, 2, 0]
+
+    def test_skips_other_neighborhoods_and_already_sent(self):
+        users = [self._user("u0"), self._user("u1"),
+                 {"discord_user_id": "u2", "filters": {"neighborhoods": ["astoria"]}}]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_notifications.side_effect = lambda ids, urls, kind: (
+            {("u0", self.LISTING["url"])} if kind == "new_listing" else set())
+        with patch.object(at, "db_module", fake_db), \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            sent = at.send_personalized_notifications([self.LISTING], [], {}, {}, "token")
+        assert sent == 1
+        assert [c[0][1] for c in mock_dm.call_args_list] == ["u1"]
+        fake_db.was_notification_sent.assert_not_called()
+
+    def test_embed_built_once_per_listing(self):
+        users = [self._user(f"u{i}") for i in range(3)]
+        fake_db = MagicMock()
+        fake_db.get_all_subscribed_users.return_value = users
+        fake_db.get_sent_notifications.return_value = set()
+        with patch.object(at, "db_module", fake_db), \
+             patch.object(at, "build_listing_embed", wraps=at.build_listing_embed) as mock_build, \
+             patch.object(at, "send_discord_dm", return_value=True) as mock_dm:
+            at.send_personalized_notifications([self.LISTING], [], {}, {}, "token")
+        assert mock_build.call_count == 1
+        embeds = [c[0][2] for c in mock_dm.call_args_list]
+        assert len(embeds) == 3 and all(e is embeds[0] for e in embeds)
+
+
+# ---------------------------------------------------------------------------
+# Discord rate limiting
+# ---------------------------------------------------------------------------
+
+class TestDiscordRateLimiter:
+    def _resp(self, status=200, headers=None):
+        resp = MagicMock(status_code=status)
+        resp.headers = headers or {}
+        resp.content = b"{}"
+        return resp
+
+    def test_no_wait_while_bucket_has_capacity(self):
+        limiter = at.DiscordRateLimiter()
+        limiter.update("hook", self._resp(headers={
+            "X-RateLimit-Remaining": "3", "X-RateLimit-Reset-After": "2.0"}))
+        with patch.object(at.time, "sleep") as mock_sleep:
+            limiter.wait("hook")
+            limiter.wait("hook")
+        mock_sleep.assert_not_called()
+
+    def test_waits_for_reset_when_exhausted(self):
+        limiter = at.DiscordRateLimiter()
+        limiter.update("hook", self._resp(headers={
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "60"}))
+        with patch.object(at.time, "sleep", side_effect=lambda d: limiter.update(
+                "hook", self._resp(headers={"X-RateLimit-Remaining": "5",
+                                            "X-RateLimit-Reset-After": "2"}))) as mock_sleep:
+            limiter.wait("hook")
+        assert 59 < mock_sleep.call_args[0][0] <= 60
+
+    def test_one_request_at_a_time_after_reset(self):
+        limiter = at.DiscordRateLimiter()
+        limiter.update("channels", self._resp(headers={
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0"}))
+        with patch.object(at.time, "sleep") as mock_sleep:
+            limiter.wait("channels")
+        mock_sleep.assert_not_called()
+        # The next caller waits for the first response instead of going through
+        with patch.object(at.time, "sleep", side_effect=lambda d: limiter.update(
+                "channels", self._resp(headers={"X-RateLimit-Remaining": "4",
+                                                "X-RateLimit-Reset-After": "2"}))) as mock_sleep:
+            limiter.wait("channels")
+        assert 0 < mock_sleep.call_args[0][0] <= at.DiscordRateLimiter.PROBE_TIMEOUT
+        assert limiter._buckets["channels"][0] == 3
+
+    def test_routes_share_reported_bucket(self):
+        limiter = at.DiscordRateLimiter()
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "60",
+                   "X-RateLimit-Bucket": "abc"}
+        limiter.update("a", self._resp(headers=headers))
+        limiter.update("b", self._resp(headers=headers))
+        assert limiter._route_buckets == {"a": "abc", "b": "abc"}
+
+    def test_post_retries_once_after_429(self):
+        limited = self._resp(429, {"Retry-After": "0.5"})
+        ok = self._resp(204)
+        with patch.object(at._http, "post", side_effect=[limited, ok]) as mock_post, \
+             patch.object(at.time, "sleep") as mock_sleep:
+            resp = at._discord_post("https://discord.com/api/webhooks/x", payload={"a": 1})
+        assert resp is ok
+        assert mock_post.call_count == 2
+        assert mock_post.call_args.kwargs["data"] == at._json_dumps({"a": 1})
+        mock_sleep.assert_called_once()
+        assert 0.5 <= mock_sleep.call_args[0][0] <= 0.5 + at.DISCORD_RETRY_JITTER_SECONDS
+
+    def test_retry_after_falls_back_to_json_body(self):
+        resp = self._resp(429)
+        resp.content = b'{"retry_after": 2.5, "global": false}'
+        assert at._retry_after_seconds(resp) == 2.5
+        resp.content = b"not json"
+        assert at._retry_after_seconds(resp) == 5.0
+
+    def test_aimd_pacing_after_429(self):
+        limiter = at.DiscordRateLimiter()
+        limiter.update("hook", self._resp(429))
+        limiter.update("hook", self._resp(429))
+        assert limiter._pace["hook"][0] == pytest.approx(1.5)
+        clock = [1000.0]
+        with patch.object(at.time, "monotonic", side_effect=lambda: clock[0]), \
+             patch.object(at.time, "sleep", side_effect=lambda d: clock.__setitem__(0, clock[0] + d)) as mock_sleep:
+            limiter.wait("hook")
+            limiter.wait("hook")
+        mock_sleep.assert_called_once_with(pytest.approx(1.5))
+
+        for _ in range(30):
+            limiter.update("hook", self._resp(204))
+        assert "hook" not in limiter._pace
+
+    def test_aimd_pacing_is_capped(self):
+        limiter = at.DiscordRateLimiter()
+        for _ in range(20):
+            limiter.update("hook", self._resp(429))
+        assert limiter._pace["hook"][0] == at.DiscordRateLimiter.PACE_MAX
@@ -0,0 +1,31 @@
+"""Tests for scripts/build_subway_data.py — MTA CSV parsing."""
+
+import io
+
+from scripts import build_subway_data as bsd
+
+HEADER = "Complex ID,Stop Name,GTFS Latitude,GTFS Longitude,Daytime Routes\n"
+
+
+class TestParseStations:
+    def test_accepts_csv_text(self):
+        csv_text = HEADER + "611,Times Sq-42 St,40.755,-73.987,N Q R W\n"
+        stations = bsd.parse_stations(csv_text)
+        assert [s["complex_id"] for s in stations] == ["611"]
+        assert stations[0]["routes"] == ["N", "Q", "R", "W"]
+
+    def test_accepts_line_iterable(self):
+        csv_file = io.StringIO(HEADER + "611,Times Sq-42 St,40.755,-73.987,N Q R W\n")
+        assert bsd.parse_stations(csv_file) == bsd.parse_stations(csv_file.getvalue())
+
+    def test_complex_coordinates_are_arithmetic_mean(self):
+        csv_text = HEADER + (
+            "611,Times Sq-42 St,40.7500,-73.9900,N Q R W\n"
+            "611,Times Sq-42 St,40.7560,-73.9860,1 2 3\n"
+            "611,42 St-Port Authority,40.7570,-73.9890,A C E\n"
+        )
+        (station,) = bsd.parse_stations(csv_text)
+        assert station["name"] == "Times Sq-42 St"
+        assert station["latitude"] == round((40.7500 + 40.7560 + 40.7570) / 3, 6)
+        assert station["longitude"] == round((-73.9900 - 73.9860 - 73.9890) / 3, 6)
+        assert station["routes"] == ["1", "2", "3", "A", "C", "E", "N", "Q", "R", "W"]
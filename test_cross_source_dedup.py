@@ -175,6 +175,18 @@ class TestFindCrossSourceDuplicate:
         rh_listing = {"address": "", "source": "renthop", "canonical_address": ""}
         assert at.find_cross_source_duplicate(rh_listing, seen) is None
 
+    def test_address_index_matches_linear_scan(self):
+        seen = self._make_seen({
+            "https://streeteasy.com/building/100-main-street/1a": {"address": "100 Main Street #1A"},
+            "https://streeteasy.com/building/100-main-street/2b": {"address": "100 Main Street #2B"},
+            "https://streeteasy.com/building/old/1a": {"address": "123 Old Street", "canonical_address": ""},
+        })
+        index = at.build_canonical_address_index(seen)
+        for address in ("100 Main St Apt 3C", "123 Old Street", "789 East 9th Street"):
+            rh_listing = {"address": address, "canonical_address": at.normalize_address(address)}
+            assert (at.find_cross_source_duplicate(rh_listing, seen, index)
+                    == at.find_cross_source_duplicate(rh_listing, seen))
+
 
 # ---------------------------------------------------------------------------
 # First RentHop run anti-spam
@@ -216,7 +228,7 @@ class TestFirstRentHopRunAntiSpam:
     @patch("apartment_tracker.load_seen")
     @patch("apartment_tracker.load_config")
     @patch("apartment_tracker.get_session")
-    @patch("apartment_tracker.send_discord_notification")
+    @patch("apartment_tracker.send_discord_batch")
     @patch("apartment_tracker.send_discord_summary")
     def test_first_renthop_run_no_notifications(
         self,
@@ -277,7 +289,7 @@ class TestFirstRentHopRunAntiSpam:
     @patch("apartment_tracker.load_seen")
     @patch("apartment_tracker.load_config")
     @patch("apartment_tracker.get_session")
-    @patch("apartment_tracker.send_discord_notification")
+    @patch("apartment_tracker.send_discord_batch")
     def test_second_renthop_run_sends_notification(
         self,
         mock_notify,
@@ -324,8 +336,8 @@ class TestFirstRentHopRunAntiSpam:
         # Notification should have been sent for the new RentHop listing
         mock_notify.assert_called_once()
         call_args = mock_notify.call_args
-        sent_listing = call_args[0][1]
-        assert sent_listing["url"] == "https://renthop.com/listings/99"
+        sent_listings = call_args[0][1]
+        assert [l["url"] for l in sent_listings] == ["https://renthop.com/listings/99"]
 
 
 # ---------------------------------------------------------------------------
@@ -341,7 +353,7 @@ class TestAltUrlsLinking:
     @patch("apartment_tracker.load_seen")
     @patch("apartment_tracker.load_config")
     @patch("apartment_tracker.get_session")
-    @patch("apartment_tracker.send_discord_notification")
+    @patch("apartment_tracker.send_discord_batch")
     def test_alt_urls_set_for_duplicate(
         self,
         mock_notify,
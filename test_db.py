@@ -1,10 +1,12 @@
 """Tests for db.py — MongoDB CRUD operations using mongomock."""
 
 import os
+import sys
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 import pytest
+from pymongo import UpdateOne
 
 # mongomock provides an in-memory MongoDB that doesn't need a real server
 try:
@@ -37,6 +39,27 @@ def mock_mongo():
             db_module.close()
 
 
+class RecordingCollection:
+    """Records bulk_write requests (mongomock can't build upserting UpdateOnes)."""
+
+    def __init__(self):
+        self.bulk_writes = []
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append((list(requests), ordered))
+
+
+@pytest.fixture
+def recorded_seen_col():
+    col = RecordingCollection()
+    with patch.object(db_module, "_seen_col", return_value=col):
+        yield col
+
+
+def _seen_upsert(url, entry):
+    return UpdateOne({"url": url}, {"$set": {**entry, "url": url}}, upsert=True)
+
+
 # ---------------------------------------------------------------------------
 # Connection
 # ---------------------------------------------------------------------------
@@ -51,6 +74,13 @@ class TestConnection:
         c2 = db_module.get_client()
         assert c1 is c2
 
+    def test_get_client_uses_pool_options(self):
+        db_module.close()
+        with patch("db.MongoClient") as client_cls:
+            db_module.get_client()
+        client_cls.assert_called_once_with("mongodb://localhost:27017", **db_module.MONGO_CLIENT_OPTIONS)
+        db_module._client = None
+
     def test_close_resets_state(self):
         db_module.get_client()
         db_module.close()
@@ -92,6 +122,18 @@ class TestSeenListings:
         result = db_module.get_seen_listing(url)
         assert result["price"] == "$2,800"
 
+    def test_upsert_seen_listings_single_bulk_write(self, recorded_seen_col):
+        count = db_module.upsert_seen_listings({
+            "https://se.com/a": {"price": "$3,000"},
+            "https://se.com/b": {"price": "$2,500"},
+        })
+        assert db_module.upsert_seen_listings({}) == 0
+        assert count == 2
+        assert recorded_seen_col.bulk_writes == [([
+            _seen_upsert("https://se.com/a", {"price": "$3,000"}),
+            _seen_upsert("https://se.com/b", {"price": "$2,500"}),
+        ], False)]
+
     def test_load_seen_from_mongo(self):
         db_module.upsert_seen_listing("https://se.com/a", {"price": "$3,000", "address": "A"})
         db_module.upsert_seen_listing("https://se.com/b", {"price": "$2,500", "address": "B"})
@@ -104,15 +146,46 @@ class TestSeenListings:
         for entry in seen.values():
             assert "_id" not in entry
 
-    def test_save_seen_to_mongo(self):
+    def test_save_seen_to_mongo(self, recorded_seen_col):
         seen = {
             "https://se.com/a": {"price": "$3,000", "address": "A"},
             "https://se.com/b": {"price": "$2,500", "address": "B"},
         }
-        db_module.save_seen_to_mongo(seen)
-        loaded = db_module.load_seen_from_mongo()
-        assert len(loaded) == 2
-        assert loaded["https://se.com/a"]["price"] == "$3,000"
+        assert db_module.save_seen_to_mongo(seen) == 2
+        assert recorded_seen_col.bulk_writes == [(
+            [_seen_upsert(url, entry) for url, entry in seen.items()], False)]
+
+    def test_save_seen_to_mongo_skips_unchanged(self, recorded_seen_col):
+        previous = {
+            "https://se.com/a": {"price": "$3,000", "address": "A"},
+            "https://se.com/b": {"price": "$2,500", "address": "B"},
+        }
+        seen = {
+            "https://se.com/a": {"price": "$3,000", "address": "A"},
+            "https://se.com/b": {"price": "$2,400", "address": "B"},
+            "https://se.com/c": {"price": "$2,000", "address": "C"},
+        }
+        assert db_module.save_seen_to_mongo(seen, previous=previous) == 2
+        assert recorded_seen_col.bulk_writes == [([
+            _seen_upsert("https://se.com/b", {"price": "$2,400", "address": "B"}),
+            _seen_upsert("https://se.com/c", {"price": "$2,000", "address": "C"}),
+        ], False)]
+
+    def test_save_seen_to_mongo_new_entry_already_inserted(self, recorded_seen_col):
+        # Entries missing from previous are upserted, so one another writer
+        # already inserted is updated rather than rejected
+        seen = {
+            "https://se.com/a": {"price": "$2,900", "address": "A"},
+            "https://se.com/b": {"price": "$2,500", "address": "B"},
+        }
+        assert db_module.save_seen_to_mongo(seen, previous={}) == 2
+        assert recorded_seen_col.bulk_writes == [(
+            [_seen_upsert(url, entry) for url, entry in seen.items()], False)]
+
+    def test_save_seen_to_mongo_unchanged_skips_write(self, recorded_seen_col):
+        seen = {"https://se.com/a": {"price": "$3,000"}}
+        assert db_module.save_seen_to_mongo(seen, previous={"https://se.com/a": {"price": "$3,000"}}) == 0
+        assert recorded_seen_col.bulk_writes == []
 
     def test_delete_seen_listing(self):
         url = "https://streeteasy.com/building/test/1"
@@ -158,6 +231,13 @@ class TestUserPreferences:
         result = db_module.update_user("nonexistent", {"subscribed": False})
         assert result is False
 
+    def test_toggle_no_fee(self):
+        db_module.create_user("123", "test_user", filters={"max_price": 3000})
+        assert db_module.toggle_no_fee("123")["filters"]["no_fee"] is True
+        assert db_module.toggle_no_fee("123")["filters"]["no_fee"] is False
+        assert db_module.get_user("123")["filters"] == {"max_price": 3000, "no_fee": False}
+        assert db_module.toggle_no_fee("nonexistent") is None
+
     def test_set_user_subscribed(self):
         db_module.create_user("123", "test_user")
         db_module.set_user_subscribed("123", False)
@@ -178,6 +258,14 @@ class TestUserPreferences:
         ids = {u["discord_user_id"] for u in users}
         assert ids == {"1", "3"}
 
+    def test_get_all_subscribed_users_interns_neighborhoods(self):
+        db_module.create_user("1", "user1", filters={"neighborhoods": ["upper-west-side"]})
+
+        users = db_module.get_all_subscribed_users()
+        hood = users[0]["filters"]["neighborhoods"][0]
+        assert hood == "upper-west-side"
+        assert hood is sys.intern("upper-west-side")
+
     def test_get_all_users(self):
         db_module.create_user("1", "user1")
         db_module.create_user("2", "user2")
@@ -216,6 +304,36 @@ class TestUserPreferences:
         assert isinstance(user["created_at"], datetime)
 
 
+class TestUserCache:
+    def test_repeat_get_user_served_from_cache(self):
+        db_module.create_user("123", "test_user")
+        with patch.object(db_module, "_user_col", side_effect=AssertionError("queried MongoDB")):
+            user = db_module.get_user("123")
+        assert user["discord_user_id"] == "123"
+
+    def test_cached_user_is_a_copy(self):
+        db_module.create_user("123", "test_user")
+        db_module.get_user("123")["filters"]["max_price"] = 1
+        assert db_module.get_user("123")["filters"]["max_price"] == 5000
+
+    def test_update_refreshes_cache(self):
+        db_module.create_user("123", "test_user")
+        db_module.update_user("123", {"filters.max_price": 4000})
+        with patch.object(db_module, "_user_col", side_effect=AssertionError("queried MongoDB")):
+            assert db_module.get_user("123")["filters"]["max_price"] == 4000
+
+    def test_delete_drops_cache(self):
+        db_module.create_user("123", "test_user")
+        db_module.delete_user("123")
+        assert db_module.get_user("123") is None
+
+    def test_expired_entry_is_reloaded(self):
+        with patch.object(db_module, "USER_CACHE_TTL_SECONDS", 0.0):
+            db_module.create_user("123", "test_user")
+        db_module._user_col().update_one({"discord_user_id": "123"}, {"$set": {"subscribed": False}})
+        assert db_module.get_user("123")["subscribed"] is False
+
+
 # ---------------------------------------------------------------------------
 # notification_log CRUD
 # ---------------------------------------------------------------------------
@@ -240,6 +358,21 @@ class TestNotificationLog:
         db_module.log_notification("123", "https://se.com/a", "new_listing", True)
         assert db_module.was_notification_sent("123", "https://se.com/b", "new_listing") is False
 
+    def test_get_sent_notifications_bulk(self):
+        db_module.log_notification("123", "https://se.com/a", "new_listing", True)
+        db_module.log_notification("456", "https://se.com/b", "new_listing", True)
+        db_module.log_notification("123", "https://se.com/b", "price_drop", True)
+        sent = db_module.get_sent_notifications(
+            ["123", "456"], ["https://se.com/a", "https://se.com/b"], "new_listing")
+        assert sent == {("123", "https://se.com/a"), ("456", "https://se.com/b")}
+        assert db_module.get_sent_notifications([], ["https://se.com/a"], "new_listing") == set()
+
+    def test_get_sent_user_ids_for(self):
+        db_module.log_notification("123", "digest-Feb 11, 2026", "daily_digest", True)
+        db_module.log_notification("456", "digest-Feb 10, 2026", "daily_digest", True)
+        db_module.log_notification("789", "digest-Feb 11, 2026", "new_listing", True)
+        assert db_module.get_sent_user_ids_for("daily_digest", "digest-Feb 11, 2026") == {"123"}
+
     def test_log_notification_records_timestamp(self):
         db_module.log_notification("123", "https://se.com/a", "new_listing", True)
         doc = db_module._notif_col().find_one({"discord_user_id": "123"})
@@ -247,6 +380,18 @@ class TestNotificationLog:
         assert "sent_at" in doc
         assert doc["success"] is True
 
+    def test_log_notifications_batch(self):
+        db_module.log_notifications([
+            ("123", "https://se.com/a", "new_listing", True),
+            ("456", "https://se.com/a", "price_drop", False),
+        ])
+        db_module.log_notifications([])
+        assert db_module.was_notification_sent("123", "https://se.com/a", "new_listing") is True
+        doc = db_module._notif_col().find_one({"discord_user_id": "456"})
+        assert doc["notification_type"] == "price_drop"
+        assert doc["success"] is False
+        assert "sent_at" in doc
+
 
 # ---------------------------------------------------------------------------
 # ensure_indexes
@@ -256,3 +401,10 @@ class TestIndexes:
     def test_ensure_indexes_runs_without_error(self):
         db_module.ensure_indexes()
         # Just verify it doesn't crash
+
+    def test_digest_and_subscriber_queries_are_indexed(self):
+        db_module.ensure_indexes()
+        notif_keys = [[field for field, _ in ix["key"]] for ix in db_module._notif_col().index_information().values()]
+        assert ["listing_url", "notification_type"] in notif_keys
+        user_indexes = db_module._user_col().index_information().values()
+        assert any(ix.get("partialFilterExpression") == {"subscribed": True} for ix in user_indexes)
@@ -44,6 +44,31 @@ def _make_interaction(user_id="123456789", username="testuser#1234"):
     return interaction
 
 
+# ---------------------------------------------------------------------------
+# /setup
+# ---------------------------------------------------------------------------
+
+class TestSetupCommand:
+    @pytest.mark.asyncio
+    async def test_reuses_welcome_panel(self):
+        from discord_bot import setup_command
+
+        async def no_history(limit):
+            return
+            yield
+
+        sent = []
+        for _ in range(2):
+            interaction = _make_interaction()
+            interaction.channel.history = no_history
+            await setup_command.callback(interaction)
+            sent.append(interaction.channel.send.call_args[1])
+
+        assert sent[0]["view"] is sent[1]["view"]
+        assert sent[0]["embed"] is sent[1]["embed"]
+        assert "NYC Apartment Tracker" in sent[0]["embed"].title
+
+
 # ---------------------------------------------------------------------------
 # /subscribe
 # ---------------------------------------------------------------------------
@@ -55,7 +80,8 @@ class TestSubscribeCommand:
 
         interaction = _make_interaction()
         await subscribe.callback(interaction)
-        interaction.response.send_message.assert_called_once()
+        interaction.response.defer.assert_called_once_with(ephemeral=True, thinking=True)
+        interaction.followup.send.assert_called_once()
 
         # Verify user was created in DB
         user = db_module.get_user("123456789")
@@ -71,7 +97,7 @@ class TestSubscribeCommand:
 
         interaction = _make_interaction()
         await subscribe.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "already subscribed" in call_args[0][0].lower()
 
     @pytest.mark.asyncio
@@ -86,7 +112,7 @@ class TestSubscribeCommand:
 
         user = db_module.get_user("123456789")
         assert user["subscribed"] is True
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "welcome back" in call_args[0][0].lower()
 
 
@@ -113,7 +139,7 @@ class TestUnsubscribeCommand:
 
         interaction = _make_interaction()
         await unsubscribe.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "not subscribed" in call_args[0][0].lower()
 
     @pytest.mark.asyncio
@@ -125,7 +151,7 @@ class TestUnsubscribeCommand:
 
         interaction = _make_interaction()
         await unsubscribe.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "already unsubscribed" in call_args[0][0].lower()
 
 
@@ -140,7 +166,7 @@ class TestStatusCommand:
 
         interaction = _make_interaction()
         await status.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "not subscribed" in call_args[0][0].lower()
 
     @pytest.mark.asyncio
@@ -158,7 +184,7 @@ class TestStatusCommand:
 
         interaction = _make_interaction()
         await status.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         embed = call_args[1]["embed"]
         assert "Active" in embed.title
 
@@ -171,10 +197,45 @@ class TestStatusCommand:
 
         interaction = _make_interaction()
         await status.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         embed = call_args[1]["embed"]
         assert "Paused" in embed.title
 
+    @pytest.mark.asyncio
+    async def test_status_reuses_rendered_fields(self):
+        from discord_bot import status, _build_settings_embed, _render_settings_fields
+
+        filters = {
+            "neighborhoods": ["east-village", "chelsea"],
+            "min_price": 1000,
+            "max_price": 0,
+            "bed_rooms": ["studio", "1"],
+            "no_fee": True,
+            "geo_bounds": None,
+        }
+        db_module.create_user("123456789", "testuser#1234", filters=filters)
+        _render_settings_fields.cache_clear()
+
+        interaction = _make_interaction()
+        await status.callback(interaction)
+        _build_settings_embed({"filters": filters})
+
+        fields = {f.name: f.value for f in interaction.followup.send.call_args[1]["embed"].fields}
+        assert fields["Neighborhoods"] == "East Village, Chelsea"
+        # max_price 0 disables the price filter, min included
+        assert fields["Price Range"] == "No limit"
+        assert fields["Bed Types"] == "Studio, 1"
+        assert fields["No-Fee Only"] == "Yes"
+        info = _render_settings_fields.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+    def test_summarize_filters_defaults(self):
+        from discord_bot import FilterSummary, _summarize_filters
+
+        assert _summarize_filters({}) == FilterSummary("All neighborhoods", "No limit", "Any", "No")
+        assert _summarize_filters({"min_price": 1500, "max_price": 3000}).price == "$1,500 – $3,000"
+        assert _summarize_filters({"max_price": 3000}).price == "Up to $3,000"
+
 
 # ---------------------------------------------------------------------------
 # /settings
@@ -187,7 +248,7 @@ class TestSettingsCommand:
 
         interaction = _make_interaction()
         await settings.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         assert "subscribe" in call_args[0][0].lower()
 
     @pytest.mark.asyncio
@@ -198,7 +259,7 @@ class TestSettingsCommand:
 
         interaction = _make_interaction()
         await settings.callback(interaction)
-        call_args = interaction.response.send_message.call_args
+        call_args = interaction.followup.send.call_args
         embed = call_args[1]["embed"]
         assert "Settings" in embed.title
         assert "view" in call_args[1]
@@ -245,6 +306,40 @@ class TestPriceRangeModal:
         call_args = interaction.response.send_message.call_args
         assert "valid numbers" in call_args[0][0].lower()
 
+    @pytest.mark.asyncio
+    async def test_zero_max_confirms_no_limit(self):
+        from discord_bot import PriceRangeModal
+
+        db_module.create_user("123456789", "testuser#1234")
+        modal = PriceRangeModal("123456789", db_module.get_user("123456789"))
+        modal.min_price_input = MagicMock()
+        modal.min_price_input.value = "1500"
+        modal.max_price_input = MagicMock()
+        modal.max_price_input.value = "0"
+
+        interaction = _make_interaction()
+        await modal.on_submit(interaction)
+        assert "**No limit**" in interaction.followup.send.call_args[0][0]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("min_value,max_value", [("-100", "3600"), ("0", "999999999999")])
+    async def test_out_of_range_price_skips_write(self, min_value, max_value):
+        from discord_bot import PriceRangeModal
+
+        user = {"filters": {"min_price": 0, "max_price": 5000}}
+        modal = PriceRangeModal("123456789", user)
+        modal.min_price_input = MagicMock()
+        modal.min_price_input.value = min_value
+        modal.max_price_input = MagicMock()
+        modal.max_price_input.value = max_value
+
+        interaction = _make_interaction()
+        with patch.object(db_module, "update_user") as update_user:
+            await modal.on_submit(interaction)
+        update_user.assert_not_called()
+        call_args = interaction.response.send_message.call_args
+        assert "between $0 and $100,000" in call_args[0][0]
+
     @pytest.mark.asyncio
     async def test_min_greater_than_max(self):
         from discord_bot import PriceRangeModal
@@ -280,14 +375,108 @@ class TestNoFeeToggle:
 
         updated = db_module.get_user("123456789")
         assert updated["filters"]["no_fee"] is True
-        # Now uses edit_message instead of send_message
-        interaction.response.edit_message.assert_called_once()
+        # Deferred, then edits the panel in place
+        interaction.response.defer.assert_called_once()
+        interaction.edit_original_response.assert_called_once()
 
 
 # ---------------------------------------------------------------------------
 # SubwayPrefsView
 # ---------------------------------------------------------------------------
 
+class TestNeighborhoodSelectView:
+    @pytest.mark.asyncio
+    async def test_selects_sorted_and_current_split_by_group(self):
+        from discord_bot import NeighborhoodSelectView
+
+        user = {"filters": {"neighborhoods": ["williamsburg", "chelsea", "astoria", "soho"]}}
+        view = NeighborhoodSelectView("123456789", user)
+
+        labels = [o.label for o in view.brooklyn_select.options]
+        assert labels == sorted(labels)
+        assert [o.value for o in view.manhattan_select.options if o.default] == ["chelsea"]
+        assert view._selections == {
+            "manhattan": ["chelsea"], "manhattan2": ["soho"],
+            "brooklyn": ["williamsburg"], "queens": ["astoria"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_selection_updates_view_in_place(self):
+        from discord_bot import NeighborhoodSelectView
+
+        db_module.create_user("123456789", "testuser#1234", filters={"neighborhoods": ["chelsea", "astoria"]})
+        view = NeighborhoodSelectView("123456789", db_module.get_user("123456789"))
+        view.manhattan_select._values = ["east-village"]
+
+        interaction = _make_interaction()
+        await view.manhattan_select.callback(interaction)
+
+        assert db_module.get_user("123456789")["filters"]["neighborhoods"] == ["east-village", "astoria"]
+        assert interaction.edit_original_response.call_args[1]["view"] is view
+        assert [o.value for o in view.manhattan_select.options if o.default] == ["east-village"]
+        assert [o.value for o in view.queens_select.options if o.default] == ["astoria"]
+
+
+class TestNotificationToggleView:
+    @pytest.mark.asyncio
+    async def test_toggle_reads_user_once_and_relabels(self):
+        from discord_bot import NotificationToggleView
+
+        db_module.create_user("123456789", "testuser#1234")
+        view = NotificationToggleView("123456789", db_module.get_user("123456789"))
+
+        interaction = _make_interaction()
+        with patch.object(db_module, "get_user", wraps=db_module.get_user) as get_user:
+            await view.price_drops_btn.callback(interaction)
+
+        assert get_user.call_count == 1
+        interaction.response.defer.assert_called_once()
+        assert db_module.get_user("123456789")["notification_settings"]["price_drops"] is False
+        kwargs = interaction.edit_original_response.call_args[1]
+        assert kwargs["view"].price_drops_btn.label == "Price Drops: OFF"
+        assert "Price drops" not in kwargs["embed"].description
+
+    @pytest.mark.asyncio
+    async def test_back_reuses_rendered_user(self):
+        from discord_bot import NotificationToggleView
+
+        db_module.create_user("123456789", "testuser#1234")
+        view = NotificationToggleView("123456789", db_module.get_user("123456789"))
+
+        interaction = _make_interaction()
+        with patch.object(db_module, "get_user") as get_user:
+            await view.back_btn.callback(interaction)
+
+        get_user.assert_not_called()
+        assert interaction.edit_original_response.call_args[1]["embed"].title == "Settings"
+
+
+class TestBedTypeSelectView:
+    @pytest.mark.asyncio
+    async def test_defaults_follow_current_beds(self):
+        from discord_bot import BedTypeSelectView
+
+        view = BedTypeSelectView("123456789", {"filters": {"bed_rooms": ["studio", "2"]}})
+
+        assert [o.label for o in view.select.options] == ["Studio", "1 Bedroom", "2 Bedrooms", "3+ Bedrooms"]
+        assert [o.value for o in view.select.options if o.default] == ["studio", "2"]
+
+    @pytest.mark.asyncio
+    async def test_selection_updates_view_in_place(self):
+        from discord_bot import BedTypeSelectView
+
+        db_module.create_user("123456789", "testuser#1234")
+        view = BedTypeSelectView("123456789", db_module.get_user("123456789"))
+        view.select._values = ["1", "2"]
+
+        interaction = _make_interaction()
+        await view.select.callback(interaction)
+
+        assert db_module.get_user("123456789")["filters"]["bed_rooms"] == ["1", "2"]
+        assert interaction.edit_original_response.call_args[1]["view"] is view
+        assert [o.value for o in view.select.options if o.default] == ["1", "2"]
+
+
 class TestSubwayPrefsView:
     @pytest.mark.asyncio
     async def test_shows_subscribed_neighborhoods(self):
@@ -441,3 +630,16 @@ class TestSubwayWeightModal:
 
         call_args = interaction.response.send_message.call_args
         assert "invalid" in call_args[0][0].lower()
+
+
+# ---------------------------------------------------------------------------
+# Blocking db calls
+# ---------------------------------------------------------------------------
+
+class TestDbOffload:
+    @pytest.mark.asyncio
+    async def test_db_calls_run_off_the_event_loop_thread(self):
+        import threading
+        from discord_bot import _db
+
+        assert await _db(threading.get_ident) != threading.get_ident()
@@ -378,6 +378,11 @@ class TestCheckRentHopListingStatus:
         session = self._make_session(RENTHOP_GONE_HTML, 200)
         assert rh.check_renthop_listing_status(session, "https://renthop.com/listings/1") == "gone"
 
+    def test_200_banner_split_across_elements_returns_gone(self):
+        html = "<html><body><p><b>Apartment</b> has been <em>rented</em></p></body></html>"
+        session = self._make_session(html, 200)
+        assert rh.check_renthop_listing_status(session, "https://renthop.com/listings/1") == "gone"
+
     def test_500_returns_unknown(self):
         session = self._make_session("", 500)
         assert rh.check_renthop_listing_status(session, "https://renthop.com/listings/1") == "unknown"
@@ -2,7 +2,9 @@
 
 import pytest
 
-from models import listing_matches_user, VALID_NEIGHBORHOODS
+from models import (
+    build_user_neighborhood_index, listing_matches_user, users_matching_listing, VALID_NEIGHBORHOODS,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -181,6 +183,11 @@ class TestBedTypeFiltering:
         listing = _listing(beds="N/A")
         assert listing_matches_user(listing, user) is True
 
+    def test_bed_number_is_whole_digit_run(self):
+        user = _user(bed_rooms=["1"])
+        assert listing_matches_user(_listing(beds="10 beds"), user) is False
+        assert listing_matches_user(_listing(beds="1 Bedroom"), user) is True
+
 
 # ---------------------------------------------------------------------------
 # Geo bounds filtering
@@ -214,6 +221,11 @@ class TestGeoFiltering:
         listing = _listing(longitude=None)
         assert listing_matches_user(listing, user) is True
 
+    def test_apply_to_limits_bounds_to_aliased_neighborhoods(self):
+        user = _user(geo_bounds={**self.BOUNDS, "apply_to": ["upper-west-side"]})
+        assert listing_matches_user(_listing(neighborhood="Manhattan Valley", longitude=-73.980), user) is False
+        assert listing_matches_user(_listing(neighborhood="Chelsea", longitude=-73.980), user) is True
+
 
 # ---------------------------------------------------------------------------
 # Multi-filter AND logic
@@ -325,3 +337,46 @@ class TestSubwayPreferencesNoEffect:
         }
         listing = _listing(neighborhood="East Village", price="$3,000")
         assert listing_matches_user(listing, user) is True
+
+
+# ---------------------------------------------------------------------------
+# build_user_neighborhood_index
+# ---------------------------------------------------------------------------
+
+class TestUserNeighborhoodIndex:
+    def test_index_agrees_with_neighborhood_filter(self):
+        users = [
+            _user(neighborhoods=["upper-west-side"]),
+            _user(neighborhoods=["east-village", "les"]),
+            _user(neighborhoods=["astoria"]),
+            _user(),
+        ]
+        index, unfiltered = build_user_neighborhood_index(users)
+        assert unfiltered == [users[3]]
+        for hood in ["Manhattan Valley", "Upper West Side", "East Village", "Chinatown",
+                     "Astoria", "Greenpoint", ""]:
+            candidates = index.get(hood, []) + unfiltered
+            expected = [u for u in users if listing_matches_user(_listing(neighborhood=hood), u)]
+            assert sorted(map(id, candidates)) == sorted(map(id, expected)), hood
+
+
+# ---------------------------------------------------------------------------
+# users_matching_listing
+# ---------------------------------------------------------------------------
+
+class TestUsersMatchingListing:
+    def test_agrees_with_listing_matches_user(self):
+        users = [
+            _user(neighborhoods=["upper-west-side"], max_price=3600),
+            _user(max_price=2500),
+            _user(bed_rooms=["studio"]),
+            _user(geo_bounds={"west_longitude": -74.001, "east_longitude": -73.983}),
+            _user(),
+        ]
+        for listing in [
+            _listing(neighborhood="Manhattan Valley", price="$3,000", beds="1 bed", longitude=-73.97),
+            _listing(neighborhood="Chelsea", price="$2,000", beds="Studio", longitude=-73.99),
+            _listing(neighborhood="", price="N/A", beds="N/A"),
+        ]:
+            expected = [u for u in users if listing_matches_user(listing, u)]
+            assert users_matching_listing(listing, iter(users)) == expected